@@ -0,0 +1,112 @@
+# -*- coding: UTF-8 -*-
+"""
+  generator.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:36:05
+
+  Purpose: Deterministic synthetic worktime data.
+
+  The same seed and count always give the same records. Durations
+  mimic real usage: mostly overtime sessions of an hour or two, some
+  hours taken off, and a few garbage entries shorter than two minutes.
+"""
+
+import math
+import random
+
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from libs.database import Database
+from libs.rollup import Rollup
+
+
+# (start, duration, notes)
+Record = Tuple[int, int, str]
+
+
+class Generator(object):
+    """Synthetic worktime records generator."""
+
+    NOTES: Tuple[str, ...] = (
+        "code review",
+        "deployment",
+        "meeting",
+        "migration",
+        "on-call",
+        "release",
+        "support call",
+        "zażółć gęślą jaźń",
+    )
+
+    def __init__(
+        self,
+        seed: int = 1,
+        begin: datetime = datetime(2016, 1, 1),
+        years: float = 10.0,
+    ) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * seed: int - random generator seed,
+        * begin: datetime - timestamp of the first record,
+        * years: float - time span covered by generated records.
+        """
+        self.seed: int = seed
+        self.begin: int = int(begin.timestamp())
+        self.span: int = int(years * 365.25 * 86400)
+
+    def records(self, count: int) -> Iterator[Record]:
+        """Yields 'count' records in chronological order."""
+        rng = random.Random(f"{self.seed}:{count}")
+        step: float = max(self.span / max(count, 1), 1.0)
+        start: float = float(self.begin)
+        for _ in range(count):
+            start += rng.uniform(0.5, 1.5) * step
+            dice: float = rng.random()
+            if dice < 0.02:
+                duration: int = rng.randint(-120, 120)
+            elif dice < 0.17:
+                duration = -3600 * rng.choice((1, 2, 4, 8))
+            else:
+                duration = min(
+                    max(int(rng.lognormvariate(math.log(3600), 0.6)), 300), 36000
+                )
+            notes: str = rng.choice(self.NOTES) if rng.random() < 0.3 else ""
+            yield (int(start), duration, notes)
+
+    def fill(self, dbh: Database, count: int, chunk: int = 100000) -> int:
+        """Insert records into the database and rebuild rollups."""
+        session: Optional[Session] = dbh.session
+        if session is None:
+            return 0
+        inserted: int = 0
+        batch: List[Record] = []
+        try:
+            for record in self.records(count):
+                batch.append(record)
+                if len(batch) >= chunk:
+                    inserted += self.__insert(session, batch)
+            if batch:
+                inserted += self.__insert(session, batch)
+            Rollup.rebuild(session)
+            session.commit()
+        finally:
+            session.close()
+        return inserted
+
+    @staticmethod
+    def __insert(session: Session, batch: List[Record]) -> int:
+        """Insert and clear the batch."""
+        session.connection().exec_driver_sql(
+            "INSERT INTO worktime (start, duration, notes) VALUES (?, ?, ?)",
+            batch,  # type: ignore
+        )
+        count: int = len(batch)
+        batch.clear()
+        return count
+
+
+# #[EOF]#######################################################################
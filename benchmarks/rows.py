@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+  rows.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:48:56
+
+  Purpose: Report row representation benchmark.
+
+  Compares time and memory per row of the report page query with the
+  former way of building it: full TWorkTime ORM instances tracked by
+  the identity map and formatted through DateTime per row. Memory is
+  measured with tracemalloc as the allocation held by one page of rows
+  and the peak allocation while building it, time is the best of a few
+  runs without tracing.
+
+  usage: python benchmarks/rows.py [--size N] [--page N] [--workdir DIR]
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+BENCHMARKS: str = os.path.dirname(os.path.abspath(__file__))
+SOURCES: str = os.path.join(os.path.dirname(BENCHMARKS), "jskworkclock")
+sys.path.insert(0, SOURCES)
+
+from sqlalchemy.orm import undefer
+
+from jsktoolbox.datetool import DateTime
+
+from libs.database import Database, TWorkTime
+from libs.report_cache import ReportCache
+from libs.report_data import ReportData
+
+from suite import best_of, database
+
+
+def legacy_page(dbh: Database, beginning: int, limit: int) -> List[Any]:
+    """Returns report page built from ORM instances, as before."""
+    session = dbh.session
+    out: List[Tuple[Tuple[int, int], Tuple[Any, ...]]] = []
+    dataset: List[TWorkTime] = (
+        session.query(TWorkTime)  # type: ignore
+        .options(undefer(TWorkTime.notes))
+        .filter(TWorkTime.start >= beginning)
+        .order_by(TWorkTime.start, TWorkTime.id)
+        .limit(limit)
+        .all()
+    )
+    for item in dataset:
+        item_date: datetime = DateTime.datetime_from_timestamp(item.start)
+        item_dur: timedelta = DateTime.elapsed_time_from_seconds(abs(item.duration))
+        opr: str = "-" if item.duration < 0 else ""
+        out.append(((item.start, item.id), (item_date, f"{opr}{item_dur}", item.notes)))
+    session.close()  # type: ignore
+    return out
+
+
+def measure(call: Callable[[], List[Any]], repeat: int) -> Dict[str, float]:
+    """Returns time and memory per row of the page returned by call."""
+    rows: int = len(call())
+    elapsed: float = best_of(repeat, call)
+    tracemalloc.start()
+    page = call()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del page
+    return {
+        "us_per_row": elapsed / rows * 1e6,
+        "held_bytes_per_row": held / rows,
+        "peak_bytes_per_row": peak / rows,
+    }
+
+
+def main() -> int:
+    """Run the benchmark."""
+    parser = ArgumentParser(description="Report row representation benchmark.")
+    parser.add_argument("--size", type=int, default=100000, help="database records")
+    parser.add_argument("--page", type=int, default=10000, help="rows per page")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workdir", default=None, help="keep databases here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir: str = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        dbh: Database = database(workdir, args.size, args.seed)
+        report = ReportData(dbh, now=datetime(1970, 1, 2))
+
+        def current() -> List[Any]:
+            ReportCache.clear()
+            return report.page(limit=args.page)
+
+        results: Dict[str, Dict[str, float]] = {
+            "orm instances": measure(
+                lambda: legacy_page(dbh, report.beginning, args.page), args.repeat
+            ),
+            "core tuples": measure(current, args.repeat),
+        }
+
+    print(f"{args.page} rows per page, {args.size} records")
+    for name, value in results.items():
+        print(
+            f"  {name:<16} {value['us_per_row']:8.2f} us/row "
+            f"{value['held_bytes_per_row']:8.0f} B/row held "
+            f"{value['peak_bytes_per_row']:8.0f} B/row peak"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+  suite.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:36:05
+
+  Purpose: Database and report benchmark suite.
+
+  For every requested size a database is filled by the deterministic
+  generator and the real code paths of the report window are timed
+  through their Tk-free seams: the first report page, month switching,
+  streaming the whole report, statistics, export and import. Treeview
+  filling is measured only when a display is available, statistics only
+  when numpy is installed. Results are written as JSON, a previous
+  result file can be given for comparison.
+
+  usage: python benchmarks/suite.py [--sizes N ...] [--output FILE]
+                                    [--compare FILE] [--workdir DIR]
+"""
+
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from argparse import ArgumentParser, Namespace
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+BENCHMARKS: str = os.path.dirname(os.path.abspath(__file__))
+SOURCES: str = os.path.join(os.path.dirname(BENCHMARKS), "jskworkclock")
+sys.path.insert(0, SOURCES)
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from libs.database import Database
+from libs.maintenance import Maintenance
+from libs.report_cache import ReportCache
+from libs.report_data import ReportData
+from libs.stats import Stats
+from libs.transfer import Exporter, Importer
+
+from generator import Generator
+
+
+def best_of(repeat: int, call: Callable[[], Any]) -> float:
+    """Returns the best wall time of 'repeat' calls in seconds."""
+    out: float = float("inf")
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        call()
+        out = min(out, time.perf_counter() - start)
+    return out
+
+
+def months(dbh: Database, count: int) -> List[datetime]:
+    """Returns up to 'count' months spread over the data range."""
+    session: Optional[Session] = dbh.session
+    if session is None:
+        return []
+    row = session.execute(
+        text("SELECT MIN(month), MAX(month) FROM month_balance")
+    ).first()
+    session.close()
+    if row is None or row[0] is None:
+        return []
+    first: int = (row[0] // 100) * 12 + row[0] % 100 - 1
+    last: int = (row[1] // 100) * 12 + row[1] % 100 - 1
+    step: int = max((last - first) // max(count, 1), 1)
+    return [
+        datetime(year=index // 12, month=index % 12 + 1, day=1)
+        for index in range(first, last + 1, step)
+    ][:count]
+
+
+def database(workdir: str, size: int, seed: int) -> Database:
+    """Returns database with 'size' generated records, reused if present."""
+    path: str = os.path.join(workdir, f"bench-{size}-{seed}.sqlite")
+    fresh: bool = not os.path.exists(path)
+    dbh = Database(path)
+    if fresh:
+        Generator(seed=seed).fill(dbh, size)
+        Maintenance(dbh).optimize()
+    return dbh
+
+
+def treeview(report: ReportData, pages: int) -> Optional[float]:
+    """Returns time of filling the report tree, None without a display."""
+    if not (os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin")):
+        return None
+    import tkinter as tk
+
+    from libs.vtree import VirtualTreeview
+
+    root = tk.Tk()
+    tree = VirtualTreeview(root, columns=("date", "time", "notes"), show="headings")
+    tree.pack()
+    root.update()
+    start: float = time.perf_counter()
+    # without an executor pages are fetched on the Tk thread
+    tree.reset(report.page)
+    root.update()
+    for _ in range(pages):
+        tree.yview_moveto(1.0)
+        root.update()
+    out: float = time.perf_counter() - start
+    root.destroy()
+    return out
+
+
+def run_size(dbh: Database, workdir: str, args: Namespace) -> Dict[str, Any]:
+    """Run all cases for one database, returns timings in seconds."""
+    out: Dict[str, Any] = {}
+    switches: List[datetime] = months(dbh, 12)
+    report = ReportData(dbh, now=switches[-1] if switches else None)
+
+    def switch(cold: bool) -> None:
+        for month in switches:
+            if cold:
+                ReportCache.clear()
+            ReportData(dbh, now=month, single=True).page()
+
+    def first_page() -> None:
+        ReportCache.clear()
+        report.page()
+
+    out["report_first_page"] = best_of(args.repeat, first_page)
+    out["report_month_switch"] = best_of(
+        args.repeat, lambda: switch(cold=True)
+    ) / max(len(switches), 1)
+    out["report_month_switch_cached"] = best_of(
+        args.repeat, lambda: switch(cold=False)
+    ) / max(len(switches), 1)
+    out["report_stream_all"] = best_of(
+        1, lambda: sum(1 for _ in ReportData(dbh, now=switches[0]).rows())
+    )
+
+    try:
+        out["stats_summary"] = best_of(args.repeat, lambda: Stats(dbh).summary())
+    except ImportError:
+        out["stats_summary"] = None
+
+    path: str = os.path.join(workdir, "bench-export.ndjson.gz")
+    out["export"] = best_of(1, lambda: Exporter(dbh).export(path))
+
+    target: str = os.path.join(workdir, "bench-import.sqlite")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    out["import"] = best_of(1, lambda: Importer(Database(target)).import_file(path))
+    out["import_duplicates"] = best_of(
+        1, lambda: Importer(Database(target)).import_file(path)
+    )
+    os.remove(path)
+
+    out["treeview_fill"] = treeview(report, args.pages)
+    return out
+
+
+def environment() -> Dict[str, Any]:
+    """Returns description of the benchmark environment."""
+    commit: Optional[str] = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return {
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+    }
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]) -> None:
+    """Print ratios of the current results to the previous ones."""
+    print(f"\ncompared to {previous['environment'].get('commit')}:")
+    for size, cases in current["results"].items():
+        old: Dict[str, Any] = previous["results"].get(size, {})
+        for case, value in cases.items():
+            if value is None or not old.get(case):
+                continue
+            print(f"  {size:>9} {case:<28} x{value / old[case]:.2f}")
+
+
+def main() -> int:
+    """Run the suite."""
+    parser = ArgumentParser(description="Database and report benchmark suite.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000]
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=20, help="scrolled tree pages")
+    parser.add_argument("--workdir", default=None, help="keep databases here")
+    parser.add_argument("--output", default=None, help="JSON result file")
+    parser.add_argument("--compare", default=None, help="previous JSON result file")
+    args = parser.parse_args()
+
+    result: Dict[str, Any] = {"environment": environment(), "results": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir: str = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for size in args.sizes:
+            start: float = time.perf_counter()
+            dbh: Database = database(workdir, size, args.seed)
+            print(f"{size}: database ready in {time.perf_counter() - start:.1f} s")
+            cases: Dict[str, Any] = run_size(dbh, workdir, args)
+            result["results"][str(size)] = cases
+            for case, value in cases.items():
+                shown: str = "skipped" if value is None else f"{value * 1000:.2f} ms"
+                print(f"  {case:<28} {shown}")
+
+    output: str = args.output or os.path.join(
+        BENCHMARKS, "results", f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(result, file, indent=2)
+    print(f"results saved: {output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(result, json.load(file))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+  cli.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:33:31
+
+  Purpose: Headless command line interface.
+
+  The CLI shares the database layer with the GUI application, but it
+  never imports tkinter, so it is cheap enough to be called from cron
+  jobs or status bars. A session started here is stored as the running
+  session checkpoint, so the GUI offers to resume it at startup.
+"""
+
+import os
+import sqlite3
+import sys
+
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from datetime import datetime, timedelta
+from inspect import currentframe
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.datetool import DateTime, Timestamp
+from jsktoolbox.systemtool import PathChecker
+from jsktoolbox.raisetool import Raise
+
+from libs.base import BDbHandler
+from libs.checkpoint_file import ActiveSessionFile
+from libs.instrument import Instrument
+from libs.keys import Keys
+from libs.paths import AppPaths
+
+if TYPE_CHECKING:
+    # the subsystems are imported by the commands using them, start, stop
+    # and status do not load SQLAlchemy at all
+    from libs.database import Database
+
+
+def _day(value: str) -> datetime:
+    """Argument type for YYYY-MM-DD date."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ArgumentTypeError(f"invalid date: '{value}', expected YYYY-MM-DD")
+
+
+def _month(value: str) -> datetime:
+    """Argument type for YYYY-MM month."""
+    try:
+        return datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        raise ArgumentTypeError(f"invalid month: '{value}', expected YYYY-MM")
+
+
+def _elapsed(seconds: int) -> str:
+    """Returns HH:MM:SS string, the same as in the reports."""
+    hours, reminder = divmod(max(seconds, 0), 3600)
+    minutes, secs = divmod(reminder, 60)
+    return f"{hours:02}:{minutes:02}:{secs:02}"
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    PATH: str = "_path_"
+
+
+class WorkClockCli(BDbHandler):
+    """WorkClock command line interface class."""
+
+    def __init__(self, path: str) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * path: str - sqlite database file path.
+        """
+        pc = PathChecker(path)
+        if not pc.exists and not pc.create():
+            raise Raise.error(
+                f"Cannot create local database: '{path}'",
+                OSError,
+                self._c_name,
+                currentframe(),
+            )
+        self._set_data(key=_Keys.PATH, value=path, set_default_type=str)
+
+    @property
+    def _db_handler(self) -> "Database":
+        """Returns database handler, opened on first use."""
+        if self._get_data(key=Keys.DBH) is None:
+            from libs.database import Database
+
+            self._set_data(
+                key=Keys.DBH,
+                value=Database(self._get_data(key=_Keys.PATH)),  # type: ignore
+                set_default_type=Database,
+            )
+        return self._get_data(key=Keys.DBH)  # type: ignore
+
+    def __running(self) -> Optional[Tuple[int, int]]:
+        """Returns (start, heartbeat) of the stored session or None.
+
+        A new or not yet upgraded database file is opened with the
+        database layer first.
+        """
+        checkpoint = ActiveSessionFile(self._get_data(key=_Keys.PATH))  # type: ignore
+        try:
+            return checkpoint.get()
+        except (OSError, sqlite3.Error):
+            from libs.checkpoint import ActiveSession
+
+            return ActiveSession(self._db_handler).get()
+
+    def start(self, args: Namespace) -> int:
+        """Start a work session."""
+        row: Optional[Tuple[int, int]] = self.__running()
+        if row is not None:
+            print(
+                f"already running since {DateTime.datetime_from_timestamp(row[0])}",
+                file=sys.stderr,
+            )
+            return 1
+        start: int = Timestamp.now()
+        ActiveSessionFile(self._get_data(key=_Keys.PATH)).begin(start)  # type: ignore
+        print(f"started at {DateTime.datetime_from_timestamp(start)}")
+        return 0
+
+    def stop(self, args: Namespace) -> int:
+        """Stop the running work session and store it."""
+        row: Optional[Tuple[int, int]] = self.__running()
+        if row is None:
+            print("not running", file=sys.stderr)
+            return 1
+        # the record goes through the writer, partitions and rollups
+        from libs.checkpoint import ActiveSession
+
+        duration: int = (
+            ActiveSession(self._db_handler)
+            .stop(row[0], Timestamp.now(), args.notes)
+            .result()
+        )
+        print(f"stopped, elapsed {_elapsed(duration)}")
+        return 0
+
+    def status(self, args: Namespace) -> int:
+        """Print the running session state."""
+        row: Optional[Tuple[int, int]] = self.__running()
+        if row is None:
+            print("stopped")
+        else:
+            print(
+                f"running {_elapsed(Timestamp.now() - row[0])} "
+                f"since {DateTime.datetime_from_timestamp(row[0])}"
+            )
+        return 0
+
+    def report(self, args: Namespace) -> int:
+        """Print report as tab separated rows."""
+        from libs.report_data import ReportData
+
+        report = ReportData(
+            self._db_handler,
+            previous=args.previous,
+            now=args.month,
+            single=args.month is not None,
+        )
+        for start, duration, notes in report.rows():
+            print(f"{start}\t{duration}\t{notes}")
+        return 0
+
+    def summary(self, args: Namespace) -> int:
+        """Print per period summaries as tab separated rows."""
+        from libs.summary import Summary, SummaryRow
+
+        today: datetime = datetime.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        begin: datetime = args.begin or today.replace(month=1, day=1)
+        # the 'to' day is included
+        end: datetime = (args.end or today) + timedelta(days=1)
+        rows: List[SummaryRow] = Summary(self._db_handler).report(
+            begin.timestamp(), end.timestamp(), args.by
+        )
+        for row in rows:
+            print(
+                f"{row.period}\t{row.entries}\t{Summary.format_time(row.total)}"
+                f"\t{Summary.format_time(row.balance)}"
+            )
+        return 0
+
+    def stats(self, args: Namespace) -> int:
+        """Print overtime statistics as tab separated rows."""
+        from libs.stats import Stats, StatsSummary
+        from libs.summary import Summary
+
+        stats: StatsSummary = Stats(
+            self._db_handler,
+            args.begin.timestamp() if args.begin else None,
+            (args.end + timedelta(days=1)).timestamp() if args.end else None,
+        ).summary()
+        fmt = Summary.format_time
+        print(f"entries\t{stats.entries}")
+        for row in stats.weekdays:
+            print(
+                f"weekday\t{Stats.WEEKDAYS[row.weekday]}\t{row.entries}"
+                f"\t{fmt(int(row.mean_day))}\t{fmt(int(row.mean_entry))}"
+            )
+        for item in stats.histogram:
+            high: str = "" if item.high == float("inf") else fmt(int(item.high))
+            print(f"length\t{fmt(int(item.low))}\t{high}\t{item.count}")
+        for quantile, value in stats.percentiles.items():
+            print(f"percentile\tp{quantile:g}\t{fmt(int(value))}")
+        for window, value in stats.rolling.items():
+            print(f"rolling\t{window}\t{fmt(value)}")
+        print(f"trend\t{stats.trend:.1f}")
+        return 0
+
+    def archive(self, args: Namespace) -> int:
+        """Archive closed years and list the archived ones."""
+        from libs.archive import Archive
+        from libs.summary import Summary
+
+        if not args.list:
+            until: int = args.until or datetime.now().year - 1
+            count: int = Archive(self._db_handler).freeze(until)
+            print(f"archived {count} records")
+        session = self._db_handler.session
+        if session is not None:
+            for item in Archive(self._db_handler).years(session):
+                print(
+                    f"{item.year}\t{item.count}\t{Summary.format_time(item.total)}"
+                    f"\t{item.path}"
+                )
+            session.close()
+        return 0
+
+    def partition(self, args: Namespace) -> int:
+        """Partition records by year, maintain and list the partitions."""
+        from libs.partition import Partitions
+
+        partitions = Partitions(self._db_handler)
+        if args.maintain:
+            for name, result in partitions.maintain().items():
+                print(f"{name}\t{result}")
+            return 0
+        if not args.list:
+            count: int = partitions.enable()
+            print(f"moved {count} records")
+        for year, _, _, file in partitions.layout():
+            print(
+                f"{Partitions.name(year)}\t{os.path.join(partitions.directory, file)}"
+            )
+        return 0
+
+    def vacuum(self, args: Namespace) -> int:
+        """Return free pages, convert older files to incremental vacuum."""
+        from libs.maintenance import Maintenance
+
+        print(f"freed {Maintenance(self._db_handler).vacuum(convert=True)} pages")
+        return 0
+
+    def backup(self, args: Namespace) -> int:
+        """Create, list and restore snapshots of the database."""
+        from libs.backup import Backups
+
+        backups = Backups(self._db_handler)
+        if args.restore:
+            saved: str = backups.restore(args.restore)
+            print(f"restored {args.restore}, previous state saved as {saved}")
+            return 0
+        if not args.list:
+            print(f"created {backups.snapshot()}")
+            for name in backups.prune():
+                print(f"removed {name}")
+        for item in backups.snapshots():
+            print(f"{item.name}\t{item.size}\t{item.path}")
+        return 0
+
+    def search(self, args: Namespace) -> int:
+        """Search notes, best matches first."""
+        from libs.search import NotesSearch
+        from libs.summary import Summary
+
+        search = NotesSearch(self._db_handler)
+        phrase: str = " ".join(args.words)
+        print(f"found {search.count(phrase)} records")
+        for hit in search.page(phrase, args.page - 1, args.size):
+            print(
+                f"{DateTime.datetime_from_timestamp(hit.start)}\t"
+                f"{Summary.format_time(hit.duration)}\t{' '.join(hit.snippet.split())}"
+            )
+        return 0
+
+    def export(self, args: Namespace) -> int:
+        """Export database to file."""
+        from libs.delta import DeltaExport, DeltaExporter
+        from libs.transfer import Exporter
+
+        compression: Optional[str] = (
+            None if args.compression == "none" else args.compression
+        )
+        if args.delta:
+            delta: DeltaExport = DeltaExporter(self._db_handler).export(
+                args.path, compression
+            )
+            if delta.file is None:
+                print("no changes to export")
+            else:
+                print(
+                    f"exported {delta.records} "
+                    f"{'records' if delta.base else 'changes'} to {delta.file}"
+                )
+            return 0
+        count: int = Exporter(self._db_handler).export(args.path, compression)
+        print(f"exported {count} records")
+        return 0
+
+    def import_file(self, args: Namespace) -> int:
+        """Import export file or delta export directory."""
+        from libs.delta import DeltaFormat, DeltaImport, DeltaImporter
+        from libs.transfer import Importer, ImportResult
+
+        path: str = args.path
+        if os.path.basename(path) == DeltaFormat.MANIFEST:
+            path = os.path.dirname(path) or os.curdir
+        if os.path.isdir(path):
+            delta: DeltaImport = DeltaImporter(self._db_handler).apply(path)
+            print(
+                f"applied {delta.deltas} deltas, inserted {delta.inserted} records, "
+                f"deleted: {delta.deleted}, skipped: {delta.skipped}"
+            )
+            return 0
+        result: ImportResult = Importer(self._db_handler).import_file(args.path)
+        print(
+            f"imported {result.inserted} records, "
+            f"skipped duplicates: {result.duplicates}, rejected: {result.rejected}"
+        )
+        return 0
+
+    def sync(self, args: Namespace) -> int:
+        """Synchronize with the sync servers."""
+        from libs.sync import SyncClient, SyncResult
+
+        if args.forget:
+            SyncClient(self._db_handler, args.forget).forget()
+            print(f"removed {args.forget}")
+            return 0
+        servers: List[str] = (
+            [args.server] if args.server else SyncClient.servers(self._db_handler)
+        )
+        if not servers:
+            print("no sync server configured")
+            return 1
+        for server in servers:
+            client = SyncClient(self._db_handler, server)
+            result: SyncResult = client.sync()
+            print(
+                f"{client.server}: pushed {result.pushed}, pulled {result.pulled} changes, "
+                f"inserted {result.inserted} records, deleted: {result.deleted}, "
+                f"skipped: {result.skipped}, rejected: {result.rejected}"
+            )
+        return 0
+
+    def sync_server(self, args: Namespace) -> int:
+        """Serve the database to the sync clients."""
+        from libs.sync_server import SyncServer
+
+        server = SyncServer(self._db_handler, args.host, args.port)
+        print(f"serving at {server.url}, Ctrl+C to stop", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        self._db_handler.writer.close()
+        return 0
+
+
+def parser() -> ArgumentParser:
+    """Returns command line parser."""
+    out = ArgumentParser(prog="workclock", description="Working time tracker.")
+    out.add_argument(
+        "--database",
+        metavar="PATH",
+        default=AppPaths.database(),
+        help="database file path",
+    )
+    commands = out.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("start", help="start a work session").set_defaults(
+        call=WorkClockCli.start
+    )
+
+    cmd = commands.add_parser("stop", help="stop and store the running session")
+    cmd.add_argument("-n", "--notes", default=None, help="session notes")
+    cmd.set_defaults(call=WorkClockCli.stop)
+
+    commands.add_parser("status", help="show the running session").set_defaults(
+        call=WorkClockCli.status
+    )
+
+    cmd = commands.add_parser("report", help="print report")
+    group = cmd.add_mutually_exclusive_group()
+    group.add_argument(
+        "--month", type=_month, default=None, help="report of one month, YYYY-MM"
+    )
+    group.add_argument(
+        "--previous", action="store_true", help="start from the previous month"
+    )
+    cmd.set_defaults(call=WorkClockCli.report)
+
+    cmd = commands.add_parser("summary", help="print per period summaries")
+    cmd.add_argument(
+        "--from",
+        dest="begin",
+        type=_day,
+        default=None,
+        help="first day, YYYY-MM-DD, default: beginning of the year",
+    )
+    cmd.add_argument(
+        "--to",
+        dest="end",
+        type=_day,
+        default=None,
+        help="last day, YYYY-MM-DD, default: today",
+    )
+    # literal values of Granularity, the summary module loads SQLAlchemy
+    cmd.add_argument(
+        "--by", choices=("day", "week", "month", "year"), default="month"
+    )
+    cmd.set_defaults(call=WorkClockCli.summary)
+
+    cmd = commands.add_parser("stats", help="print overtime statistics")
+    cmd.add_argument(
+        "--from",
+        dest="begin",
+        type=_day,
+        default=None,
+        help="first day, YYYY-MM-DD, default: first record",
+    )
+    cmd.add_argument(
+        "--to",
+        dest="end",
+        type=_day,
+        default=None,
+        help="last day, YYYY-MM-DD, default: last record",
+    )
+    cmd.set_defaults(call=WorkClockCli.stats)
+
+    cmd = commands.add_parser("archive", help="move closed years to archive files")
+    group = cmd.add_mutually_exclusive_group()
+    group.add_argument(
+        "--until",
+        type=int,
+        default=None,
+        metavar="YEAR",
+        help="the last archived year, default: the previous year",
+    )
+    group.add_argument(
+        "--list", action="store_true", help="only list the archived years"
+    )
+    cmd.set_defaults(call=WorkClockCli.archive)
+
+    cmd = commands.add_parser("search", help="search notes")
+    cmd.add_argument("words", nargs="+", help="searched words, the last as a prefix")
+    cmd.add_argument("--page", type=int, default=1, help="result page, from 1")
+    cmd.add_argument("--size", type=int, default=20, help="results per page")
+    cmd.set_defaults(call=WorkClockCli.search)
+
+    cmd = commands.add_parser(
+        "partition", help="move records to per-year database files"
+    )
+    group = cmd.add_mutually_exclusive_group()
+    group.add_argument(
+        "--maintain",
+        action="store_true",
+        help="check and vacuum the partitions, the current year excluded",
+    )
+    group.add_argument(
+        "--list", action="store_true", help="only list the partitions"
+    )
+    cmd.set_defaults(call=WorkClockCli.partition)
+
+    commands.add_parser(
+        "vacuum", help="return free pages to the file system"
+    ).set_defaults(call=WorkClockCli.vacuum)
+
+    cmd = commands.add_parser("backup", help="create and restore database snapshots")
+    group = cmd.add_mutually_exclusive_group()
+    group.add_argument(
+        "--restore",
+        default=None,
+        metavar="NAME",
+        help="replace the database with the snapshot, close the GUI first",
+    )
+    group.add_argument("--list", action="store_true", help="only list the snapshots")
+    cmd.set_defaults(call=WorkClockCli.backup)
+
+    cmd = commands.add_parser("export", help="export records to file")
+    cmd.add_argument("path", help="output file, or directory with --delta")
+    # literal values of ExportFormat, see the '--by' note above
+    cmd.add_argument(
+        "--compression",
+        choices=("gzip", "zstd", "none"),
+        default="gzip",
+    )
+    cmd.add_argument(
+        "--delta",
+        action="store_true",
+        help="export changes since the previous export to the directory",
+    )
+    cmd.set_defaults(call=WorkClockCli.export)
+
+    cmd = commands.add_parser("import", help="import records from export file")
+    cmd.add_argument(
+        "path", help="export file, old '.wrk' files included, or delta directory"
+    )
+    cmd.set_defaults(call=WorkClockCli.import_file)
+
+    cmd = commands.add_parser("sync", help="synchronize with sync servers")
+    cmd.add_argument(
+        "server",
+        nargs="?",
+        default=None,
+        help="sync server URL, added to the configured ones, all of them by default",
+    )
+    cmd.add_argument(
+        "--forget",
+        default=None,
+        metavar="URL",
+        help="remove the server from the configured ones",
+    )
+    cmd.set_defaults(call=WorkClockCli.sync)
+
+    cmd = commands.add_parser("sync-server", help="serve the database to sync clients")
+    cmd.add_argument("--host", default="127.0.0.1", help="address to bind")
+    cmd.add_argument("--port", type=int, default=8765, help="port to bind")
+    cmd.set_defaults(call=WorkClockCli.sync_server)
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    args: Namespace = parser().parse_args(argv)
+    Instrument.setup()
+    try:
+        return args.call(WorkClockCli(os.path.expanduser(args.database)), args)
+    except Exception as ex:
+        print(f"workclock: {ex}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+# #[EOF]#######################################################################
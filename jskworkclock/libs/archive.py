@@ -0,0 +1,594 @@
+# -*- coding: utf-8 -*-
+"""
+  archive.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:54:37
+
+  Purpose: Memory mapped columnar archive of closed years.
+
+  Closed years are moved out of the worktime table into one file per
+  year, with fixed width int64 columns of start, id and duration sorted
+  by (start, id), an offset index into a UTF-8 blob of notes, and per
+  month and per day totals, so aggregations over archived years never
+  touch the rows. Files are read through mmap and memoryview casts,
+  without copying. Archived months keep their month_balance rollups,
+  so balances are not affected, and readers of worktime data put the
+  archive rows before the live ones: no live row can start before the
+  end of the archived years. The archive does not distinguish empty
+  notes from NULL.
+
+  File layout, little endian, sections aligned to 8 bytes:
+    header  magic, version, year, rows, days, notes size, total, crc32
+    months  entries[12], total[12]
+    days    day_start[days], day_entries[days], day_total[days]
+    rows    start[rows], id[rows], duration[rows]
+    notes   offset[rows + 1], blob[notes size]
+"""
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from inspect import currentframe
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.raisetool import Raise
+
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.instrument import Instrument
+from libs.rollup import Rollup
+
+
+# (start, id, duration, notes)
+ArchiveRow = Tuple[int, int, int, str]
+
+
+class ArchiveFormat(object, metaclass=ReadOnlyClass):
+    """Archive file format constants."""
+
+    MAGIC: bytes = b"WCAR"
+    VERSION: int = 1
+    SUFFIX: str = ".wca"
+    # magic, version, reserved, year, rows, days, notes size, total, crc32
+    HEADER: struct.Struct = struct.Struct("<4sHHiqqqqI")
+    HEADER_SIZE: int = 64
+
+
+def _view(buffer: Any, offset: int, count: int) -> Sequence[int]:
+    """Returns int64 column of the buffer, zero copy on little endian hosts."""
+    view = memoryview(buffer)[offset : offset + 8 * count]
+    if sys.byteorder == "little":
+        return view.cast("q")
+    out = array("q", view.tobytes())
+    out.byteswap()
+    return out
+
+
+def _local_midnight(timestamp: int) -> Tuple[datetime, int]:
+    """Returns local date time and the beginning of its day."""
+    tmp: datetime = datetime.fromtimestamp(timestamp)
+    return tmp, int(tmp.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+
+
+def _next_midnight(day_start: int) -> int:
+    """Returns the beginning of the next local day."""
+    tmp: datetime = datetime.fromtimestamp(day_start) + timedelta(days=1)
+    return int(tmp.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+
+
+class ArchiveYear(object):
+    """Memory mapped archive file of one year."""
+
+    __slots__ = (
+        "path",
+        "year",
+        "count",
+        "total",
+        "crc",
+        "months",
+        "day_start",
+        "day_entries",
+        "day_total",
+        "start",
+        "ids",
+        "duration",
+        "offsets",
+        "notes",
+        "__map",
+    )
+
+    def __init__(self, path: str) -> None:
+        """Constructor, maps the file read only.
+
+        ### Raises:
+        * ValueError: if the file is not a valid archive.
+        """
+        self.path: str = path
+        with open(path, "rb") as file:
+            self.__map: mmap.mmap = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        (magic, version, _, year, count, days, notes, total, crc) = (
+            ArchiveFormat.HEADER.unpack_from(self.__map)
+        )
+        if magic != ArchiveFormat.MAGIC or version != ArchiveFormat.VERSION:
+            raise Raise.error(
+                f"Not a WorkClock archive file: '{path}'",
+                ValueError,
+                self.__class__.__qualname__,
+                currentframe(),
+            )
+        self.year: int = year
+        self.count: int = count
+        self.total: int = total
+        self.crc: int = crc
+
+        offset: int = ArchiveFormat.HEADER_SIZE
+        entries = _view(self.__map, offset, 12)
+        totals = _view(self.__map, offset + 96, 12)
+        # (YYYYMM, entries, total) of months with entries
+        self.months: List[Tuple[int, int, int]] = [
+            (year * 100 + month + 1, entries[month], totals[month])
+            for month in range(12)
+            if entries[month]
+        ]
+        offset += 192
+        self.day_start: Sequence[int] = _view(self.__map, offset, days)
+        self.day_entries: Sequence[int] = _view(self.__map, offset + 8 * days, days)
+        self.day_total: Sequence[int] = _view(self.__map, offset + 16 * days, days)
+        offset += 24 * days
+        self.start: Sequence[int] = _view(self.__map, offset, count)
+        self.ids: Sequence[int] = _view(self.__map, offset + 8 * count, count)
+        self.duration: Sequence[int] = _view(self.__map, offset + 16 * count, count)
+        offset += 24 * count
+        self.offsets: Sequence[int] = _view(self.__map, offset, count + 1)
+        offset += 8 * (count + 1)
+        self.notes: memoryview = memoryview(self.__map)[offset : offset + notes]
+
+    def verify(self) -> bool:
+        """Returns True if the checksum of the file content matches."""
+        return (
+            zlib.crc32(memoryview(self.__map)[ArchiveFormat.HEADER_SIZE :])
+            == self.crc
+        )
+
+    def note(self, index: int) -> str:
+        """Returns notes of the row."""
+        return str(
+            self.notes[self.offsets[index] : self.offsets[index + 1]], "utf-8"
+        )
+
+    def row(self, index: int) -> ArchiveRow:
+        """Returns (start, id, duration, notes) of the row."""
+        return (
+            self.start[index],
+            self.ids[index],
+            self.duration[index],
+            self.note(index),
+        )
+
+    def index(self, timestamp: Optional[int]) -> int:
+        """Returns index of the first row starting at or after timestamp."""
+        if timestamp is None:
+            return self.count
+        return bisect_left(self.start, timestamp)
+
+    def after(self, key: Tuple[int, int]) -> int:
+        """Returns index of the first row with (start, id) greater than key."""
+        index: int = bisect_left(self.start, key[0])
+        while (
+            index < self.count
+            and self.start[index] == key[0]
+            and self.ids[index] <= key[1]
+        ):
+            index += 1
+        return index
+
+    def before(self, key: Tuple[int, int]) -> int:
+        """Returns index of the first row with (start, id) not less than key."""
+        index: int = bisect_left(self.start, key[0])
+        while (
+            index < self.count
+            and self.start[index] == key[0]
+            and self.ids[index] < key[1]
+        ):
+            index += 1
+        return index
+
+    @staticmethod
+    def write(path: str, year: int, rows: List[ArchiveRow]) -> None:
+        """Write archive file of rows sorted by (start, id), atomically."""
+        starts = array("q", (row[0] for row in rows))
+        ids = array("q", (row[1] for row in rows))
+        durations = array("q", (row[2] for row in rows))
+        offsets = array("q", [0])
+        blob = bytearray()
+        entries = array("q", [0] * 12)
+        totals = array("q", [0] * 12)
+        day_start = array("q")
+        day_entries = array("q")
+        day_total = array("q")
+        next_day: int = 0
+        for start, _, duration, notes in rows:
+            blob += (notes or "").encode("utf-8")
+            offsets.append(len(blob))
+            if start >= next_day:
+                local, midnight = _local_midnight(start)
+                next_day = _next_midnight(midnight)
+                day_start.append(midnight)
+                day_entries.append(0)
+                day_total.append(0)
+                month: int = local.month - 1
+            entries[month] += 1
+            totals[month] += duration
+            day_entries[-1] += 1
+            day_total[-1] += duration
+
+        payload: List[array] = [
+            entries,
+            totals,
+            day_start,
+            day_entries,
+            day_total,
+            starts,
+            ids,
+            durations,
+            offsets,
+        ]
+        if sys.byteorder != "little":
+            for column in payload:
+                column.byteswap()
+        body = b"".join(column.tobytes() for column in payload) + bytes(blob)
+        header: bytes = ArchiveFormat.HEADER.pack(
+            ArchiveFormat.MAGIC,
+            ArchiveFormat.VERSION,
+            0,
+            year,
+            len(rows),
+            len(day_start),
+            len(blob),
+            sum(durations),
+            zlib.crc32(body),
+        ).ljust(ArchiveFormat.HEADER_SIZE, b"\0")
+        tmp: str = f"{path}.tmp"
+        with open(tmp, "wb") as file:
+            file.write(header)
+            file.write(body)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, path)
+
+
+class Archive(BDbHandler):
+    """Archive of closed years class."""
+
+    __lock: Lock = Lock()
+    # database path -> ((year, file) rows, opened years)
+    __opened: Dict[str, Tuple[List[Tuple[int, str]], List[ArchiveYear]]] = {}
+
+    def __init__(self, dbh: Database) -> None:
+        """Constructor."""
+        self._db_handler = dbh
+
+    @property
+    def directory(self) -> str:
+        """Returns archive directory, next to the database file."""
+        return f"{os.path.splitext(self._db_handler.path)[0]}.archive"
+
+    def years(self, session: Session) -> List[ArchiveYear]:
+        """Returns archived years in chronological order."""
+        listed: List[Tuple[int, str]] = [
+            (year, file)
+            for year, file in session.execute(
+                text("SELECT year, file FROM archive_year ORDER BY year")
+            )
+        ]
+        with self.__lock:
+            cached = self.__opened.get(self._db_handler.path)
+            if cached is not None and cached[0] == listed:
+                return cached[1]
+            out: List[ArchiveYear] = [
+                ArchiveYear(os.path.join(self.directory, file)) for _, file in listed
+            ]
+            self.__opened[self._db_handler.path] = (listed, out)
+        return out
+
+    def __overlapping(
+        self, session: Session, begin: Optional[int], end: Optional[int]
+    ) -> Iterator[Tuple[ArchiveYear, int, int]]:
+        """Yields (year, first index, end index) of rows in [begin, end)."""
+        for item in self.years(session):
+            first: int = 0 if begin is None else item.index(begin)
+            last: int = item.count if end is None else item.index(end)
+            if first < last:
+                yield item, first, last
+
+    def rows(
+        self, session: Session, begin: Optional[int] = None, end: Optional[int] = None
+    ) -> Iterator[ArchiveRow]:
+        """Yields archived rows of [begin, end) in (start, id) order."""
+        for item, first, last in self.__overlapping(session, begin, end):
+            for index in range(first, last):
+                yield item.row(index)
+
+    def page(
+        self,
+        session: Session,
+        begin: int,
+        end: Optional[int],
+        after: Optional[Tuple[int, int]],
+        limit: int,
+        backward: bool = False,
+    ) -> List[ArchiveRow]:
+        """Returns up to 'limit' rows of [begin, end) next to the 'after' key.
+
+        Rows are in ascending order, or descending if 'backward' is set.
+        """
+        out: List[ArchiveRow] = []
+        ranges = list(self.__overlapping(session, begin, end))
+        if backward:
+            ranges.reverse()
+        for item, first, last in ranges:
+            if len(out) >= limit:
+                break
+            if backward:
+                if after is not None:
+                    last = min(last, item.before(after))
+                indexes = range(last - 1, max(first, last - limit + len(out)) - 1, -1)
+            else:
+                if after is not None:
+                    first = max(first, item.after(after))
+                indexes = range(first, min(last, first + limit - len(out)))
+            out.extend(item.row(index) for index in indexes)
+        return out
+
+    def exists(self, session: Session, begin: int, end: Optional[int]) -> bool:
+        """Returns True if any archived row starts in [begin, end)."""
+        return next(self.__overlapping(session, begin, end), None) is not None
+
+    def columns(
+        self, session: Session, begin: Optional[int] = None, end: Optional[int] = None
+    ) -> List[Tuple[Sequence[int], Sequence[int]]]:
+        """Returns zero copy (start, duration) column slices of [begin, end)."""
+        return [
+            (item.start[first:last], item.duration[first:last])  # type: ignore
+            for item, first, last in self.__overlapping(session, begin, end)
+        ]
+
+    def periods(
+        self, session: Session, begin: int, end: int, label: str
+    ) -> List[Tuple[str, int, int]]:
+        """Returns (period, entries, total) of [begin, end) in period order.
+
+        ### Arguments:
+        * session: Session - database session,
+        * begin: int - range beginning timestamp,
+        * end: int - range end timestamp, excluded,
+        * label: str - strftime format of the local day making the period.
+
+        Whole days are taken from the daily totals of the files, only the
+        days cut by the range edges are summed from the rows.
+        """
+        out: Dict[str, List[int]] = {}
+        for item in self.years(session):
+            first: int = max(bisect_left(item.day_start, begin) - 1, 0)
+            last: int = bisect_left(item.day_start, end)
+            for day in range(first, last):
+                day_start: int = item.day_start[day]
+                # only the first and the last day can be cut by the range
+                day_end: int = (
+                    _next_midnight(day_start)
+                    if day in (first, last - 1)
+                    else item.day_start[day + 1]
+                )
+                if day_end <= begin:
+                    continue
+                if day_start >= begin and day_end <= end:
+                    entries, total = item.day_entries[day], item.day_total[day]
+                else:
+                    low: int = item.index(max(day_start, begin))
+                    high: int = item.index(min(day_end, end))
+                    entries = high - low
+                    total = sum(item.duration[low:high])  # type: ignore
+                if entries:
+                    period = out.setdefault(
+                        datetime.fromtimestamp(day_start).strftime(label), [0, 0]
+                    )
+                    period[0] += entries
+                    period[1] += total
+        return [(period, value[0], value[1]) for period, value in sorted(out.items())]
+
+    def total(self, session: Session, begin: int, end: int) -> int:
+        """Returns sum of archived durations in [begin, end)."""
+        return sum(total for _, _, total in self.periods(session, begin, end, ""))
+
+    def contains(self, session: Session, start: int, duration: int, notes: Any) -> bool:
+        """Returns True if the archive holds the (start, duration, notes) record."""
+        for item, first, last in self.__overlapping(session, start, start + 1):
+            for index in range(first, last):
+                if item.duration[index] == duration and item.note(index) == (
+                    notes or ""
+                ):
+                    return True
+        return False
+
+    def months(self, session: Session) -> List[Tuple[int, int, int]]:
+        """Returns (YYYYMM, total, entries) of archived months."""
+        return [
+            (month, total, entries)
+            for item in self.years(session)
+            for month, entries, total in item.months
+        ]
+
+    def restore(self, session: Session) -> None:
+        """Rewrite rollups of archived months from the archive files."""
+        boundary: int = Rollup.boundary(session)
+        if not boundary:
+            return
+        session.execute(
+            text("DELETE FROM month_balance WHERE month < :month"),
+            {"month": Rollup.month_key(boundary)},
+        )
+        balance: int = 0
+        for month, total, entries in self.months(session):
+            balance += total
+            session.execute(
+                text(
+                    "INSERT INTO month_balance (month, total, balance, entries) "
+                    "VALUES (:month, :total, :balance, :entries)"
+                ),
+                {
+                    "month": month,
+                    "total": total,
+                    "balance": balance,
+                    "entries": entries,
+                },
+            )
+
+    @Instrument.timed("archive.freeze")
+    def freeze(self, until: int) -> int:
+        """Move all records of years up to 'until' into archive files.
+
+        Every year gets its own file, written and verified outside any
+        transaction. The files are then registered and the records
+        deleted by a single writer job, which fails if the records
+        changed in the meantime, then the database file is compacted.
+
+        ### Arguments:
+        * until: int - the last archived year, it has to be closed.
+
+        ### Returns:
+        Number of archived records.
+        """
+        if until >= datetime.now().year:
+            raise Raise.error(
+                f"Only closed years can be archived, not: {until}",
+                ValueError,
+                self._c_name,
+                currentframe(),
+            )
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return 0
+        try:
+            boundary: int = Rollup.boundary(session)
+            end: int = Rollup.month_start((until + 1) * 100 + 1)
+            if end <= boundary:
+                return 0
+            rows: List[ArchiveRow] = [
+                (start, ident, duration, notes)
+                for start, ident, duration, notes in session.connection().execute(
+                    text(
+                        "SELECT start, id, duration, notes FROM worktime "
+                        "WHERE start < :end ORDER BY start, id"
+                    ),
+                    {"end": end},
+                )
+            ]
+        finally:
+            session.close()
+        first: int = until
+        if boundary:
+            first = datetime.fromtimestamp(boundary).year
+        elif rows:
+            first = min(first, datetime.fromtimestamp(rows[0][0]).year)
+        os.makedirs(self.directory, exist_ok=True)
+        years: List[Dict[str, Any]] = []
+        written: List[str] = []
+        try:
+            position: int = 0
+            for year in range(first, until + 1):
+                year_end: int = Rollup.month_start((year + 1) * 100 + 1)
+                chunk: List[ArchiveRow] = []
+                while position < len(rows) and rows[position][0] < year_end:
+                    chunk.append(rows[position])
+                    position += 1
+                file: str = f"{year}{ArchiveFormat.SUFFIX}"
+                path: str = os.path.join(self.directory, file)
+                ArchiveYear.write(path, year, chunk)
+                written.append(path)
+                item = ArchiveYear(path)
+                if (
+                    not item.verify()
+                    or item.count != len(chunk)
+                    or item.total != sum(row[2] for row in chunk)
+                ):
+                    raise Raise.error(
+                        f"Archive file verification failed: '{path}'",
+                        OSError,
+                        self._c_name,
+                        currentframe(),
+                    )
+                years.append(
+                    {
+                        "year": year,
+                        "entries": item.count,
+                        "total": item.total,
+                        "file": file,
+                    }
+                )
+            self._db_handler.writer.submit(
+                self.__freeze, boundary, end, years
+            ).result()
+        except Exception:
+            # files of not registered years are never read
+            for path in written:
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        self.__compact()
+        return len(rows)
+
+    @classmethod
+    def __freeze(
+        cls, session: Session, boundary: int, end: int, years: List[Dict[str, Any]]
+    ) -> None:
+        """Register the written years and delete their records, writer job."""
+        row = session.execute(
+            text(
+                "SELECT COUNT(*), COALESCE(SUM(duration), 0) FROM worktime "
+                "WHERE start < :end"
+            ),
+            {"end": end},
+        ).first()
+        if (
+            Rollup.boundary(session) != boundary
+            or row is None
+            or row[0] != sum(item["entries"] for item in years)
+            or row[1] != sum(item["total"] for item in years)
+        ):
+            raise Raise.error(
+                "Records changed while archiving, try again.",
+                RuntimeError,
+                cls.__qualname__,
+                currentframe(),
+            )
+        session.execute(
+            text(
+                "INSERT INTO archive_year (year, entries, total, file) "
+                "VALUES (:year, :entries, :total, :file)"
+            ),
+            years,
+        )
+        session.execute(text("DELETE FROM worktime WHERE start < :end"), {"end": end})
+        # the rollup rows of archived months are kept, the cached report
+        # pages of the moved records are dropped
+        Rollup.mark_dirty(session, boundary)
+
+    def __compact(self) -> None:
+        """Return the pages of archived records to the file system."""
+        self._db_handler.vacuum()
+
+
+# #[EOF]#######################################################################
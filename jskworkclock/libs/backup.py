@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""
+  backup.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:13:47
+
+  Purpose: Online backup snapshots of the database.
+
+  A snapshot is a directory named by its local creation time, next to
+  the database file, with copies of the main database, its partitions
+  and its archive files. Databases are copied with the SQLite online
+  backup API, a few pages per step with a short pause between steps,
+  from a connection holding one read transaction, so the copy is
+  consistent and writers are never blocked nor restart the copy.
+  Archive files never change, they are hard linked when possible.
+  Snapshots are built under a temporary name and renamed when complete.
+  Old snapshots are pruned by the retention rules: the newest ones and
+  the newest one of every recent day, week and month are kept.
+"""
+
+import os
+import shutil
+import sqlite3
+import time
+
+from datetime import datetime
+from inspect import currentframe
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.raisetool import Raise
+
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.instrument import Instrument
+from libs.partition import PartitionRow, Partitions
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    RETAIN: str = "_retain_"
+
+
+class Snapshot(NamedTuple):
+    """One backup snapshot."""
+
+    name: str
+    created: datetime
+    # bytes of all files
+    size: int
+    path: str
+
+
+class Backups(BDbHandler):
+    """Database backup snapshots class."""
+
+    STAMP: str = "%Y%m%d-%H%M%S"
+    TMP: str = ".tmp"
+    # snapshot subdirectories of partitions and archive files
+    PARTS: str = "parts"
+    ARCHIVE: str = "archive"
+    # pages copied in one backup step and seconds of pause between steps
+    STEP_PAGES: int = 256
+    STEP_PAUSE: float = 0.005
+    # seconds between scheduled snapshots
+    INTERVAL: int = 24 * 3600
+    # number of kept snapshots: newest, newest of a day, a week, a month
+    RETAIN: Dict[str, int] = {"last": 3, "daily": 7, "weekly": 4, "monthly": 12}
+
+    def __init__(self, dbh: Database, retain: Optional[Dict[str, int]] = None) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * dbh: Database - database handler,
+        * retain: Optional[Dict[str, int]] - overrides of RETAIN rules.
+        """
+        self._db_handler = dbh
+        tmp: Dict[str, int] = dict(self.RETAIN)
+        tmp.update(retain or {})
+        self._set_data(key=_Keys.RETAIN, value=tmp, set_default_type=Dict)
+
+    @property
+    def directory(self) -> str:
+        """Returns snapshots directory, next to the database file."""
+        return f"{os.path.splitext(self._db_handler.path)[0]}.backups"
+
+    def snapshots(self) -> List[Snapshot]:
+        """Returns complete snapshots, the newest first."""
+        out: List[Snapshot] = []
+        if not os.path.isdir(self.directory):
+            return out
+        for name in os.listdir(self.directory):
+            path: str = os.path.join(self.directory, name)
+            try:
+                created: datetime = datetime.strptime(name[:15], self.STAMP)
+            except ValueError:
+                continue
+            if name.endswith(self.TMP) or not os.path.isdir(path):
+                continue
+            size: int = sum(
+                os.path.getsize(os.path.join(root, file))
+                for root, _, files in os.walk(path)
+                for file in files
+            )
+            out.append(Snapshot(name, created, size, path))
+        out.sort(key=lambda item: item.name, reverse=True)
+        return out
+
+    def __connect(self, path: str) -> sqlite3.Connection:
+        """Returns own autocommit connection to the database file."""
+        timeout: float = self._db_handler.pragmas.get("busy_timeout", 5000) / 1000
+        return sqlite3.connect(path, timeout=timeout, isolation_level=None)
+
+    def __source(self) -> Tuple[sqlite3.Connection, List[PartitionRow], List[str]]:
+        """Returns connection in a read transaction, partitions and archive files.
+
+        Databases can not be attached inside of a transaction, so the
+        partitions are attached first and the registry is read again in
+        the transaction, until both are the same.
+        """
+        conn: sqlite3.Connection = self.__connect(self._db_handler.path)
+        query: str = "SELECT year, start, stop, file FROM partition_year ORDER BY year"
+        parts: str = Partitions.location(self._db_handler.path)
+        try:
+            for _ in range(3):
+                layout: List[PartitionRow] = list(conn.execute(query))
+                for year, _, _, file in layout:
+                    conn.execute(
+                        f"ATTACH DATABASE ? AS part_{Partitions.name(year)}",
+                        (os.path.join(parts, file),),
+                    )
+                conn.execute("BEGIN")
+                if list(conn.execute(query)) == layout:
+                    # pin the current version of every attached file
+                    for year, _, _, _ in layout:
+                        conn.execute(
+                            f"SELECT COUNT(*) FROM part_{Partitions.name(year)}"
+                            ".sqlite_master"
+                        ).fetchone()
+                    files: List[str] = [
+                        file
+                        for (file,) in conn.execute(
+                            "SELECT file FROM archive_year ORDER BY year"
+                        )
+                    ]
+                    return conn, layout, files
+                conn.execute("ROLLBACK")
+                for year, _, _, _ in layout:
+                    conn.execute(f"DETACH DATABASE part_{Partitions.name(year)}")
+        except Exception:
+            conn.close()
+            raise
+        conn.close()
+        raise Raise.error(
+            "Partitions keep changing, backup not started.",
+            OSError,
+            self._c_name,
+            currentframe(),
+        )
+
+    def __pause(self, status: int, remaining: int, total: int) -> None:
+        """Backup progress callback, lets the other connections work."""
+        time.sleep(self.STEP_PAUSE)
+
+    def __copy(self, source: sqlite3.Connection, schema: str, path: str) -> None:
+        """Copy the schema of the source connection to the database file."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        target: sqlite3.Connection = sqlite3.connect(path, isolation_level=None)
+        try:
+            source.backup(
+                target, pages=self.STEP_PAGES, progress=self.__pause, name=schema
+            )
+            # the copy is a single self-contained file
+            target.execute("PRAGMA journal_mode=DELETE")
+            check: str = target.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            target.close()
+        if check != "ok":
+            raise Raise.error(
+                f"Backup verification failed: '{path}', {check}",
+                OSError,
+                self._c_name,
+                currentframe(),
+            )
+
+    @staticmethod
+    def __link(source: str, target: str) -> None:
+        """Hard link or copy the file."""
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+    @Instrument.timed("backup.snapshot")
+    def snapshot(self) -> str:
+        """Create a new snapshot, returns its name."""
+        os.makedirs(self.directory, exist_ok=True)
+        name: str = datetime.now().strftime(self.STAMP)
+        path: str = os.path.join(self.directory, name)
+        number: int = 1
+        while os.path.exists(path):
+            number += 1
+            path = os.path.join(self.directory, f"{name}-{number}")
+        tmp: str = path + self.TMP
+        shutil.rmtree(tmp, ignore_errors=True)
+        try:
+            source, layout, files = self.__source()
+            try:
+                self.__copy(
+                    source,
+                    "main",
+                    os.path.join(tmp, os.path.basename(self._db_handler.path)),
+                )
+                for year, _, _, file in layout:
+                    self.__copy(
+                        source,
+                        f"part_{Partitions.name(year)}",
+                        os.path.join(tmp, self.PARTS, file),
+                    )
+                source.execute("ROLLBACK")
+            finally:
+                source.close()
+            archive: str = f"{os.path.splitext(self._db_handler.path)[0]}.archive"
+            for file in files:
+                self.__link(
+                    os.path.join(archive, file), os.path.join(tmp, self.ARCHIVE, file)
+                )
+            os.replace(tmp, path)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return os.path.basename(path)
+
+    def expired(self, snapshots: List[Snapshot]) -> List[Snapshot]:
+        """Returns snapshots not kept by the retention rules."""
+        retain: Dict[str, int] = self._get_data(key=_Keys.RETAIN)  # type: ignore
+        keep: Set[str] = set()
+        periods: Dict[str, Dict[Tuple[int, ...], str]] = {
+            "daily": {},
+            "weekly": {},
+            "monthly": {},
+        }
+        ordered: List[Snapshot] = sorted(
+            snapshots, key=lambda item: item.name, reverse=True
+        )
+        for number, item in enumerate(ordered):
+            if number < retain["last"]:
+                keep.add(item.name)
+            keys: Dict[str, Tuple[int, ...]] = {
+                "daily": item.created.date().timetuple()[:3],
+                "weekly": item.created.isocalendar()[:2],
+                "monthly": (item.created.year, item.created.month),
+            }
+            for rule, key in keys.items():
+                # the newest snapshot of the period, for the newest periods
+                if key not in periods[rule] and len(periods[rule]) < retain[rule]:
+                    periods[rule][key] = item.name
+                    keep.add(item.name)
+        return [item for item in ordered if item.name not in keep]
+
+    def prune(self) -> List[str]:
+        """Remove expired snapshots and left over temporary ones.
+
+        Returns names of the removed snapshots.
+        """
+        removed: List[str] = []
+        for item in self.expired(self.snapshots()):
+            shutil.rmtree(item.path, ignore_errors=True)
+            removed.append(item.name)
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(self.TMP):
+                    shutil.rmtree(
+                        os.path.join(self.directory, name), ignore_errors=True
+                    )
+        return removed
+
+    def scheduled(self) -> Optional[str]:
+        """Create a snapshot when the newest one is older than INTERVAL.
+
+        Returns the name of the new snapshot.
+        """
+        snapshots: List[Snapshot] = self.snapshots()
+        if snapshots and (
+            datetime.now() - snapshots[0].created
+        ).total_seconds() < self.INTERVAL:
+            return None
+        name: str = self.snapshot()
+        self.prune()
+        return name
+
+    @Instrument.timed("backup.restore")
+    def restore(self, name: str) -> str:
+        """Replace the database with the snapshot.
+
+        The current state is saved as a new snapshot first. Meant to run
+        while no other process works with the database.
+
+        ### Arguments:
+        * name: str - snapshot name.
+
+        ### Returns:
+        Name of the snapshot of the state before the restore.
+        """
+        path: str = os.path.join(self.directory, name)
+        main: str = os.path.join(path, os.path.basename(self._db_handler.path))
+        if name.endswith(self.TMP) or not os.path.isfile(main):
+            raise Raise.error(
+                f"Snapshot not found: '{name}'",
+                ValueError,
+                self._c_name,
+                currentframe(),
+            )
+        self._db_handler.writer.flush()
+        saved: str = self.snapshot()
+        self.__restore(main, self._db_handler.path)
+        # partitions and archive files of the restored registry
+        conn: sqlite3.Connection = self.__connect(self._db_handler.path)
+        try:
+            layout: List[PartitionRow] = list(
+                conn.execute("SELECT year, start, stop, file FROM partition_year")
+            )
+            files: List[str] = [
+                file for (file,) in conn.execute("SELECT file FROM archive_year")
+            ]
+        finally:
+            conn.close()
+        parts: str = Partitions.location(self._db_handler.path)
+        if layout:
+            os.makedirs(parts, exist_ok=True)
+        for _, _, _, file in layout:
+            self.__restore(
+                os.path.join(path, self.PARTS, file), os.path.join(parts, file)
+            )
+        # a partition created again later must not find old records
+        kept: Set[str] = {file for _, _, _, file in layout}
+        if os.path.isdir(parts):
+            for file in os.listdir(parts):
+                if file.split("-")[0] not in kept:
+                    os.remove(os.path.join(parts, file))
+        archive: str = f"{os.path.splitext(self._db_handler.path)[0]}.archive"
+        for file in files:
+            target: str = os.path.join(archive, file)
+            os.makedirs(archive, exist_ok=True)
+            shutil.copy2(os.path.join(path, self.ARCHIVE, file), target + self.TMP)
+            os.replace(target + self.TMP, target)
+        from libs.report_cache import ReportCache
+
+        ReportCache.clear()
+        return saved
+
+    def __restore(self, source: str, target: str) -> None:
+        """Copy the snapshot database file over the live one."""
+        src: sqlite3.Connection = sqlite3.connect(source, isolation_level=None)
+        dst: sqlite3.Connection = self.__connect(target)
+        try:
+            src.backup(dst, pages=self.STEP_PAGES)
+            if "journal_mode" in self._db_handler.pragmas:
+                # snapshot files are kept in the rollback journal mode
+                dst.execute(
+                    f"PRAGMA journal_mode={self._db_handler.pragmas['journal_mode']}"
+                )
+        finally:
+            dst.close()
+            src.close()
+
+
+# #[EOF]#######################################################################
@@ -7,23 +7,30 @@
 """
 
 
+from typing import TYPE_CHECKING
+
 from jsktoolbox.basetool.data import BData
 
 from libs.keys import Keys
-from libs.database import Database
+
+if TYPE_CHECKING:
+    # imported on first use, keeps SQLAlchemy out of the GUI startup
+    from libs.database import Database
 
 
 class BDbHandler(BData):
     """BDbHandler base class."""
 
     @property
-    def _db_handler(self) -> Database:
+    def _db_handler(self) -> "Database":
         """The _db_handler property."""
         return self._get_data(key=Keys.DBH)  # type: ignore
 
     @_db_handler.setter
-    def _db_handler(self, value: Database) -> None:
+    def _db_handler(self, value: "Database") -> None:
         """The _db_handler setter."""
+        from libs.database import Database
+
         self._set_data(key=Keys.DBH, value=value, set_default_type=Database)
 
 
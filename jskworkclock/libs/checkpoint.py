@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+  checkpoint.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:29:17
+
+  Purpose: Crash-safe checkpoints of the running work session.
+
+  The running session is stored as a single row of the active_session
+  table when the clock starts, and its heartbeat column is updated
+  periodically. The row is removed in the same transaction that stores
+  the finished TWorkTime record, so a row found at startup means that
+  the previous session was interrupted. Writes go through the database
+  writer and return futures. The GUI and the CLI may both start and
+  stop the session: begin fails if a session is stored already, and
+  stop records the session only if it removed its own row.
+"""
+
+from concurrent.futures import Future
+from inspect import currentframe
+from typing import Optional, Tuple, Union
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from jsktoolbox.datetool import DateTime, Timestamp
+from jsktoolbox.raisetool import Raise
+
+from libs.base import BDbHandler
+from libs.database import Database, TWorkTime
+from libs.rollup import Rollup
+
+
+class ActiveSession(BDbHandler):
+    """Running session checkpoint class."""
+
+    # notes for sessions finalized after a crash
+    RECOVERED: str = "Recovered session"
+
+    def __init__(self, dbh: Database) -> None:
+        """Constructor."""
+        self._db_handler = dbh
+
+    def begin(self, start: Union[int, float]) -> Future:
+        """Store the running session.
+
+        The future fails with RuntimeError if a session is stored already.
+        """
+        return self._db_handler.writer.submit(self.__begin, int(start))
+
+    @classmethod
+    def __begin(cls, session: Session, start: int) -> None:
+        """Store the running session, writer job."""
+        row = session.execute(
+            text("SELECT start FROM active_session WHERE id=1")
+        ).first()
+        if row is not None:
+            raise Raise.error(
+                "Session already running since "
+                f"{DateTime.datetime_from_timestamp(row[0])}",
+                RuntimeError,
+                cls.__qualname__,
+                currentframe(),
+            )
+        session.execute(
+            text(
+                "INSERT INTO active_session (id, start, heartbeat) "
+                "VALUES (1, :start, :start)"
+            ),
+            {"start": start},
+        )
+
+    def heartbeat(self, now: Optional[Union[int, float]] = None) -> Future:
+        """Update the heartbeat of the running session."""
+        return self._db_handler.writer.submit(
+            self.__heartbeat, int(now or Timestamp.now())
+        )
+
+    @staticmethod
+    def __heartbeat(session: Session, now: int) -> None:
+        """Update the heartbeat, writer job."""
+        session.execute(
+            text("UPDATE active_session SET heartbeat=:now WHERE id=1"),
+            {"now": now},
+        )
+
+    def get(self) -> Optional[Tuple[int, int]]:
+        """Returns (start, heartbeat) of the stored session or None."""
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return None
+        row = session.execute(
+            text("SELECT start, heartbeat FROM active_session WHERE id=1")
+        ).first()
+        session.close()
+        if row is None:
+            return None
+        return (row[0], row[1])
+
+    @staticmethod
+    def finish(session: Session) -> None:
+        """Remove the stored session as a part of the session transaction."""
+        session.execute(text("DELETE FROM active_session WHERE id=1"))
+
+    def stop(
+        self, start: Union[int, float], end: Union[int, float], notes: Optional[str]
+    ) -> Future:
+        """Store finished session and remove the checkpoint atomically.
+
+        Returns Future of the stored duration in seconds. The future fails
+        with RuntimeError if the session started at 'start' is no longer
+        stored, it was stopped or replaced elsewhere.
+        """
+        return self._db_handler.writer.submit(
+            self.__stop, int(start), int(end - start), notes or ""
+        )
+
+    @classmethod
+    def __stop(cls, session: Session, start: int, duration: int, notes: str) -> int:
+        """Store finished session, writer job."""
+        removed = session.execute(
+            text("DELETE FROM active_session WHERE id=1 AND start=:start"),
+            {"start": start},
+        )
+        if removed.rowcount != 1:  # type: ignore
+            raise Raise.error(
+                "Session started at "
+                f"{DateTime.datetime_from_timestamp(start)} is not running.",
+                RuntimeError,
+                cls.__qualname__,
+                currentframe(),
+            )
+        # Core insert, ids of rows routed to partitions are not returned
+        session.execute(
+            insert(TWorkTime).values(start=start, duration=duration, notes=notes)
+        )
+        Rollup.refresh(session, start)
+        return duration
+
+    def finalize(self) -> Optional[Future]:
+        """Store interrupted session up to its last heartbeat."""
+        row: Optional[Tuple[int, int]] = self.get()
+        if row is None:
+            return None
+        return self.stop(row[0], row[1], self.RECOVERED)
+
+    def discard(self) -> Future:
+        """Remove the stored session without recording it."""
+        return self._db_handler.writer.submit(self.finish)
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+  checkpoint_file.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:37:09
+
+  Purpose: Running session checkpoint accessed with plain sqlite3.
+
+  The CLI start, stop and status commands only need the active_session
+  row, so they read and write it here without loading SQLAlchemy or
+  checking the migrations. A missing file or table is reported as an
+  error, the caller falls back to the database layer, which creates
+  and upgrades the database.
+"""
+
+import os
+import sqlite3
+
+from inspect import currentframe
+from typing import Optional, Tuple
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.basetool.data import BData
+from jsktoolbox.raisetool import Raise
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    PATH: str = "_path_"
+
+
+class ActiveSessionFile(BData):
+    """Running session checkpoint of a database file."""
+
+    # seconds to wait for a lock held by another process
+    TIMEOUT: float = 5.0
+
+    def __init__(self, path: str) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * path: str - sqlite database file path.
+        """
+        self._set_data(key=_Keys.PATH, value=path, set_default_type=str)
+
+    def __connect(self) -> sqlite3.Connection:
+        """Returns connection to the existing database file."""
+        path: str = self._get_data(key=_Keys.PATH)  # type: ignore
+        if not os.path.isfile(path):
+            raise Raise.error(
+                f"Database file not found: '{path}'",
+                FileNotFoundError,
+                self._c_name,
+                currentframe(),
+            )
+        return sqlite3.connect(path, timeout=self.TIMEOUT)
+
+    def get(self) -> Optional[Tuple[int, int]]:
+        """Returns (start, heartbeat) of the stored session or None."""
+        conn: sqlite3.Connection = self.__connect()
+        try:
+            row = conn.execute(
+                "SELECT start, heartbeat FROM active_session WHERE id=1"
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return (row[0], row[1])
+
+    def begin(self, start: int) -> None:
+        """Store the running session.
+
+        ### Raises:
+        * RuntimeError: if a session is stored already.
+        """
+        conn: sqlite3.Connection = self.__connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO active_session (id, start, heartbeat) "
+                    "VALUES (1, :start, :start)",
+                    {"start": int(start)},
+                )
+        except sqlite3.IntegrityError:
+            raise Raise.error(
+                "Session already running.", RuntimeError, self._c_name, currentframe()
+            )
+        finally:
+            conn.close()
+
+
+# #[EOF]#######################################################################
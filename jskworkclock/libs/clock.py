@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+  clock.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:30:11
+
+  Purpose: Drift-free clock engine driven by the Tk event loop.
+
+  Elapsed time is measured with the monotonic clock from the moment the
+  engine starts, so it is not affected by wall clock adjustments. Every
+  tick is scheduled with after() exactly on the next full second of the
+  elapsed time, so delays of single callbacks never accumulate. While
+  the window is iconified the display is refreshed less often.
+"""
+
+from time import monotonic, time
+from typing import Any, Callable, Optional, Union
+
+from jsktoolbox.basetool.data import BData
+from jsktoolbox.attribtool import ReadOnlyClass
+
+from libs.instrument import Instrument
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    AFTER: str = "_after_"
+    ANCHOR: str = "_anchor_"
+    BIND: str = "_bind_"
+    ICONIFIED: str = "_iconified_"
+    INTERVAL: str = "_interval_"
+    OFFSET: str = "_offset_"
+    ON_TICK: str = "_on_tick_"
+    WIDGET: str = "_widget_"
+
+
+class ClockEngine(BData):
+    """Clock engine scheduled on the Tk event loop."""
+
+    def __init__(
+        self,
+        widget: Any,
+        on_tick: Callable[[float], None],
+        interval: int = 1,
+        iconified: int = 30,
+    ) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * widget - Tk widget used for scheduling,
+        * on_tick: Callable[[float], None] - called with elapsed seconds,
+        * interval: int - refresh interval in seconds,
+        * iconified: int - refresh interval while the window is iconified.
+        """
+        self._set_data(key=_Keys.WIDGET, value=widget)
+        self._set_data(key=_Keys.ON_TICK, value=on_tick, set_default_type=Callable)
+        self._set_data(key=_Keys.INTERVAL, value=max(interval, 1), set_default_type=int)
+        self._set_data(
+            key=_Keys.ICONIFIED, value=max(iconified, interval), set_default_type=int
+        )
+        self._set_data(key=_Keys.AFTER, value=None, set_default_type=Optional[str])
+        self._set_data(key=_Keys.BIND, value=None, set_default_type=Optional[str])
+        self._set_data(key=_Keys.ANCHOR, value=0.0, set_default_type=float)
+        self._set_data(key=_Keys.OFFSET, value=0.0, set_default_type=float)
+
+    @property
+    def running(self) -> bool:
+        """Returns True if the clock is running."""
+        return self._get_data(key=_Keys.AFTER) is not None
+
+    @property
+    def elapsed(self) -> float:
+        """Returns elapsed seconds."""
+        return self._get_data(key=_Keys.OFFSET) + (  # type: ignore
+            monotonic() - self._get_data(key=_Keys.ANCHOR)  # type: ignore
+        )
+
+    def start(self, start: Union[int, float]) -> None:
+        """Start the clock for session started at 'start' timestamp."""
+        self.stop()
+        self._set_data(key=_Keys.ANCHOR, value=monotonic())
+        self._set_data(key=_Keys.OFFSET, value=max(time() - start, 0.0))
+        widget = self._get_data(key=_Keys.WIDGET)
+        # refresh immediately when the window is restored
+        self._set_data(
+            key=_Keys.BIND,
+            value=widget.winfo_toplevel().bind("<Map>", self.__on_map, add="+"),  # type: ignore
+        )
+        self.__tick()
+
+    def stop(self) -> float:
+        """Stop the clock, returns elapsed seconds."""
+        widget = self._get_data(key=_Keys.WIDGET)
+        after: Optional[str] = self._get_data(key=_Keys.AFTER)
+        if after is not None:
+            widget.after_cancel(after)  # type: ignore
+            self._set_data(key=_Keys.AFTER, value=None)
+        bind: Optional[str] = self._get_data(key=_Keys.BIND)
+        if bind is not None:
+            widget.winfo_toplevel().unbind("<Map>", bind)  # type: ignore
+            self._set_data(key=_Keys.BIND, value=None)
+        return self.elapsed
+
+    def __on_map(self, event: Any) -> None:
+        """Window restored event."""
+        widget = self._get_data(key=_Keys.WIDGET)
+        if self.running and event.widget is widget.winfo_toplevel():  # type: ignore
+            widget.after_cancel(self._get_data(key=_Keys.AFTER))  # type: ignore
+            self.__tick()
+
+    def __tick(self) -> None:
+        """Report elapsed time and schedule the next tick."""
+        widget = self._get_data(key=_Keys.WIDGET)
+        elapsed: float = self.elapsed
+        with Instrument.span("clock.tick"):
+            self._get_data(key=_Keys.ON_TICK)(elapsed)  # type: ignore
+        interval: int = self._get_data(key=_Keys.INTERVAL)  # type: ignore
+        if widget.winfo_toplevel().state() == "iconic":  # type: ignore
+            interval = self._get_data(key=_Keys.ICONIFIED)  # type: ignore
+        # wake up right after the next full interval of the elapsed time
+        delay: float = interval - (elapsed % interval)
+        self._set_data(
+            key=_Keys.AFTER,
+            value=widget.after(int(delay * 1000) + 1, self.__tick),  # type: ignore
+        )
+
+
+# #[EOF]#######################################################################
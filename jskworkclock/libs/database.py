@@ -6,19 +6,27 @@
   Purpose: database classes.
 """
 
+import sqlite3
+
 from inspect import currentframe
-from typing import Optional
+from typing import Any, Dict, Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy import Index, create_engine, event
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm.session import Session
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.dialects.sqlite import INTEGER, TEXT
 
 from jsktoolbox.basetool.data import BData
 from jsktoolbox.attribtool import ReadOnlyClass
 from jsktoolbox.raisetool import Raise
 
+from libs.instrument import Instrument
+from libs.migrations import Migrations
+from libs.partition import Partitions
+from libs.writer import DbWriter
+
 
 class _Keys(object, metaclass=ReadOnlyClass):
     """Local keys."""
@@ -26,6 +34,9 @@ class _Keys(object, metaclass=ReadOnlyClass):
     DB_PATH: str = "_db_path_"
     DEBUG: str = "_debug_"
     DBH: str = "_db_handler_"
+    PRAGMAS: str = "_pragmas_"
+    SESSION_FACTORY: str = "_session_factory_"
+    WRITER: str = "_writer_"
 
 
 class LocalBase(DeclarativeBase):
@@ -37,55 +48,235 @@ class TWorkTime(LocalBase):
     """WorkTime table."""
 
     __tablename__: str = "worktime"
+    __table_args__ = (Index("ix_worktime_start_duration", "start", "duration"),)
 
     id: Mapped[int] = mapped_column(
         INTEGER, primary_key=True, nullable=False, autoincrement=True
     )
     start: Mapped[int] = mapped_column(INTEGER, nullable=False)
     duration: Mapped[int] = mapped_column(INTEGER, nullable=False)
-    notes: Mapped[str] = mapped_column(TEXT, default="")
+    # loaded on access only, read paths select it explicitly when shown
+    notes: Mapped[str] = mapped_column(TEXT, default="", deferred=True)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(id='{self.id}', start='{self.start}', duration='{self.duration}', notes='{self.notes}')"
 
 
+class TMonthBalance(LocalBase):
+    """MonthBalance table, maintained by libs.rollup."""
+
+    __tablename__: str = "month_balance"
+
+    # local time month as YYYYMM number
+    month: Mapped[int] = mapped_column(INTEGER, primary_key=True, nullable=False)
+    total: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    balance: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    entries: Mapped[int] = mapped_column(INTEGER, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(month='{self.month}', total='{self.total}', balance='{self.balance}', entries='{self.entries}')"
+
+
+class TActiveSession(LocalBase):
+    """ActiveSession table, holds at most one running session."""
+
+    __tablename__: str = "active_session"
+
+    id: Mapped[int] = mapped_column(INTEGER, primary_key=True, nullable=False)
+    start: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    heartbeat: Mapped[int] = mapped_column(INTEGER, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(id='{self.id}', start='{self.start}', heartbeat='{self.heartbeat}')"
+
+
+class TArchiveYear(LocalBase):
+    """ArchiveYear table, closed years moved to archive files by libs.archive."""
+
+    __tablename__: str = "archive_year"
+
+    year: Mapped[int] = mapped_column(INTEGER, primary_key=True, nullable=False)
+    entries: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    total: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    # archive file name, relative to the archive directory
+    file: Mapped[str] = mapped_column(TEXT, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(year='{self.year}', entries='{self.entries}', total='{self.total}', file='{self.file}')"
+
+
+class TPartitionYear(LocalBase):
+    """PartitionYear table, worktime partition files attached by libs.partition."""
+
+    __tablename__: str = "partition_year"
+
+    # year 0 is the default partition
+    year: Mapped[int] = mapped_column(INTEGER, primary_key=True, nullable=False)
+    # routed start range [start, stop), zeros for the default partition
+    start: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    stop: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    # partition file name, relative to the partitions directory
+    file: Mapped[str] = mapped_column(TEXT, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(year='{self.year}', start='{self.start}', stop='{self.stop}', file='{self.file}')"
+
+
+class TSchemaVersion(LocalBase):
+    """SchemaVersion table, maintained by libs.migrations."""
+
+    __tablename__: str = "schema_version"
+
+    id: Mapped[int] = mapped_column(INTEGER, primary_key=True, nullable=False)
+    version: Mapped[int] = mapped_column(INTEGER, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(id='{self.id}', version='{self.version}')"
+
+
 class Database(BData):
     """Database class engine for local data."""
 
-    def __init__(self, path: str, debug: bool = False) -> None:
-        """Constructor."""
+    # connection pragmas, journal_mode is persistent, the rest per connection
+    PRAGMAS: Dict[str, Any] = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -16 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    }
+
+    def __init__(
+        self, path: str, debug: bool = False, pragmas: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * path: str - sqlite database file path,
+        * debug: bool - echo SQL statements,
+        * pragmas: Optional[Dict[str, Any]] - overrides of default PRAGMAS,
+          the None value disables the pragma.
+        """
+        tmp: Dict[str, Any] = dict(self.PRAGMAS)
+        tmp.update(pragmas or {})
         self._set_data(key=_Keys.DB_PATH, value=path, set_default_type=str)
         self._set_data(key=_Keys.DEBUG, value=debug, set_default_type=bool)
+        self._set_data(
+            key=_Keys.PRAGMAS,
+            value={key: value for key, value in tmp.items() if value is not None},
+            set_default_type=Dict,
+        )
         self._set_data(key=_Keys.DBH, value=None, set_default_type=Optional[Engine])
+        self._set_data(
+            key=_Keys.SESSION_FACTORY,
+            value=None,
+            set_default_type=Optional[sessionmaker],
+        )
+        self._set_data(
+            key=_Keys.WRITER, value=None, set_default_type=Optional[DbWriter]
+        )
 
-        # create engine
+        # create engine and upgrade schema if needed
         if self.__create_engine():
-            base = LocalBase()
-            base.metadata.create_all(self._get_data(key=_Keys.DBH))  # type: ignore
+            Migrations(self._get_data(key=_Keys.DBH)).upgrade()  # type: ignore
 
     def __create_engine(self) -> bool:
         """Create Engine for sqlite database."""
         engine: Optional[Engine] = None
         try:
+            # connections are shared by the Tk thread and the workers
             engine = create_engine(
                 f"sqlite:///{self._get_data(key=_Keys.DB_PATH)}",
                 echo=self._get_data(key=_Keys.DEBUG),
+                poolclass=QueuePool,
+                pool_size=4,
+                max_overflow=4,
+                connect_args={"check_same_thread": False},
             )
+            event.listen(engine, "connect", self.__on_connect)
+            event.listen(engine, "checkout", self.__on_checkout)
+            Instrument.attach(engine)
         except Exception as ex:
             raise Raise.error(f"{ex}", OSError, self._c_name, currentframe())
         if engine is not None:
             self._set_data(key=_Keys.DBH, value=engine)
+            factory = sessionmaker(bind=engine)
+            self._set_data(key=_Keys.SESSION_FACTORY, value=factory)
+            self._set_data(key=_Keys.WRITER, value=DbWriter(factory))
             return True
         return False
 
+    def __on_connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        """Apply pragmas to the new DBAPI connection."""
+        cursor = dbapi_connection.cursor()
+        for key, value in self.pragmas.items():
+            cursor.execute(f"PRAGMA {key}={value}")
+        cursor.close()
+
+    def __on_checkout(
+        self, dbapi_connection: Any, connection_record: Any, connection_proxy: Any
+    ) -> None:
+        """Attach worktime partitions to the checked out DBAPI connection."""
+        Partitions.attach(
+            dbapi_connection, connection_record.info, self.path, self.pragmas
+        )
+
+    def vacuum(self, incremental: bool = False) -> None:
+        """Rebuild the main database file.
+
+        Runs on its own connection, the worktime view of attached
+        partitions would shadow the main table while its index is rebuilt.
+
+        ### Arguments:
+        * incremental: bool - switch the file to incremental auto vacuum.
+        """
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.pragmas.get("busy_timeout", 5000) / 1000,
+            isolation_level=None,
+        )
+        try:
+            if incremental:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    @property
+    def engine(self) -> Optional[Engine]:
+        """Returns Database Engine."""
+        return self._get_data(key=_Keys.DBH)
+
+    @property
+    def path(self) -> str:
+        """Returns database file path."""
+        return self._get_data(key=_Keys.DB_PATH)  # type: ignore
+
+    @property
+    def pragmas(self) -> Dict[str, Any]:
+        """Returns connection pragmas."""
+        return self._get_data(key=_Keys.PRAGMAS)  # type: ignore
+
+    @property
+    def session_factory(self) -> Optional[sessionmaker]:
+        """Returns shared Session factory."""
+        return self._get_data(key=_Keys.SESSION_FACTORY)
+
+    @property
+    def writer(self) -> DbWriter:
+        """Returns serialized writer, all mutations go through it."""
+        return self._get_data(key=_Keys.WRITER)  # type: ignore
+
     @property
     def session(self) -> Optional[Session]:
         """Create Session from Database Engine."""
         session = None
-        if self._get_data(key=_Keys.DBH) is None:
+        factory: Optional[sessionmaker] = self.session_factory
+        if factory is None:
             return None
         try:
-            session = Session(bind=self._get_data(key=_Keys.DBH))
+            session = factory()
         except Exception as ex:
             raise Raise.error(f"{ex}", OSError, self._c_name, currentframe())
         return session
@@ -0,0 +1,572 @@
+# -*- coding: utf-8 -*-
+"""
+  delta.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:18:54
+
+  Purpose: Incremental export and import of worktime changes.
+
+  Inserted and removed records are logged to the change_log table by
+  the worktime triggers, archiving is not logged. An export target is
+  a directory with a manifest and delta files. Every target remembers
+  the last exported change, so an export writes only the later ones.
+  The first export, and every export after the target lost track of
+  the changes, writes a base delta with all records and starts a new
+  epoch of the target. Import applies the deltas listed in the manifest
+  in order and remembers the last applied one for every source
+  database, so both sides cost as much as the number of changes.
+
+  Delta files are NDJSON like the full export: a header object, then
+  one [op, start, duration, notes] array per change, op is '+' for an
+  inserted record and '-' for a removed one.
+"""
+
+import io
+import json
+import os
+
+from inspect import currentframe
+from itertools import chain
+from typing import IO, Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.datetool import Timestamp
+from jsktoolbox.raisetool import Raise
+
+from libs.archive import Archive
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.instrument import Instrument
+from libs.rollup import Rollup
+from libs.transfer import (
+    ExportFormat,
+    Importer,
+    compressed_reader,
+    compressed_writer,
+)
+
+
+# (op, start, duration, notes)
+DeltaRecord = Tuple[str, int, int, Optional[str]]
+
+
+class DeltaFormat(object, metaclass=ReadOnlyClass):
+    """Delta export format constants."""
+
+    NAME: str = "jskworkclock-delta"
+    VERSION: int = 1
+    COLUMNS: Tuple[str, ...] = ("op", "start", "duration", "notes")
+    MANIFEST: str = "manifest.json"
+
+    INSERT: str = "+"
+    DELETE: str = "-"
+
+    SUFFIXES: Dict[Optional[str], str] = {
+        ExportFormat.GZIP: ".ndjson.gz",
+        ExportFormat.ZSTD: ".ndjson.zst",
+        None: ".ndjson",
+    }
+
+
+class DeltaExport(NamedTuple):
+    """Delta export statistics."""
+
+    # written delta file name, None if there was nothing to export
+    file: Optional[str]
+    records: int
+    base: bool
+    seq: int
+
+
+class ChangeCounts(NamedTuple):
+    """Applied changes statistics."""
+
+    inserted: int
+    deleted: int
+    skipped: int
+    # changes of archived years
+    rejected: int
+
+
+class DeltaImport(NamedTuple):
+    """Delta import statistics."""
+
+    deltas: int
+    inserted: int
+    deleted: int
+    skipped: int
+
+
+def _manifest(directory: str) -> Optional[Dict[str, Any]]:
+    """Returns manifest of the directory, None if there is none."""
+    path: str = os.path.join(directory, DeltaFormat.MANIFEST)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        manifest: Any = json.load(file)
+    if not isinstance(manifest, dict) or manifest.get("format") != DeltaFormat.NAME:
+        raise Raise.error(
+            f"Unknown manifest format: '{path}'", ValueError, "delta", currentframe()
+        )
+    if manifest.get("version", 0) > DeltaFormat.VERSION:
+        raise Raise.error(
+            f"Unsupported manifest version: {manifest.get('version')}",
+            ValueError,
+            "delta",
+            currentframe(),
+        )
+    return manifest
+
+
+def _write_json(path: str, data: Any) -> None:
+    """Replace the JSON file atomically."""
+    tmp: str = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=1)
+    os.replace(tmp, path)
+
+
+class DeltaExporter(BDbHandler):
+    """Incremental exporter class."""
+
+    def __init__(self, dbh: Database) -> None:
+        """Constructor."""
+        self._db_handler = dbh
+
+    @staticmethod
+    def database_id(session: Session) -> str:
+        """Returns random identifier of the database."""
+        return session.execute(
+            text("SELECT value FROM database_info WHERE key='id'")
+        ).scalar()  # type: ignore
+
+    @staticmethod
+    def last_change(session: Session) -> int:
+        """Returns sequence number of the last logged change."""
+        return session.execute(
+            text(
+                "SELECT COALESCE((SELECT seq FROM sqlite_sequence "
+                "WHERE name='change_log'), 0)"
+            )
+        ).scalar()  # type: ignore
+
+    @staticmethod
+    def records(session: Session, dbh: Database) -> Iterator[DeltaRecord]:
+        """Yields all records, archived included, as insertions."""
+        archived: Iterator[DeltaRecord] = (
+            (DeltaFormat.INSERT, start, duration, notes)
+            for start, _, duration, notes in Archive(dbh).rows(session)
+        )
+        live: Iterator[DeltaRecord] = (
+            (DeltaFormat.INSERT, start, duration, notes)
+            for start, duration, notes in session.connection()
+            .execute(
+                text("SELECT start, duration, notes FROM worktime ORDER BY start, id")
+            )
+            .yield_per(1000)
+        )
+        return chain(archived, live)
+
+    @Instrument.timed("delta.export")
+    def export(
+        self, directory: str, compression: Optional[str] = ExportFormat.GZIP
+    ) -> DeltaExport:
+        """Export changes since the previous export to the directory.
+
+        ### Arguments:
+        * directory: str - export target directory,
+        * compression: Optional[str] - ExportFormat.GZIP, ExportFormat.ZSTD or None.
+        """
+        target: str = os.path.abspath(directory)
+        os.makedirs(target, exist_ok=True)
+        manifest: Optional[Dict[str, Any]] = _manifest(target)
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return DeltaExport(None, 0, False, 0)
+        try:
+            source: str = self.database_id(session)
+            row = session.execute(
+                text("SELECT epoch, seq FROM export_target WHERE target=:target"),
+                {"target": target},
+            ).first()
+            # changes logged later go to the next delta
+            seq: int = self.last_change(session)
+            base: bool = (
+                row is None
+                or manifest is None
+                or manifest.get("source") != source
+                or manifest.get("epoch") != row[0]
+                or not manifest.get("deltas")
+                or manifest["deltas"][-1]["to"] != row[1]
+                # the log is complete, unless pruned for lack of targets
+                or session.execute(
+                    text(
+                        "SELECT COUNT(*) FROM change_log "
+                        "WHERE seq > :since AND seq <= :seq"
+                    ),
+                    {"since": row[1], "seq": seq},
+                ).scalar()
+                != seq - row[1]
+            )
+            epoch: str = uuid4().hex
+            since: int = 0
+            records: Iterator[DeltaRecord]
+            if base:
+                # records written after the seq are exported twice, import
+                # skips the ones already present and the removed ones
+                records = self.records(session, self._db_handler)
+            else:
+                epoch, since = row  # type: ignore
+                if seq == since:
+                    return DeltaExport(None, 0, False, seq)
+                records = (
+                    (op, start, duration, notes)
+                    for op, start, duration, notes in session.connection()
+                    .execute(
+                        text(
+                            "SELECT op, start, duration, notes FROM change_log "
+                            "WHERE seq > :since AND seq <= :seq ORDER BY seq"
+                        ),
+                        {"since": since, "seq": seq},
+                    )
+                    .yield_per(1000)
+                )
+            file: str = f"{since:012d}-{seq:012d}{DeltaFormat.SUFFIXES[compression]}"
+            count: int = self.__write(
+                os.path.join(target, file),
+                {
+                    "format": DeltaFormat.NAME,
+                    "version": DeltaFormat.VERSION,
+                    "columns": list(DeltaFormat.COLUMNS),
+                    "source": source,
+                    "epoch": epoch,
+                    "from": since,
+                    "to": seq,
+                    "base": base,
+                },
+                records,
+                compression,
+            )
+        finally:
+            session.close()
+        obsolete: List[str] = []
+        deltas: List[Dict[str, Any]] = []
+        if not base and manifest is not None:
+            deltas = manifest["deltas"]
+        elif manifest is not None:
+            obsolete = [item["file"] for item in manifest.get("deltas", [])]
+        deltas.append(
+            {"file": file, "from": since, "to": seq, "base": base, "records": count}
+        )
+        _write_json(
+            os.path.join(target, DeltaFormat.MANIFEST),
+            {
+                "format": DeltaFormat.NAME,
+                "version": DeltaFormat.VERSION,
+                "source": source,
+                "epoch": epoch,
+                "deltas": deltas,
+            },
+        )
+        for name in obsolete:
+            if name != file and os.path.exists(os.path.join(target, name)):
+                os.remove(os.path.join(target, name))
+        self._db_handler.writer.submit(self.__mark, target, epoch, seq).result()
+        return DeltaExport(file, count, base, seq)
+
+    @staticmethod
+    def __write(
+        path: str,
+        header: Dict[str, Any],
+        records: Iterator[DeltaRecord],
+        compression: Optional[str],
+    ) -> int:
+        """Write delta file, returns number of records."""
+        count: int = 0
+        tmp: str = f"{path}.tmp"
+        try:
+            with open(tmp, "wb") as raw:
+                stream: IO[bytes] = compressed_writer(raw, compression)
+                try:
+                    out = io.TextIOWrapper(
+                        stream, encoding="utf-8", newline="\n"  # type: ignore
+                    )
+                    out.write(json.dumps(header))
+                    out.write("\n")
+                    for record in records:
+                        out.write(json.dumps(record, ensure_ascii=False))
+                        out.write("\n")
+                        count += 1
+                    out.flush()
+                    out.detach()
+                finally:
+                    if stream is not raw:
+                        stream.close()
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return count
+
+    @staticmethod
+    def __mark(session: Session, target: str, epoch: str, seq: int) -> None:
+        """Remember the last exported change of the target, writer job."""
+        session.execute(
+            text(
+                "INSERT OR REPLACE INTO export_target (target, epoch, seq, updated) "
+                "VALUES (:target, :epoch, :seq, :updated)"
+            ),
+            {"target": target, "epoch": epoch, "seq": seq, "updated": Timestamp.now()},
+        )
+
+    def prune(self) -> int:
+        """Remove changes exported to every target and pushed to every
+        sync server, returns their number.
+
+        Without targets the log is not needed at all, the first export
+        of a new target is a base one. The log of a sync server is kept.
+        """
+        return self._db_handler.writer.submit(self.__prune).result()
+
+    @classmethod
+    def __prune(cls, session: Session) -> int:
+        """Remove exported changes, writer job."""
+        if (
+            session.execute(
+                text("SELECT 1 FROM database_info WHERE key='hub'")
+            ).first()
+            is not None
+        ):
+            return 0
+        seq: Optional[int] = session.execute(
+            text(
+                "SELECT MIN(seq) FROM (SELECT seq FROM export_target "
+                "UNION ALL SELECT pushed FROM sync_state)"
+            )
+        ).scalar()
+        if seq is None:
+            seq = cls.last_change(session)
+        count: int = session.execute(
+            text("SELECT COUNT(*) FROM change_log WHERE seq <= :seq"), {"seq": seq}
+        ).scalar()  # type: ignore
+        if count:
+            session.execute(
+                text("DELETE FROM change_log WHERE seq <= :seq"), {"seq": seq}
+            )
+            session.execute(
+                text("DELETE FROM sync_origin WHERE last <= :seq"), {"seq": seq}
+            )
+        return count
+
+
+class DeltaImporter(BDbHandler):
+    """Incremental importer class."""
+
+    def __init__(self, dbh: Database) -> None:
+        """Constructor."""
+        self._db_handler = dbh
+
+    @Instrument.timed("delta.import")
+    def apply(self, directory: str) -> DeltaImport:
+        """Apply deltas of the directory not applied yet.
+
+        A base delta only adds records, it is applied when the source
+        started a new epoch.
+        """
+        manifest: Optional[Dict[str, Any]] = _manifest(directory)
+        if manifest is None:
+            raise Raise.error(
+                f"No delta manifest in: '{directory}'",
+                ValueError,
+                self._c_name,
+                currentframe(),
+            )
+        source: str = manifest["source"]
+        epoch: str = manifest["epoch"]
+        applied: Optional[int] = None
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return DeltaImport(0, 0, 0, 0)
+        try:
+            row = session.execute(
+                text("SELECT epoch, seq FROM import_source WHERE source=:source"),
+                {"source": source},
+            ).first()
+        finally:
+            session.close()
+        if row is not None and row[0] == epoch:
+            applied = row[1]
+        deltas: int = 0
+        inserted: int = 0
+        deleted: int = 0
+        skipped: int = 0
+        for entry in manifest["deltas"]:
+            if applied is None:
+                if not entry["base"]:
+                    raise Raise.error(
+                        f"The first delta of epoch {epoch} is not a base one.",
+                        ValueError,
+                        self._c_name,
+                        currentframe(),
+                    )
+            elif entry["to"] <= applied:
+                continue
+            elif entry["from"] > applied:
+                raise Raise.error(
+                    f"Missing changes {applied + 1}-{entry['from']} of: '{directory}'",
+                    ValueError,
+                    self._c_name,
+                    currentframe(),
+                )
+            records: Iterator[DeltaRecord] = self.__read(
+                os.path.join(directory, entry["file"]), source, epoch, entry
+            )
+            if entry["base"]:
+                result = Importer(self._db_handler).import_records(
+                    record[1:] for record in records if record[0] == DeltaFormat.INSERT
+                )
+                inserted += result.inserted
+                skipped += result.duplicates + result.rejected
+                self._db_handler.writer.submit(
+                    self.__mark, source, epoch, entry["to"]
+                ).result()
+            else:
+                # a delta is applied in one transaction with its mark
+                counts: Tuple[int, int, int] = self._db_handler.writer.submit(
+                    self.__apply, list(records), source, epoch, entry["to"]
+                ).result()
+                inserted += counts[0]
+                deleted += counts[1]
+                skipped += counts[2]
+            applied = entry["to"]
+            deltas += 1
+        return DeltaImport(deltas, inserted, deleted, skipped)
+
+    def __read(
+        self, path: str, source: str, epoch: str, entry: Dict[str, Any]
+    ) -> Iterator[DeltaRecord]:
+        """Reads delta file, checks its header against the manifest entry."""
+        with open(path, "rb") as raw:
+            lines = io.TextIOWrapper(
+                compressed_reader(raw), encoding="utf-8", newline="\n"  # type: ignore
+            )
+            header: Any = None
+            try:
+                header = json.loads(lines.readline())
+            except ValueError:
+                pass
+            if (
+                not isinstance(header, dict)
+                or header.get("format") != DeltaFormat.NAME
+                or header.get("version", 0) > DeltaFormat.VERSION
+                or header.get("source") != source
+                or header.get("epoch") != epoch
+                or header.get("from") != entry["from"]
+                or header.get("to") != entry["to"]
+            ):
+                raise Raise.error(
+                    f"Delta file does not match the manifest: '{path}'",
+                    ValueError,
+                    self._c_name,
+                    currentframe(),
+                )
+            for line in lines:
+                if not line.strip():
+                    continue
+                op, start, duration, notes = json.loads(line)
+                if (
+                    op not in (DeltaFormat.INSERT, DeltaFormat.DELETE)
+                    or type(start) is not int
+                    or type(duration) is not int
+                    or not (notes is None or type(notes) is str)
+                ):
+                    raise Raise.error(
+                        f"Malformed delta record in: '{path}'",
+                        ValueError,
+                        self._c_name,
+                        currentframe(),
+                    )
+                yield (op, start, duration, notes)
+
+    @classmethod
+    def __apply(
+        cls,
+        session: Session,
+        records: List[DeltaRecord],
+        source: str,
+        epoch: str,
+        seq: int,
+    ) -> Tuple[int, int, int]:
+        """Apply changes with the mark, writer job.
+
+        Returns numbers of inserted, deleted and skipped records.
+        """
+        counts: ChangeCounts = cls.apply_changes(session, records)
+        cls.__mark(session, source, epoch, seq)
+        return counts.inserted, counts.deleted, counts.skipped + counts.rejected
+
+    @staticmethod
+    def apply_changes(session: Session, records: List[DeltaRecord]) -> ChangeCounts:
+        """Apply changes in order, to be called from a writer job.
+
+        An insert of a present record and a removal of a missing one
+        are skipped, changes of archived years are rejected.
+        """
+        inserted: int = 0
+        deleted: int = 0
+        skipped: int = 0
+        rejected: int = 0
+        since: Optional[int] = None
+        boundary: int = Rollup.boundary(session)
+        # driver level statements, a base delta runs them for every record
+        conn = session.connection()
+        for op, start, duration, notes in records:
+            if start < boundary:
+                # archived years are read-only
+                rejected += 1
+                continue
+            row = conn.exec_driver_sql(
+                "SELECT id FROM worktime WHERE start = ? "
+                "AND duration = ? AND notes IS ? LIMIT 1",
+                (start, duration, notes),
+            ).first()
+            if (op == DeltaFormat.INSERT) == (row is not None):
+                # already present or already removed
+                skipped += 1
+                continue
+            if op == DeltaFormat.INSERT:
+                conn.exec_driver_sql(
+                    "INSERT INTO worktime (start, duration, notes) VALUES (?, ?, ?)",
+                    (start, duration, notes),
+                )
+                inserted += 1
+            else:
+                conn.exec_driver_sql(
+                    "DELETE FROM worktime WHERE id = ? AND start = ? "
+                    "AND duration = ? AND notes IS ?",
+                    (row[0], start, duration, notes),
+                )
+                deleted += 1
+            since = start if since is None else min(since, start)
+        if since is not None:
+            Rollup.refresh(session, since)
+        return ChangeCounts(inserted, deleted, skipped, rejected)
+
+    @staticmethod
+    def __mark(session: Session, source: str, epoch: str, seq: int) -> None:
+        """Remember the last applied change of the source, writer job."""
+        session.execute(
+            text(
+                "INSERT OR REPLACE INTO import_source (source, epoch, seq, updated) "
+                "VALUES (:source, :epoch, :seq, :updated)"
+            ),
+            {"source": source, "epoch": epoch, "seq": seq, "updated": Timestamp.now()},
+        )
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+  diagnostics.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:37:19
+
+  Purpose: Diagnostics window with instrumentation histograms.
+"""
+
+import tkinter as tk
+
+from tkinter import ttk
+from tkinter.filedialog import asksaveasfilename
+from typing import Any, Dict, Optional
+
+from jsktoolbox.basetool.data import BData
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.tktool.base import TkBase
+from jsktoolbox.tktool.layout import Pack
+
+from libs.ico import ImageBase64
+from libs.instrument import Instrument
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    AFTER: str = "_after_"
+    ENABLED: str = "_enabled_"
+    TREE: str = "_tree_"
+
+
+class DiagnosticsDialog(BData, TkBase, tk.Toplevel):
+    """Diagnostics dialog class."""
+
+    # refresh interval in milliseconds
+    REFRESH: int = 1000
+
+    COLUMNS: Dict[str, str] = {
+        "count": "Count",
+        "total": "Total [ms]",
+        "mean": "Mean [ms]",
+        "p50": "p50 [ms]",
+        "p95": "p95 [ms]",
+        "max": "Max [ms]",
+    }
+
+    def __init__(self, master, **args) -> None:
+        """Constructor."""
+        super().__init__(master, **args)
+        self.title(f"{master.title()}: Diagnostics")
+        self.minsize(600, 300)
+
+        # bind events
+        self.protocol("WM_DELETE_WINDOW", self.__bt_close)
+
+        # init locals
+        self._set_data(key=_Keys.AFTER, value=None, set_default_type=Optional[str])
+        self._set_data(
+            key=_Keys.ENABLED,
+            value=tk.BooleanVar(self, value=Instrument.enabled()),
+            set_default_type=tk.BooleanVar,
+        )
+
+        self.__init_ui()
+        self.__refresh()
+
+    def __init_ui(self) -> None:
+        """Create user interface."""
+        self.geometry("760x400")
+        self.resizable(True, True)
+
+        ico = tk.PhotoImage(data=ImageBase64.ICO)
+        self.wm_iconphoto(True, ico)
+
+        # Sizegrip
+        sizegrip = ttk.Sizegrip(self)
+        sizegrip.pack(side=Pack.Side.BOTTOM, anchor=Pack.Anchor.E)
+
+        # data frame
+        data_frame = ttk.Frame(self)
+        data_frame.pack(
+            side=Pack.Side.TOP, fill=Pack.Fill.BOTH, padx=5, pady=5, expand=True
+        )
+        tree = ttk.Treeview(data_frame, columns=tuple(self.COLUMNS), show="tree headings")
+        tree.heading("#0", text="Span")
+        tree.column("#0", minwidth=0, width=200, stretch=True)
+        for column, title in self.COLUMNS.items():
+            tree.heading(column, text=title)
+            tree.column(column, minwidth=0, width=90, stretch=False, anchor=tk.E)
+        tree.pack(side=Pack.Side.LEFT, fill=Pack.Fill.BOTH, expand=True)
+        self._set_data(key=_Keys.TREE, value=tree, set_default_type=ttk.Treeview)
+
+        scrollbar = ttk.Scrollbar(data_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=Pack.Side.RIGHT, fill=Pack.Fill.Y)
+
+        # separator
+        sep = ttk.Separator(self, orient=tk.HORIZONTAL)
+        sep.pack(fill=Pack.Fill.X)
+
+        # add button frame
+        bt_frame = ttk.Frame(self)
+        bt_frame.pack(side=Pack.Side.TOP, fill=Pack.Fill.X, padx=5, pady=5)
+        enabled = ttk.Checkbutton(
+            bt_frame,
+            text="Collect",
+            variable=self._get_data(key=_Keys.ENABLED),
+            command=self.__bt_enable,
+        )
+        enabled.pack(side=Pack.Side.LEFT, padx=2)
+        close_button = ttk.Button(bt_frame, text="Close", command=self.__bt_close)
+        close_button.pack(side=Pack.Side.RIGHT, padx=2)
+        save_button = ttk.Button(bt_frame, text="Save JSON", command=self.__bt_save)
+        save_button.pack(side=Pack.Side.RIGHT, padx=2)
+        reset_button = ttk.Button(bt_frame, text="Reset", command=self.__bt_reset)
+        reset_button.pack(side=Pack.Side.RIGHT, padx=2)
+        self.update()
+
+    def __refresh(self) -> None:
+        """Show current histograms and schedule the next refresh."""
+        tree: ttk.Treeview = self._get_data(key=_Keys.TREE)  # type: ignore
+        snapshot: Dict[str, Dict[str, Any]] = Instrument.snapshot()
+        for item in tree.get_children():
+            if item not in snapshot:
+                tree.delete(item)
+        for name, stats in snapshot.items():
+            values = [stats["count"]] + [
+                f"{stats[column] * 1000:.3f}" for column in list(self.COLUMNS)[1:]
+            ]
+            if tree.exists(name):
+                tree.item(name, values=values)
+            else:
+                tree.insert("", tk.END, iid=name, text=name, values=values)
+        self._set_data(key=_Keys.AFTER, value=self.after(self.REFRESH, self.__refresh))
+
+    def __bt_enable(self) -> None:
+        """Checkbutton 'Collect' handler."""
+        Instrument.enable(self._get_data(key=_Keys.ENABLED).get())  # type: ignore
+
+    def __bt_reset(self) -> None:
+        """Button RESET handler."""
+        Instrument.reset()
+
+    def __bt_save(self) -> None:
+        """Button SAVE handler."""
+        path: str = asksaveasfilename(
+            parent=self,
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json")],
+            initialfile="workclock-diagnostics.json",
+        )
+        if path:
+            Instrument.dump_json(path)
+
+    def __bt_close(self) -> None:
+        """Button CLOSE handler."""
+        after: Optional[str] = self._get_data(key=_Keys.AFTER)
+        if after is not None:
+            self.after_cancel(after)
+        self.destroy()
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+  executor.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:24:42
+
+  Purpose: Background jobs executor with Tk-safe result delivery.
+
+  Jobs run on a worker pool and never touch Tk. Finished jobs are
+  collected on the Tk main thread by an after() driven poll, which is
+  active only while some jobs are pending. Jobs submitted with a group
+  name supersede the previous jobs of that group: the pending ones are
+  cancelled and the results of the running ones are dropped. Futures of
+  the database writer are delivered the same way.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from jsktoolbox.basetool.data import BData
+from jsktoolbox.attribtool import ReadOnlyClass
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    GENERATIONS: str = "_generations_"
+    INTERVAL: str = "_interval_"
+    JOBS: str = "_jobs_"
+    POLL: str = "_poll_"
+    POOL: str = "_pool_"
+    WIDGET: str = "_widget_"
+
+
+class TkExecutor(BData):
+    """Worker pool delivering results to Tk main thread."""
+
+    def __init__(self, widget: Any, workers: int = 2, interval: int = 20) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * widget - any Tk widget, used for after() scheduling,
+        * workers: int - number of worker threads,
+        * interval: int - result polling interval in milliseconds.
+        """
+        self._set_data(key=_Keys.WIDGET, value=widget)
+        self._set_data(key=_Keys.INTERVAL, value=interval, set_default_type=int)
+        self._set_data(
+            key=_Keys.POOL,
+            value=ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="WorkClock query"
+            ),
+            set_default_type=Optional[ThreadPoolExecutor],
+        )
+        # (future, group, generation, callback, errback)
+        self._set_data(key=_Keys.JOBS, value=[], set_default_type=List)
+        self._set_data(key=_Keys.GENERATIONS, value={}, set_default_type=Dict)
+        self._set_data(key=_Keys.POLL, value=None, set_default_type=Optional[str])
+
+    @property
+    def __jobs(self) -> List[Tuple]:
+        """Returns pending jobs list."""
+        return self._get_data(key=_Keys.JOBS)  # type: ignore
+
+    @property
+    def __generations(self) -> Dict[str, int]:
+        """Returns current generation number for every group."""
+        return self._get_data(key=_Keys.GENERATIONS)  # type: ignore
+
+    @property
+    def busy(self) -> bool:
+        """Returns True if any job is pending."""
+        return len(self.__jobs) > 0
+
+    def submit(
+        self,
+        fn: Callable,
+        *args,
+        callback: Optional[Callable[[Any], None]] = None,
+        errback: Optional[Callable[[BaseException], None]] = None,
+        group: Optional[str] = None,
+    ) -> Optional[Future]:
+        """Run fn(*args) in background.
+
+        ### Arguments:
+        * fn: Callable - job, must not use Tk,
+        * callback: Optional[Callable] - called on Tk thread with the result,
+        * errback: Optional[Callable] - called on Tk thread with the exception,
+          by default the exception is raised on Tk thread,
+        * group: Optional[str] - name of the superseded jobs group.
+
+        ### Returns:
+        Future of the job, None after shutdown.
+        """
+        pool: Optional[ThreadPoolExecutor] = self._get_data(key=_Keys.POOL)
+        if pool is None:
+            return None
+        generation: int = 0
+        if group is not None:
+            generation = self.cancel(group)
+        future: Future = pool.submit(fn, *args)
+        self.__jobs.append((future, group, generation, callback, errback))
+        self.__schedule()
+        return future
+
+    def watch(
+        self,
+        future: Future,
+        callback: Optional[Callable[[Any], None]] = None,
+        errback: Optional[Callable[[BaseException], None]] = None,
+        group: Optional[str] = None,
+    ) -> Future:
+        """Deliver result of the future from another executor to Tk thread.
+
+        ### Arguments:
+        * future: Future - future of a job running elsewhere,
+        * callback, errback, group - see submit().
+        """
+        if self._get_data(key=_Keys.POOL) is None:
+            return future
+        generation: int = 0
+        if group is not None:
+            generation = self.cancel(group)
+        self.__jobs.append((future, group, generation, callback, errback))
+        self.__schedule()
+        return future
+
+    def cancel(self, group: str) -> int:
+        """Cancel jobs of the group, returns the new group generation."""
+        generation: int = self.__generations.get(group, 0) + 1
+        self.__generations[group] = generation
+        for future, job_group, _, _, _ in self.__jobs:
+            if job_group == group:
+                future.cancel()
+        return generation
+
+    def __schedule(self) -> None:
+        """Start polling if it is not active."""
+        if self._get_data(key=_Keys.POLL) is None:
+            widget = self._get_data(key=_Keys.WIDGET)
+            self._set_data(
+                key=_Keys.POLL,
+                value=widget.after(self._get_data(key=_Keys.INTERVAL), self.__poll),  # type: ignore
+            )
+
+    def __poll(self) -> None:
+        """Deliver results of finished jobs on Tk thread."""
+        self._set_data(key=_Keys.POLL, value=None)
+        jobs: List[Tuple] = self.__jobs
+        done: List[Tuple] = [job for job in jobs if job[0].done()]
+        for job in done:
+            jobs.remove(job)
+        if jobs and self._get_data(key=_Keys.POOL) is not None:
+            self.__schedule()
+        error: Optional[BaseException] = None
+        for future, group, generation, callback, errback in done:
+            if future.cancelled():
+                continue
+            if group is not None and self.__generations.get(group) != generation:
+                # superseded by a newer job
+                continue
+            ex: Optional[BaseException] = future.exception()
+            if ex is not None:
+                if errback is None:
+                    error = error or ex
+                else:
+                    errback(ex)
+            elif callback is not None:
+                callback(future.result())
+        if error is not None:
+            # let Tk report it as any other callback exception
+            raise error
+
+    def shutdown(self) -> None:
+        """Stop polling and drop all pending jobs."""
+        pool: Optional[ThreadPoolExecutor] = self._get_data(key=_Keys.POOL)
+        if pool is None:
+            return
+        self._set_data(key=_Keys.POOL, value=None)
+        poll: Optional[str] = self._get_data(key=_Keys.POLL)
+        if poll is not None:
+            self._get_data(key=_Keys.WIDGET).after_cancel(poll)  # type: ignore
+            self._set_data(key=_Keys.POLL, value=None)
+        self.__jobs.clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+  instrument.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:37:19
+
+  Purpose: Opt-in timing spans aggregated into latency histograms.
+
+  Spans are recorded only while instrumentation is enabled, otherwise
+  every hook costs a single flag check. SQL statements are measured by
+  SQLAlchemy engine events, the rest by the span() context manager and
+  the timed() decorator. The WORKCLOCK_PROFILE environment variable
+  enables it at startup:
+  * '1' - collect spans,
+  * 'json:PATH' - collect spans and dump them to PATH at exit,
+  * 'cprofile:PATH' - also run cProfile on the main thread and dump its
+    stats to PATH at exit.
+"""
+
+import atexit
+import json
+import os
+
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+
+class Histogram(object):
+    """Latency histogram with power of two microsecond buckets."""
+
+    __slots__ = ("count", "total", "low", "high", "buckets")
+
+    def __init__(self) -> None:
+        """Constructor."""
+        self.count: int = 0
+        self.total: float = 0.0
+        self.low: float = float("inf")
+        self.high: float = 0.0
+        # bucket n counts spans shorter than 2**n microseconds
+        self.buckets: List[int] = [0] * 40
+
+    def add(self, seconds: float) -> None:
+        """Add one measurement."""
+        self.count += 1
+        self.total += seconds
+        self.low = min(self.low, seconds)
+        self.high = max(self.high, seconds)
+        self.buckets[min(int(seconds * 1e6).bit_length(), 39)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Returns upper bound estimate of the percentile in seconds."""
+        if not self.count:
+            return 0.0
+        rank: float = fraction * self.count
+        seen: int = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(2**index / 1e6, self.high)
+        return self.high
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns summary in seconds."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.low if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": self.high,
+        }
+
+
+class Instrument(object):
+    """Process wide instrumentation registry."""
+
+    ENV: str = "WORKCLOCK_PROFILE"
+
+    __enabled: bool = False
+    __lock: Lock = Lock()
+    __histograms: Dict[str, Histogram] = {}
+    __profiler: Any = None
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """Returns True if spans are recorded."""
+        return cls.__enabled
+
+    @classmethod
+    def enable(cls, value: bool = True) -> None:
+        """Switch recording of spans."""
+        cls.__enabled = value
+
+    @classmethod
+    def record(cls, name: str, seconds: float) -> None:
+        """Add measurement to the named histogram."""
+        with cls.__lock:
+            histogram: Optional[Histogram] = cls.__histograms.get(name)
+            if histogram is None:
+                histogram = cls.__histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    @classmethod
+    @contextmanager
+    def span(cls, name: str) -> Iterator[None]:
+        """Measure the enclosed block."""
+        if not cls.__enabled:
+            yield
+            return
+        start: float = perf_counter()
+        try:
+            yield
+        finally:
+            cls.record(name, perf_counter() - start)
+
+    @classmethod
+    def timed(cls, name: str) -> Callable:
+        """Decorator measuring every call of the function."""
+
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs) -> Any:
+                if not cls.__enabled:
+                    return func(*args, **kwargs)
+                start: float = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    cls.record(name, perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    @classmethod
+    def attach(cls, engine: "Engine") -> None:
+        """Measure SQL statements executed by the engine."""
+        from sqlalchemy import event
+
+        event.listen(engine, "before_cursor_execute", cls.__before_execute)
+        event.listen(engine, "after_cursor_execute", cls.__after_execute)
+
+    @classmethod
+    def __before_execute(
+        cls, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        """Engine event, statement start."""
+        if cls.__enabled:
+            conn.info.setdefault("instrument", []).append(perf_counter())
+
+    @classmethod
+    def __after_execute(
+        cls, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        """Engine event, statement end."""
+        stack: Optional[List[float]] = conn.info.get("instrument")
+        if stack:
+            verb: str = statement.lstrip().split(None, 1)[0].upper()
+            cls.record(f"sql.{verb}", perf_counter() - stack.pop())
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Dict[str, Any]]:
+        """Returns summaries of all histograms."""
+        with cls.__lock:
+            return {
+                name: histogram.as_dict()
+                for name, histogram in sorted(cls.__histograms.items())
+            }
+
+    @classmethod
+    def reset(cls) -> None:
+        """Remove all measurements."""
+        with cls.__lock:
+            cls.__histograms.clear()
+
+    @classmethod
+    def dump_json(cls, path: str) -> None:
+        """Write histograms summaries to JSON file."""
+        with open(path, "w") as file:
+            json.dump(cls.snapshot(), file, indent=2)
+
+    @classmethod
+    def setup(cls) -> None:
+        """Configure instrumentation from the environment variable."""
+        value: str = os.environ.get(cls.ENV, "").strip()
+        if not value or value == "0":
+            return
+        cls.enable()
+        kind, _, path = value.partition(":")
+        if kind == "json" and path:
+            atexit.register(cls.dump_json, path)
+        elif kind == "cprofile" and path and cls.__profiler is None:
+            import cProfile
+
+            cls.__profiler = cProfile.Profile()
+            cls.__profiler.enable()
+            atexit.register(cls.__dump_profile, path)
+
+    @classmethod
+    def __dump_profile(cls, path: str) -> None:
+        """Stop cProfile and write its stats."""
+        cls.__profiler.disable()
+        cls.__profiler.dump_stats(path)
+
+
+# #[EOF]#######################################################################
@@ -16,11 +16,11 @@ class Keys(object, metaclass=ReadOnlyClass):
     BT_START: str = "__bt_start__"
     BT_STOP: str = "__bt_stop__"
     BT_SWITCH: str = "__bt_switch__"
-    CACHE_DIR: str = "__cache__"
-    DATABASE: str = "__database__"
+    CLOCK: str = "__clock__"
     DBH: str = "_DBH_"
     DEF_NAME: str = "__def_name__"
     DIALOG_RETURN: str = "__dialog_return__"
+    EXECUTOR: str = "__executor__"
     D_CALENDAR: str = "__dialog_calendar__"
     D_DATA: str = "__dialog_return_data__"
     D_FRAME: str = "__dialog_data_frame__"
@@ -29,12 +29,18 @@ class Keys(object, metaclass=ReadOnlyClass):
     D_NOTES: str = "__dialog_notes__"
     D_RADIO: str = "__dialog_radio_buttons__"
     D_REPORT: str = "__report_tree__"
-    F_STOP: str = "__stop__"
+    HEARTBEAT: str = "__heartbeat__"
+    LAST_BEAT: str = "__last_heartbeat__"
+    L_STATUS: str = "__status_label__"
+    MAIN_FRAME: str = "__main_frame__"
+    MAINTENANCE: str = "__maintenance__"
+    START: str = "__start__"
     STATE: str = "state"
     SWITCH_FLAG: str = "__switch_flag__"
+    SYNC: str = "__sync__"
     TEXT: str = "__text__"
-    TH_CLOCK: str = "__th_clock__"
     W_CLOSED: str = "__wm_closed__"
+    W_DIAGNOSTICS: str = "__diagnostics_window__"
     W_REPORT: str = "__report_window__"
 
 
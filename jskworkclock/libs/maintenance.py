@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+  maintenance.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:32:01
+
+  Purpose: Background database maintenance.
+
+  Maintenance runs on its own thread, shortly after startup and then
+  periodically, but only when the application reports itself as idle.
+  One cycle removes garbage entries, refreshes query planner statistics,
+  returns free pages to the file system, removes the files of dropped
+  partitions, moves records of partitioned databases to their years and
+  maintains the closed partitions, verifies monthly rollups and the
+  notes search index, prunes changes already exported to every delta
+  target and pushed to every sync server, and takes the daily backup
+  snapshot.
+"""
+
+import logging
+
+from itertools import chain
+from threading import Event, Thread
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from jsktoolbox.attribtool import ReadOnlyClass
+
+from libs.archive import Archive
+from libs.backup import Backups
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.delta import DeltaExporter
+from libs.instrument import Instrument
+from libs.partition import Partitions
+from libs.rollup import Rollup
+from libs.search import NotesSearch
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    DELAY: str = "_delay_"
+    IDLE: str = "_idle_"
+    INTERVAL: str = "_interval_"
+    STOP: str = "_stop_"
+    THREAD: str = "_thread_"
+
+
+class Maintenance(BDbHandler):
+    """Database maintenance scheduler class."""
+
+    # entries not longer than this number of seconds are garbage
+    SHORT_ENTRY: int = 120
+    # free pages returned by one incremental vacuum
+    VACUUM_PAGES: int = 1000
+
+    def __init__(
+        self,
+        dbh: Database,
+        delay: float = 60,
+        interval: float = 6 * 3600,
+        idle: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * dbh: Database - database handler,
+        * delay: float - seconds from start to the first cycle,
+        * interval: float - seconds between cycles,
+        * idle: Optional[Callable[[], bool]] - returns False when the cycle
+          should be postponed, called from the maintenance thread.
+        """
+        self._db_handler = dbh
+        self._set_data(key=_Keys.DELAY, value=float(delay), set_default_type=float)
+        self._set_data(
+            key=_Keys.INTERVAL, value=float(interval), set_default_type=float
+        )
+        self._set_data(key=_Keys.IDLE, value=idle, set_default_type=Optional[Callable])
+        self._set_data(key=_Keys.STOP, value=Event(), set_default_type=Event)
+        self._set_data(key=_Keys.THREAD, value=None, set_default_type=Optional[Thread])
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        if self._get_data(key=_Keys.THREAD) is not None:
+            return
+        thread = Thread(target=self.__run, name="WorkClock maintenance", daemon=True)
+        self._set_data(key=_Keys.THREAD, value=thread)
+        thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the scheduler thread."""
+        self._get_data(key=_Keys.STOP).set()  # type: ignore
+        thread: Optional[Thread] = self._get_data(key=_Keys.THREAD)
+        if thread is not None:
+            thread.join(timeout)
+            self._set_data(key=_Keys.THREAD, value=None)
+
+    def __run(self) -> None:
+        """Scheduler loop."""
+        stop: Event = self._get_data(key=_Keys.STOP)  # type: ignore
+        idle: Optional[Callable[[], bool]] = self._get_data(key=_Keys.IDLE)
+        wait: float = self._get_data(key=_Keys.DELAY)  # type: ignore
+        while not stop.wait(wait):
+            if idle is not None and not idle():
+                # busy, try again in a while
+                wait = min(60.0, self._get_data(key=_Keys.INTERVAL))  # type: ignore
+                continue
+            self.run()
+            wait = self._get_data(key=_Keys.INTERVAL)  # type: ignore
+
+    @Instrument.timed("maintenance.run")
+    def run(self) -> Dict[str, Any]:
+        """Run one maintenance cycle, returns what was done."""
+        out: Dict[str, Any] = {}
+        partitions = Partitions(self._db_handler)
+        tasks: List[Tuple[str, Callable[[], Any]]] = [
+            ("cleanup", self.cleanup),
+            ("optimize", self.optimize),
+            ("vacuum", self.vacuum),
+            ("prune", partitions.prune),
+            ("split", partitions.split),
+            ("partitions", partitions.maintain),
+            ("rollups", self.verify_rollups),
+            ("notes", NotesSearch(self._db_handler).verify),
+            ("changes", DeltaExporter(self._db_handler).prune),
+            ("backup", Backups(self._db_handler).scheduled),
+        ]
+        for name, task in tasks:
+            try:
+                out[name] = task()
+                logger.info("maintenance %s: %s", name, out[name])
+            except Exception as ex:
+                out[name] = None
+                logger.warning("maintenance %s failed: %s", name, ex)
+        return out
+
+    def cleanup(self) -> int:
+        """Remove garbage entries, returns number of removed records."""
+        return self._db_handler.writer.submit(
+            self.__cleanup, self.SHORT_ENTRY
+        ).result()
+
+    @staticmethod
+    def __cleanup(session: Session, short: int) -> int:
+        """Remove garbage entries, writer job."""
+        params: Dict[str, int] = {"short": short}
+        row = session.execute(
+            text(
+                "SELECT MIN(start), COUNT(*) FROM worktime "
+                "WHERE duration BETWEEN -:short AND :short"
+            ),
+            params,
+        ).first()
+        if not row or not row[1]:
+            return 0
+        session.execute(
+            text("DELETE FROM worktime WHERE duration BETWEEN -:short AND :short"),
+            params,
+        )
+        Rollup.refresh(session, row[0])
+        return row[1]
+
+    def optimize(self) -> str:
+        """Refresh query planner statistics of the main database.
+
+        Attached partitions are left to their own maintenance.
+        """
+        engine: Optional[Engine] = self._db_handler.engine
+        if engine is None:
+            return ""
+        with engine.connect() as conn:
+            analyzed = conn.execute(
+                text(
+                    "SELECT name FROM sqlite_master "
+                    "WHERE type='table' AND name='sqlite_stat1'"
+                )
+            ).first()
+            if analyzed is None:
+                conn.execute(text("ANALYZE main"))
+            conn.execute(text("PRAGMA main.optimize"))
+            conn.commit()
+        return "optimize" if analyzed else "analyze"
+
+    def vacuum(self, convert: bool = False) -> int:
+        """Return free pages to the file system, returns number of pages.
+
+        Databases created without incremental auto vacuum need a full
+        VACUUM once, it rewrites the whole file and blocks the writers.
+        The scheduled cycle converts them only while no work session is
+        running, otherwise the conversion is skipped until a later cycle.
+
+        ### Arguments:
+        * convert: bool - convert the file even with a running session.
+        """
+        engine: Optional[Engine] = self._db_handler.engine
+        if engine is None:
+            return 0
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            free: int = conn.execute(text("PRAGMA freelist_count")).scalar() or 0
+            mode: int = conn.execute(text("PRAGMA auto_vacuum")).scalar() or 0
+            if mode == 2 and free:
+                conn.execute(text(f"PRAGMA incremental_vacuum({self.VACUUM_PAGES})"))
+                free = min(free, self.VACUUM_PAGES)
+            running: bool = (
+                conn.execute(text("SELECT 1 FROM active_session WHERE id=1")).first()
+                is not None
+            )
+        if mode != 2:
+            if running and not convert:
+                logger.info(
+                    "maintenance vacuum: conversion to incremental auto vacuum "
+                    "skipped, a work session is running"
+                )
+                return 0
+            self._db_handler.vacuum(incremental=True)
+            logger.info("maintenance vacuum: converted to incremental auto vacuum")
+        return free
+
+    def verify_rollups(self) -> bool:
+        """Compare rollups with archive and worktime data, rebuild on mismatch.
+
+        Returns True if the rollups were valid.
+        """
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return True
+        archive = Archive(self._db_handler)
+        expected: List[Tuple[int, int, int, int]] = []
+        balance: int = 0
+        live = session.execute(
+            text(
+                "SELECT CAST(strftime('%Y%m', start, 'unixepoch', 'localtime') "
+                "AS INTEGER) AS month, SUM(duration), COUNT(*) FROM worktime "
+                "GROUP BY month ORDER BY month"
+            )
+        )
+        for month, total, entries in chain(archive.months(session), live):
+            balance += total
+            expected.append((month, total, balance, entries))
+        current: List[Tuple[int, int, int, int]] = [
+            (month, total, balance, entries)
+            for month, total, balance, entries in session.execute(
+                text(
+                    "SELECT month, total, balance, entries FROM month_balance "
+                    "ORDER BY month"
+                )
+            )
+        ]
+        session.close()
+        valid: bool = current == expected
+        if not valid:
+            self._db_handler.writer.submit(self.__rebuild_rollups, archive).result()
+        return valid
+
+    @staticmethod
+    def __rebuild_rollups(session: Session, archive: Archive) -> None:
+        """Rebuild rollups, writer job."""
+        archive.restore(session)
+        Rollup.rebuild(session)
+
+
+# #[EOF]#######################################################################
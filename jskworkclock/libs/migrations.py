@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+  migrations.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:20:49
+
+  Purpose: Versioned database schema migrations.
+
+  Every migration is a frozen list of SQL statements, so it does not change
+  together with the ORM models. New schema changes are always appended
+  to the MIGRATIONS list with the next version number. Statements run
+  on pooled connections, where a partitioned database has the worktime
+  view of libs.partition in place of the emptied main worktime table.
+"""
+
+from inspect import currentframe
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from jsktoolbox.basetool.data import BData
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.raisetool import Raise
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    ENGINE: str = "_engine_"
+
+
+# (version, description, statements)
+MIGRATIONS: List[Tuple[int, str, Tuple[str, ...]]] = [
+    (
+        1,
+        "initial worktime table",
+        (
+            "CREATE TABLE IF NOT EXISTS worktime ("
+            "id INTEGER NOT NULL, "
+            "start INTEGER NOT NULL, "
+            "duration INTEGER NOT NULL, "
+            "notes TEXT, "
+            "PRIMARY KEY (id))",
+        ),
+    ),
+    (
+        2,
+        "covering index for report queries",
+        (
+            "CREATE INDEX IF NOT EXISTS ix_worktime_start_duration "
+            "ON worktime (start, duration)",
+        ),
+    ),
+    (
+        3,
+        "monthly balance rollups",
+        (
+            "CREATE TABLE IF NOT EXISTS month_balance ("
+            "month INTEGER NOT NULL, "
+            "total INTEGER NOT NULL, "
+            "balance INTEGER NOT NULL, "
+            "PRIMARY KEY (month))",
+            "DELETE FROM month_balance",
+            "INSERT INTO month_balance (month, total, balance) "
+            "SELECT month, total, SUM(total) OVER (ORDER BY month) FROM ("
+            "SELECT CAST(strftime('%Y%m', start, 'unixepoch', 'localtime') "
+            "AS INTEGER) AS month, SUM(duration) AS total "
+            "FROM worktime GROUP BY month)",
+        ),
+    ),
+    (
+        4,
+        "active session checkpoint",
+        (
+            "CREATE TABLE IF NOT EXISTS active_session ("
+            "id INTEGER NOT NULL, "
+            "start INTEGER NOT NULL, "
+            "heartbeat INTEGER NOT NULL, "
+            "PRIMARY KEY (id))",
+        ),
+    ),
+    (
+        5,
+        "entry counts in monthly rollups",
+        (
+            "ALTER TABLE month_balance "
+            "ADD COLUMN entries INTEGER NOT NULL DEFAULT 0",
+            "DELETE FROM month_balance",
+            "INSERT INTO month_balance (month, total, balance, entries) "
+            "SELECT month, total, SUM(total) OVER (ORDER BY month), entries FROM ("
+            "SELECT CAST(strftime('%Y%m', start, 'unixepoch', 'localtime') "
+            "AS INTEGER) AS month, SUM(duration) AS total, COUNT(*) AS entries "
+            "FROM worktime GROUP BY month)",
+        ),
+    ),
+    (
+        6,
+        "archive of closed years",
+        (
+            "CREATE TABLE IF NOT EXISTS archive_year ("
+            "year INTEGER NOT NULL, "
+            "entries INTEGER NOT NULL, "
+            "total INTEGER NOT NULL, "
+            "file TEXT NOT NULL, "
+            "PRIMARY KEY (year))",
+        ),
+    ),
+    (
+        7,
+        "per-year worktime partitions",
+        (
+            "CREATE TABLE IF NOT EXISTS partition_year ("
+            "year INTEGER NOT NULL, "
+            "start INTEGER NOT NULL, "
+            "stop INTEGER NOT NULL, "
+            "file TEXT NOT NULL, "
+            "PRIMARY KEY (year))",
+        ),
+    ),
+    (
+        8,
+        "full-text index of notes",
+        (
+            "CREATE TABLE IF NOT EXISTS notes_index ("
+            "id INTEGER NOT NULL, "
+            "start INTEGER NOT NULL, "
+            "duration INTEGER NOT NULL, "
+            "notes TEXT NOT NULL, "
+            "PRIMARY KEY (id))",
+            "CREATE INDEX IF NOT EXISTS ix_notes_index_start "
+            "ON notes_index (start)",
+            "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5("
+            "notes, content='notes_index', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            "CREATE TRIGGER IF NOT EXISTS main.notes_index_insert "
+            "AFTER INSERT ON notes_index BEGIN "
+            "INSERT INTO notes_fts (rowid, notes) VALUES (NEW.id, NEW.notes); "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS main.notes_index_delete "
+            "AFTER DELETE ON notes_index BEGIN "
+            "INSERT INTO notes_fts (notes_fts, rowid, notes) "
+            "VALUES ('delete', OLD.id, OLD.notes); "
+            "END",
+            # partitioned databases route through libs.partition triggers,
+            # notes of archived years stay indexed
+            "CREATE TRIGGER IF NOT EXISTS main.worktime_notes_insert "
+            "AFTER INSERT ON worktime WHEN NEW.notes <> '' BEGIN "
+            "INSERT INTO notes_index (start, duration, notes) "
+            "VALUES (NEW.start, NEW.duration, NEW.notes); "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS main.worktime_notes_delete "
+            "AFTER DELETE ON worktime WHEN OLD.notes <> '' "
+            "AND NOT EXISTS (SELECT 1 FROM partition_year) "
+            "AND CAST(strftime('%Y', OLD.start, 'unixepoch', 'localtime') "
+            "AS INTEGER) > COALESCE((SELECT MAX(year) FROM archive_year), 0) "
+            "BEGIN "
+            "DELETE FROM notes_index WHERE id = (SELECT id FROM notes_index "
+            "WHERE start = OLD.start AND duration = OLD.duration "
+            "AND notes = OLD.notes LIMIT 1); "
+            "END",
+            # archived notes are added by the index verification
+            "INSERT INTO notes_index (start, duration, notes) "
+            "SELECT start, duration, notes FROM worktime WHERE notes <> '' "
+            "ORDER BY start, id",
+        ),
+    ),
+    (
+        9,
+        "change log of delta exports",
+        (
+            "CREATE TABLE IF NOT EXISTS database_info ("
+            "key TEXT NOT NULL, "
+            "value TEXT NOT NULL, "
+            "PRIMARY KEY (key))",
+            "INSERT OR IGNORE INTO database_info (key, value) "
+            "VALUES ('id', lower(hex(randomblob(16))))",
+            "CREATE TABLE IF NOT EXISTS change_log ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "op TEXT NOT NULL, "
+            "start INTEGER NOT NULL, "
+            "duration INTEGER NOT NULL, "
+            "notes TEXT)",
+            "CREATE TABLE IF NOT EXISTS export_target ("
+            "target TEXT NOT NULL, "
+            "epoch TEXT NOT NULL, "
+            "seq INTEGER NOT NULL, "
+            "updated INTEGER NOT NULL, "
+            "PRIMARY KEY (target))",
+            "CREATE TABLE IF NOT EXISTS import_source ("
+            "source TEXT NOT NULL, "
+            "epoch TEXT NOT NULL, "
+            "seq INTEGER NOT NULL, "
+            "updated INTEGER NOT NULL, "
+            "PRIMARY KEY (source))",
+            # partitioned databases log through libs.partition triggers,
+            # archiving is not a removal
+            "CREATE TRIGGER IF NOT EXISTS main.worktime_log_insert "
+            "AFTER INSERT ON worktime BEGIN "
+            "INSERT INTO change_log (op, start, duration, notes) "
+            "VALUES ('+', NEW.start, NEW.duration, NEW.notes); "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS main.worktime_log_delete "
+            "AFTER DELETE ON worktime "
+            "WHEN NOT EXISTS (SELECT 1 FROM partition_year) "
+            "AND CAST(strftime('%Y', OLD.start, 'unixepoch', 'localtime') "
+            "AS INTEGER) > COALESCE((SELECT MAX(year) FROM archive_year), 0) "
+            "BEGIN "
+            "INSERT INTO change_log (op, start, duration, notes) "
+            "VALUES ('-', OLD.start, OLD.duration, OLD.notes); "
+            "END",
+        ),
+    ),
+    (
+        10,
+        "two-way sync state",
+        (
+            # one row per sync server, 'pushed' is a change_log seq,
+            # 'pulled' a seq of the server log
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            "server TEXT NOT NULL, "
+            "hub TEXT, "
+            "pushed INTEGER NOT NULL DEFAULT 0, "
+            "pulled INTEGER NOT NULL DEFAULT 0, "
+            "updated INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (server))",
+            # change_log ranges written by changes received from a peer,
+            # they are never sent back to it
+            "CREATE TABLE IF NOT EXISTS sync_origin ("
+            "peer TEXT NOT NULL, "
+            "first INTEGER NOT NULL, "
+            "last INTEGER NOT NULL, "
+            "PRIMARY KEY (peer, first))",
+        ),
+    ),
+]
+
+
+class Migrations(BData):
+    """Schema migrations runner."""
+
+    def __init__(self, engine: Engine) -> None:
+        """Constructor."""
+        self._set_data(key=_Keys.ENGINE, value=engine, set_default_type=Engine)
+
+    @property
+    def latest(self) -> int:
+        """Returns the newest known schema version."""
+        return MIGRATIONS[-1][0]
+
+    def __version(self, conn: Connection) -> Optional[int]:
+        """Returns current schema version or None if not versioned yet."""
+        table = conn.execute(
+            text(
+                "SELECT name FROM sqlite_master "
+                "WHERE type='table' AND name='schema_version'"
+            )
+        ).first()
+        if table is None:
+            return None
+        row = conn.execute(
+            text("SELECT version FROM schema_version WHERE id=1")
+        ).first()
+        if row is None:
+            return None
+        return row[0]
+
+    @property
+    def version(self) -> int:
+        """Returns current schema version of the database."""
+        engine: Engine = self._get_data(key=_Keys.ENGINE)  # type: ignore
+        with engine.connect() as conn:
+            version: Optional[int] = self.__version(conn)
+        return version or 0
+
+    def upgrade(self) -> int:
+        """Upgrade database schema to the latest version.
+
+        Returns the schema version after the upgrade.
+        """
+        engine: Engine = self._get_data(key=_Keys.ENGINE)  # type: ignore
+
+        # fast path: one lookup on a single row table
+        if self.version == self.latest:
+            return self.latest
+
+        try:
+            with engine.begin() as conn:
+                version: Optional[int] = self.__version(conn)
+                if version is None:
+                    conn.execute(
+                        text(
+                            "CREATE TABLE IF NOT EXISTS schema_version ("
+                            "id INTEGER NOT NULL, "
+                            "version INTEGER NOT NULL, "
+                            "PRIMARY KEY (id))"
+                        )
+                    )
+                    conn.execute(
+                        text("INSERT INTO schema_version (id, version) VALUES (1, 0)")
+                    )
+                    version = 0
+                for number, _, statements in MIGRATIONS:
+                    if number <= version:
+                        continue
+                    for statement in statements:
+                        conn.execute(text(statement))
+                    conn.execute(
+                        text("UPDATE schema_version SET version=:version WHERE id=1"),
+                        {"version": number},
+                    )
+                    version = number
+        except Exception as ex:
+            raise Raise.error(
+                f"Database migration failed: {ex}",
+                OSError,
+                self._c_name,
+                currentframe(),
+            )
+        return version
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,516 @@
+# -*- coding: utf-8 -*-
+"""
+  partition.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:03:34
+
+  Purpose: Per-year partitions of the worktime table.
+
+  A partitioned database keeps worktime rows in one SQLite file per
+  year, '<db root>.parts/YYYY.sqlite' with a 'worktime_YYYY' table, and
+  in a default partition for the years without their own file. The
+  partitions are listed in the partition_year table and attached to
+  every pooled connection, where a TEMP view named worktime, shadowing
+  the emptied main table, joins them with UNION ALL, and INSTEAD OF
+  triggers route inserts by the start column and deletes by the key,
+  so queries of the other modules are not changed. SQLite pushes the
+  start range of a query into every branch of the view, so partitions
+  out of the range cost one index seek, and ordered pages merge the
+  per partition indexes.
+
+  Rows routed to the default partition are moved to their own year
+  by split(), which the maintenance runs periodically, and closed
+  partitions can be checked and vacuumed on their own connections,
+  without locking the file of the current year. Dropped partitions are
+  only unregistered, pooled connections keep them attached until their
+  next checkout, and prune() removes the files later. Transactions are
+  atomic per file only, a crash during a commit may leave rollups
+  behind, which the rollup verification repairs.
+"""
+
+import os
+import sqlite3
+import time
+
+from datetime import datetime
+from inspect import currentframe
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional, Tuple
+
+from jsktoolbox.raisetool import Raise
+
+from libs.base import BDbHandler
+from libs.instrument import Instrument
+from libs.rollup import Rollup
+
+if TYPE_CHECKING:
+    # libs.database attaches the partitions, imported for type hints only
+    from libs.database import Database
+
+# (year, start, stop, file), the stop timestamp is excluded
+PartitionRow = Tuple[int, int, int, str]
+
+
+class Partitions(BDbHandler):
+    """Per-year worktime partitions class."""
+
+    # registry year of the default partition
+    DEFAULT: int = 0
+    SUFFIX: str = ".sqlite"
+    # connection_record.info key of the attached (layout, synced tables)
+    INFO: str = "partitions"
+    # tables kept in sync by the worktime triggers, when they exist
+    SYNCED: Tuple[str, ...] = ("notes_index", "change_log")
+    # pragmas applied to every attached schema, the rest is per connection
+    SCHEMA_PRAGMAS: Tuple[str, ...] = ("synchronous", "mmap_size", "cache_size")
+    # seconds an unregistered file is left alone, it may be just created
+    ORPHAN_AGE: int = 3600
+
+    def __init__(self, dbh: "Database") -> None:
+        """Constructor.
+
+        ### Arguments:
+        * dbh: Database - database handler.
+        """
+        self._db_handler = dbh
+
+    @staticmethod
+    def location(path: str) -> str:
+        """Returns partitions directory of the database file path."""
+        return f"{os.path.splitext(path)[0]}.parts"
+
+    @classmethod
+    def name(cls, year: int) -> str:
+        """Returns partition name used in file, schema and table names."""
+        return "default" if year == cls.DEFAULT else str(year)
+
+    @property
+    def directory(self) -> str:
+        """Returns partitions directory, next to the database file."""
+        return self.location(self._db_handler.path)
+
+    @classmethod
+    def attach(
+        cls,
+        dbapi_connection: Any,
+        info: Dict[str, Any],
+        path: str,
+        pragmas: Dict[str, Any],
+    ) -> None:
+        """Keep the partitions attached to the connection in line with the registry.
+
+        Called on every pool checkout, outside of any transaction, so
+        partitions added or dropped by another connection or process are
+        attached before the next query.
+
+        ### Arguments:
+        * dbapi_connection - sqlite3 connection,
+        * info: Dict[str, Any] - connection_record.info of the connection,
+        * path: str - main database file path,
+        * pragmas: Dict[str, Any] - database pragmas.
+        """
+        cursor = dbapi_connection.cursor()
+        try:
+            try:
+                layout: Tuple[PartitionRow, ...] = tuple(
+                    cursor.execute(
+                        "SELECT year, start, stop, file FROM partition_year "
+                        "ORDER BY year"
+                    )
+                )
+            except sqlite3.OperationalError:
+                # schema not upgraded yet
+                layout = ()
+            synced: FrozenSet[str] = frozenset()
+            if layout:
+                synced = frozenset(
+                    name
+                    for (name,) in cursor.execute(
+                        "SELECT name FROM sqlite_master WHERE type='table' "
+                        f"AND name IN ({', '.join('?' for _ in cls.SYNCED)})",
+                        cls.SYNCED,
+                    )
+                )
+            current: Tuple[Tuple[PartitionRow, ...], FrozenSet[str]] = info.get(
+                cls.INFO, ((), frozenset())
+            )
+            if (layout, synced) == current:
+                return
+            cursor.execute("DROP VIEW IF EXISTS temp.worktime")
+            for row in current[0]:
+                cursor.execute(f"DETACH DATABASE part_{cls.name(row[0])}")
+            info[cls.INFO] = ((), frozenset())
+            if not layout:
+                return
+            directory: str = cls.location(path)
+            for year, _, _, file in layout:
+                name: str = cls.name(year)
+                cursor.execute(
+                    f"ATTACH DATABASE ? AS part_{name}",
+                    (os.path.join(directory, file),),
+                )
+                for key in cls.SCHEMA_PRAGMAS:
+                    if key in pragmas:
+                        cursor.execute(f"PRAGMA part_{name}.{key}={pragmas[key]}")
+            for statement in cls.__routing(layout, synced):
+                cursor.execute(statement)
+            info[cls.INFO] = (layout, synced)
+        finally:
+            cursor.close()
+
+    @classmethod
+    def __routing(
+        cls, layout: Tuple[PartitionRow, ...], synced: FrozenSet[str]
+    ) -> List[str]:
+        """Returns statements creating the worktime view and its triggers.
+
+        ### Arguments:
+        * layout: Tuple[PartitionRow, ...] - registered partitions,
+        * synced: FrozenSet[str] - existing SYNCED tables, the notes_index
+          of libs.search and the change_log of libs.delta, kept in sync
+          as the triggers of the main worktime table do.
+        """
+        columns: str = "id, start, duration, notes"
+        values: str = "NEW.id, NEW.start, NEW.duration, NEW.notes"
+        ranges: List[str] = [
+            f"(NEW.start >= {start} AND NEW.start < {stop})"
+            for year, start, stop, _ in layout
+            if year != cls.DEFAULT
+        ]
+        view: List[str] = []
+        insert: List[str] = []
+        delete: List[str] = []
+        for year, start, stop, _ in layout:
+            name: str = cls.name(year)
+            view.append(f"SELECT {columns} FROM part_{name}.worktime_{name}")
+            if year != cls.DEFAULT:
+                where: str = f"NEW.start >= {start} AND NEW.start < {stop}"
+            elif ranges:
+                where = f"NOT ({' OR '.join(ranges)})"
+            else:
+                where = "1"
+            # triggers do not accept schema names, table names are unique
+            insert.append(
+                f"INSERT INTO worktime_{name} ({columns}) "
+                f"SELECT {values} WHERE {where};"
+            )
+            delete.append(
+                f"DELETE FROM worktime_{name} "
+                "WHERE id = OLD.id AND start = OLD.start;"
+            )
+        # records of archived years leave worktime, but are not removed
+        archived: str = (
+            "CAST(strftime('%Y', OLD.start, 'unixepoch', 'localtime') "
+            "AS INTEGER) > COALESCE((SELECT MAX(year) FROM archive_year), 0)"
+        )
+        if "notes_index" in synced:
+            insert.append(
+                "INSERT INTO notes_index (start, duration, notes) "
+                "SELECT NEW.start, NEW.duration, NEW.notes WHERE NEW.notes <> '';"
+            )
+            # notes of archived years stay indexed
+            delete.append(
+                "DELETE FROM notes_index WHERE id = (SELECT id FROM notes_index "
+                "WHERE start = OLD.start AND duration = OLD.duration "
+                f"AND notes = OLD.notes LIMIT 1) AND {archived};"
+            )
+        if "change_log" in synced:
+            insert.append(
+                "INSERT INTO change_log (op, start, duration, notes) "
+                "VALUES ('+', NEW.start, NEW.duration, NEW.notes);"
+            )
+            delete.append(
+                "INSERT INTO change_log (op, start, duration, notes) "
+                f"SELECT '-', OLD.start, OLD.duration, OLD.notes WHERE {archived};"
+            )
+        return [
+            f"CREATE TEMP VIEW worktime ({columns}) AS {' UNION ALL '.join(view)}",
+            "CREATE TEMP TRIGGER worktime_insert INSTEAD OF INSERT ON worktime "
+            f"BEGIN {' '.join(insert)} END",
+            "CREATE TEMP TRIGGER worktime_delete INSTEAD OF DELETE ON worktime "
+            f"BEGIN {' '.join(delete)} END",
+        ]
+
+    def __connect(self, path: str) -> sqlite3.Connection:
+        """Returns own autocommit connection to the database file."""
+        timeout: float = self._db_handler.pragmas.get("busy_timeout", 5000) / 1000
+        return sqlite3.connect(path, timeout=timeout, isolation_level=None)
+
+    @staticmethod
+    def __layout(conn: sqlite3.Connection) -> List[PartitionRow]:
+        """Returns registered partitions."""
+        return list(
+            conn.execute(
+                "SELECT year, start, stop, file FROM partition_year ORDER BY year"
+            )
+        )
+
+    def layout(self) -> List[PartitionRow]:
+        """Returns registered partitions, empty list if not partitioned."""
+        conn: sqlite3.Connection = self.__connect(self._db_handler.path)
+        try:
+            return self.__layout(conn)
+        finally:
+            conn.close()
+
+    def __create(self, conn: sqlite3.Connection, year: int) -> None:
+        """Create partition file of the year and register it."""
+        name: str = self.name(year)
+        file: str = f"{name}{self.SUFFIX}"
+        os.makedirs(self.directory, exist_ok=True)
+        part: sqlite3.Connection = self.__connect(os.path.join(self.directory, file))
+        try:
+            part.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            if "journal_mode" in self._db_handler.pragmas:
+                part.execute(
+                    f"PRAGMA journal_mode={self._db_handler.pragmas['journal_mode']}"
+                )
+            part.execute(
+                f"CREATE TABLE IF NOT EXISTS worktime_{name} ("
+                "id INTEGER NOT NULL, "
+                "start INTEGER NOT NULL, "
+                "duration INTEGER NOT NULL, "
+                "notes TEXT, "
+                "PRIMARY KEY (id))"
+            )
+            part.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_worktime_{name}_start_duration "
+                f"ON worktime_{name} (start, duration)"
+            )
+        finally:
+            part.close()
+        start: int = 0
+        stop: int = 0
+        if year != self.DEFAULT:
+            start = Rollup.month_start(year * 100 + 1)
+            stop = Rollup.month_start((year + 1) * 100 + 1)
+        conn.execute(
+            "INSERT INTO partition_year (year, start, stop, file) VALUES (?, ?, ?, ?)",
+            (year, start, stop, file),
+        )
+
+    @staticmethod
+    def __move(
+        conn: sqlite3.Connection,
+        source: str,
+        target: str,
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+    ) -> int:
+        """Move rows of [start, stop) between tables, returns moved count.
+
+        Rows are copied unless the target has an equal one, then only the
+        copied rows are deleted, so a crash between the commits of the
+        two files or a row inserted meanwhile never loses data. Copied ids
+        are shifted above the ids of a non empty target.
+        """
+        where: str = "1"
+        params: List[int] = []
+        if start is not None and stop is not None:
+            where = "s.start >= ? AND s.start < ?"
+            params = [start, stop]
+        equal: str = (
+            f"SELECT 1 FROM {target} w WHERE w.start = s.start "
+            "AND w.duration = s.duration AND w.notes IS s.notes"
+        )
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            shift: int = conn.execute(
+                f"SELECT COALESCE(MAX(id), 0) FROM {target}"
+            ).fetchone()[0]
+            conn.execute(
+                f"INSERT INTO {target} (id, start, duration, notes) "
+                f"SELECT s.id + ?, s.start, s.duration, s.notes FROM {source} s "
+                f"WHERE {where} AND NOT EXISTS ({equal})",
+                [shift] + params,
+            )
+            count: int = conn.execute(
+                f"DELETE FROM {source} AS s WHERE {where} AND EXISTS ({equal})",
+                params,
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def enable(self) -> int:
+        """Partition the worktime table, returns number of moved records."""
+        return self.split(enable=True)
+
+    @Instrument.timed("partition.split")
+    def split(self, enable: bool = False) -> int:
+        """Move records to the partitions of their years.
+
+        Partitions are created for the years found in the main table and
+        in the default partition, and for the current year, newest first
+        while the attached databases limit allows, the remaining records
+        are kept in the default partition. Archiving closed years frees
+        the slots.
+
+        ### Arguments:
+        * enable: bool - partition a database that is not partitioned yet.
+
+        ### Returns:
+        Number of moved records.
+        """
+        conn: sqlite3.Connection = self.__connect(self._db_handler.path)
+        info: Dict[str, Any] = {}
+        count: int = 0
+        try:
+            layout: List[PartitionRow] = self.__layout(conn)
+            if not layout:
+                if not enable:
+                    return 0
+                self.__create(conn, self.DEFAULT)
+            self.attach(conn, info, self._db_handler.path, self._db_handler.pragmas)
+            years = set(
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT CAST(strftime('%Y', start, 'unixepoch', "
+                    "'localtime') AS INTEGER) FROM ("
+                    "SELECT start FROM main.worktime UNION ALL "
+                    "SELECT start FROM worktime_default)"
+                )
+            )
+            years.add(datetime.now().year)
+            row = conn.execute("SELECT MAX(year) FROM archive_year").fetchone()
+            archived: int = row[0] or 0
+            layout = self.__layout(conn)
+            room: int = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - len(layout)
+            missing: List[int] = sorted(
+                (
+                    year
+                    for year in years.difference(row[0] for row in layout)
+                    if year > archived
+                ),
+                reverse=True,
+            )
+            for year in missing[: max(room, 0)]:
+                self.__create(conn, year)
+            self.attach(conn, info, self._db_handler.path, self._db_handler.pragmas)
+            legacy: int = 0
+            for year, start, stop, _ in info[self.INFO][0]:
+                if year == self.DEFAULT:
+                    continue
+                target: str = f"worktime_{year}"
+                legacy += self.__move(conn, "main.worktime", target, start, stop)
+                count += self.__move(conn, "worktime_default", target, start, stop)
+            legacy += self.__move(conn, "main.worktime", "worktime_default")
+            count += legacy
+        finally:
+            conn.close()
+        if legacy:
+            # pages of the records moved out go back to the file system
+            self._db_handler.vacuum()
+        if count:
+            # imported here, libs.report_cache depends on libs.database
+            from libs.report_cache import ReportCache
+
+            # shifted ids change the keys of cached pages
+            ReportCache.clear()
+        return count
+
+    @Instrument.timed("partition.maintain")
+    def maintain(self) -> Dict[str, str]:
+        """Check, analyze and vacuum the partitions, the current year excluded.
+
+        Every partition is maintained on its own connection, so only its
+        file is locked. Empty partitions of archived years are dropped.
+
+        ### Returns:
+        Dictionary of partition name and what was done.
+        """
+        conn: sqlite3.Connection = self.__connect(self._db_handler.path)
+        out: Dict[str, str] = {}
+        try:
+            row = conn.execute("SELECT MAX(year) FROM archive_year").fetchone()
+            archived: int = row[0] or 0
+            current: int = datetime.now().year
+            for year, _, _, file in self.__layout(conn):
+                if year == current:
+                    continue
+                path: str = os.path.join(self.directory, file)
+                result: Optional[str] = self.__maintain(
+                    path, year, year != self.DEFAULT and year <= archived
+                )
+                if result is None:
+                    # connections detach it on their next checkout, the file
+                    # is removed by prune() of a later maintenance cycle
+                    conn.execute("DELETE FROM partition_year WHERE year = ?", (year,))
+                    result = "dropped"
+                out[self.name(year)] = result
+        finally:
+            conn.close()
+        return out
+
+    def prune(self) -> List[str]:
+        """Remove files of dropped partitions, returns removed file names.
+
+        Idle pooled connections of this process are closed first, those
+        in use detach the dropped partitions on their next checkout. A
+        file that cannot be removed yet, still open on Windows, is left
+        for the next call.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        registered = set(row[3] for row in self.layout())
+        now: float = time.time()
+        orphans: List[str] = []
+        for file in sorted(os.listdir(self.directory)):
+            base: str = file
+            for suffix in ("-wal", "-shm"):
+                if base.endswith(suffix):
+                    base = base[: -len(suffix)]
+            path: str = os.path.join(self.directory, file)
+            if (
+                base.endswith(self.SUFFIX)
+                and base not in registered
+                and now - os.path.getmtime(path) > self.ORPHAN_AGE
+            ):
+                orphans.append(file)
+        if not orphans:
+            return []
+        if self._db_handler.engine is not None:
+            self._db_handler.engine.dispose()
+        out: List[str] = []
+        for file in orphans:
+            try:
+                os.remove(os.path.join(self.directory, file))
+            except OSError:
+                continue
+            out.append(file)
+        return out
+
+    def __maintain(self, path: str, year: int, archived: bool) -> Optional[str]:
+        """Maintain one partition file, returns None if it should be dropped."""
+        name: str = self.name(year)
+        part: sqlite3.Connection = self.__connect(path)
+        try:
+            check: str = part.execute("PRAGMA quick_check").fetchone()[0]
+            if check != "ok":
+                raise Raise.error(
+                    f"Partition '{path}' check failed: {check}",
+                    OSError,
+                    self._c_name,
+                    currentframe(),
+                )
+            if (
+                archived
+                and part.execute(f"SELECT 1 FROM worktime_{name} LIMIT 1").fetchone()
+                is None
+            ):
+                return None
+            analyzed = part.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type='table' AND name='sqlite_stat1'"
+            ).fetchone()
+            part.execute("PRAGMA optimize" if analyzed else "ANALYZE")
+            free: int = part.execute("PRAGMA freelist_count").fetchone()[0]
+            part.execute("PRAGMA incremental_vacuum")
+            part.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            part.close()
+        return f"{'optimize' if analyzed else 'analyze'}, {free} pages"
+
+
+# #[EOF]#######################################################################
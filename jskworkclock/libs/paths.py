@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+  paths.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:35:00
+
+  Purpose: Application file locations.
+
+  Kept free of database and GUI imports, so front ends can resolve
+  paths before loading the heavy modules.
+"""
+
+import os
+
+from jsktoolbox.systemtool import Env
+
+
+class AppPaths(object):
+    """Application paths class."""
+
+    # locations relative to the home directory
+    CACHE_DIR: str = ".cache/jskworkclock"
+    DATABASE: str = "data.sqlite"
+
+    @classmethod
+    def cache_dir(cls) -> str:
+        """Returns application cache directory path."""
+        return os.path.join(Env().home, cls.CACHE_DIR)
+
+    @classmethod
+    def database(cls) -> str:
+        """Returns default database file path."""
+        return os.path.join(cls.cache_dir(), cls.DATABASE)
+
+
+# #[EOF]#######################################################################
@@ -11,20 +11,20 @@
 """
 
 
+import os
 import tkinter as tk
-import pickle
 
-from tkinter import StringVar, ttk
+from tkinter import StringVar, ttk, messagebox
 from tkinter.scrolledtext import ScrolledText
-from tkinter.filedialog import asksaveasfile, askopenfile
+from tkinter.filedialog import askdirectory, asksaveasfile, askopenfile
 
 from typing import Optional, Literal, List, Tuple, Any
 from datetime import timedelta, datetime, date
 
 from tkcalendar import Calendar
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import func, and_
 
 from jsktoolbox.basetool.data import BData
 from jsktoolbox.datetool import DateTime, Timestamp
@@ -34,9 +34,18 @@ from jsktoolbox.tktool.base import TkBase
 
 from libs.ico import ImageBase64
 from libs.database import Database, TWorkTime
+from libs.delta import DeltaExporter, DeltaFormat, DeltaImport, DeltaImporter
 from libs.keys import Keys
 from libs.base import BDbHandler
+from libs.executor import TkExecutor
+from libs.report_data import ReportData
+from libs.rollup import Rollup
+from libs.search_frame import SearchFrame
+from libs.stats_frame import StatsFrame
+from libs.summary_frame import SummaryFrame
 from libs.system import MDateTime
+from libs.transfer import Exporter, Importer, ImportResult
+from libs.vtree import VirtualTreeview
 
 
 class DataFrame(BData, TkBase, ttk.Frame):
@@ -244,10 +253,18 @@ class ReportDialog(TkBase, BDbHandler, tk.Toplevel):
 
         # init locals
         self._set_data(key=Keys.W_CLOSED, value=False, set_default_type=bool)
+        self._set_data(
+            key=Keys.EXECUTOR, value=TkExecutor(self), set_default_type=TkExecutor
+        )
         self._db_handler = dbh
 
         self.__init_ui()
 
+    @property
+    def __executor(self) -> TkExecutor:
+        """Returns background queries executor."""
+        return self._get_data(key=Keys.EXECUTOR)  # type: ignore
+
     def __init_ui(self) -> None:
         """Create user interface."""
         # set initial flags
@@ -267,19 +284,32 @@ class ReportDialog(TkBase, BDbHandler, tk.Toplevel):
         sizegrip = ttk.Sizegrip(self)
         sizegrip.pack(side=Pack.Side.BOTTOM, anchor=Pack.Anchor.E)
 
-        # Data Frame
-        data_frame = ttk.Frame(self)
-        data_frame.pack(
+        # tabs
+        notebook = ttk.Notebook(self)
+        notebook.pack(
             side=Pack.Side.TOP, expand=True, fill=Pack.Fill.BOTH, padx=5, pady=5
         )
 
+        # Data Frame
+        data_frame = ttk.Frame(notebook)
+        notebook.add(data_frame, text="Entries")
+        notebook.add(
+            SummaryFrame(notebook, self._db_handler, self.__executor), text="Summary"
+        )
+        notebook.add(
+            StatsFrame(notebook, self._db_handler, self.__executor), text="Statistics"
+        )
+        notebook.add(
+            SearchFrame(notebook, self._db_handler, self.__executor), text="Search"
+        )
+
         # treeview
         columns: tuple[Literal["date"], Literal["elapsed_time"], Literal["note"]] = (
             "date",
             "elapsed_time",
             "note",
         )
-        tree = ttk.Treeview(data_frame, columns=columns, show="headings")
+        tree = VirtualTreeview(data_frame, columns=columns, show="headings")
         tree.heading(columns[0], text="Date")
         tree.column(columns[0], minwidth=0, width=200, stretch=False)
         tree.heading(columns[1], text="Elapsed time")
@@ -296,12 +326,10 @@ class ReportDialog(TkBase, BDbHandler, tk.Toplevel):
 
         # add a scrollbar
         scrollbar = ttk.Scrollbar(data_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
+        tree.scrollbar = scrollbar
+        tree.executor = self.__executor
         scrollbar.pack(side=Pack.Side.RIGHT, fill=Pack.Fill.Y)
 
-        # tree data
-        self.__tree_reload()
-
         # separator
         sep = ttk.Separator(self, orient=tk.HORIZONTAL)
         sep.pack(fill=Pack.Fill.X)
@@ -337,19 +365,60 @@ class ReportDialog(TkBase, BDbHandler, tk.Toplevel):
         export_button = ttk.Button(bt_frame, text="Export", command=self.__bt_export)
         export_button.pack(side=Pack.Side.RIGHT, padx=2)
 
+        # add export changes button
+        changes_button = ttk.Button(
+            bt_frame, text="Export changes", command=self.__bt_export_changes
+        )
+        changes_button.pack(side=Pack.Side.RIGHT, padx=2)
+
         # add import button
         import_button = ttk.Button(bt_frame, text="Import", command=self.__bt_import)
         import_button.pack(side=Pack.Side.RIGHT, padx=2)
 
+        # add status label
+        status = ttk.Label(bt_frame, text="")
+        status.pack(side=Pack.Side.LEFT, padx=2)
+        self._set_data(key=Keys.L_STATUS, value=status, set_default_type=ttk.Label)
+
+        # tree data
+        self.__tree_reload()
+
+    def __loading(self, text: Optional[str]) -> None:
+        """Show or hide loading state."""
+        status: ttk.Label = self._get_data(key=Keys.L_STATUS)  # type: ignore
+        status["text"] = text or ""
+        self.configure(cursor="watch" if text else "")
+
+    def __failed(self, ex: BaseException) -> None:
+        """Background job failure handler."""
+        self.__loading(None)
+        self.report_callback_exception(type(ex), ex, ex.__traceback__)
+
     def __tree_reload(self) -> None:
         """Reload tree data."""
-        tree: ttk.Treeview = self._get_data(key=Keys.D_REPORT)  # type: ignore
-        # emptying tree
-        for item in tree.get_children():
-            tree.delete(item)
-        # fill tree
-        for item in self.__get_data():
-            tree.insert("", tk.END, values=item)
+        report = ReportData(
+            self._db_handler, previous=self._get_data(key=Keys.SWITCH_FLAG)  # type: ignore
+        )
+        self.__loading("Loading...")
+        # a newer reload supersedes the pending one
+        self.__executor.submit(
+            self.__get_data,
+            report,
+            callback=lambda rows: self.__tree_loaded(report, rows),
+            errback=self.__failed,
+            group=Keys.D_REPORT,
+        )
+
+    @staticmethod
+    def __get_data(report: ReportData) -> List:
+        """Gets the first page of report, runs in background."""
+        return report.page()
+
+    def __tree_loaded(self, report: ReportData, rows: List) -> None:
+        """Fill tree with the first page, the next ones are fetched on scroll."""
+        tree: VirtualTreeview = self._get_data(key=Keys.D_REPORT)  # type: ignore
+        tree.reset(report.page, rows)
+        self.__loading(None)
 
     def __bt_export(self) -> None:
         """On Export Event."""
@@ -363,61 +432,102 @@ class ReportDialog(TkBase, BDbHandler, tk.Toplevel):
         self.focus()
         if file is not None:
             file.close()
-            # dump data
-            tmp = []
-            session: Optional[Session] = self._db_handler.session
-            if session is not None:
-                rows = session.query(TWorkTime).all()
-                for item in rows:
-                    tmp.append(item)
-                # pickle list
-                # print(file.name)
-                with open(file.name, "wb") as outfile:
-                    pickle.dump(tmp, outfile)
-
-                session.close()
+            self.__loading("Exporting...")
+            self.__executor.submit(
+                self.__export,
+                file.name,
+                callback=lambda _: self.__loading(None),
+                errback=self.__failed,
+            )
+
+    def __export(self, path: str) -> None:
+        """Export data to file, runs in background."""
+        Exporter(self._db_handler).export(path)
+
+    def __bt_export_changes(self) -> None:
+        """On Export changes Event."""
+        directory = askdirectory(
+            parent=self, title="Delta export directory", initialdir=Env().home
+        )
+        self.focus()
+        if directory:
+            self.__loading("Exporting...")
+            self.__executor.submit(
+                self.__export_changes,
+                directory,
+                callback=lambda _: self.__loading(None),
+                errback=self.__failed,
+            )
+
+    def __export_changes(self, directory: str) -> None:
+        """Export changes since the previous export, runs in background."""
+        DeltaExporter(self._db_handler).export(directory)
 
     def __bt_import(self) -> None:
         """On Import Event."""
         file = askopenfile(
             parent=self,
             defaultextension=".wrk",
-            filetypes=[("WorkClock export file", "*.wrk")],
+            filetypes=[
+                ("WorkClock export file", "*.wrk"),
+                ("WorkClock changes manifest", DeltaFormat.MANIFEST),
+            ],
             initialdir=Env().home,
         )
         self.focus()
         if file is not None:
             file.close()
-            tmp: List[TWorkTime] = []
-            with open(file.name, "rb") as in_file:
-                tmp = pickle.load(in_file)
-            if tmp:
-                # import procedure
-                session: Optional[Session] = self._db_handler.session
-                if session is not None:
-                    for item in tmp:
-                        row = (
-                            session.query(TWorkTime)
-                            .filter(
-                                TWorkTime.start == item.start,
-                                TWorkTime.duration == item.duration,
-                                TWorkTime.notes == item.notes,
-                            )
-                            .first()
-                        )
-                        if not row:
-                            data = TWorkTime()
-                            data.start = item.start
-                            data.duration = item.duration
-                            data.notes = item.notes
-                            session.add(data)
-                            session.commit()
-                    session.close()
-                    self.__tree_reload()
+            self.__loading("Importing...")
+            if os.path.basename(file.name) == DeltaFormat.MANIFEST:
+                self.__executor.submit(
+                    self.__import_changes,
+                    os.path.dirname(file.name),
+                    callback=self.__changes_imported,
+                    errback=self.__failed,
+                )
+                return
+            self.__executor.submit(
+                self.__import,
+                file.name,
+                callback=self.__imported,
+                errback=self.__failed,
+            )
+
+    def __import(self, path: str) -> ImportResult:
+        """Import data from file, runs in background."""
+        return Importer(self._db_handler).import_file(path)
+
+    def __imported(self, result: ImportResult) -> None:
+        """Import finished handler."""
+        self.__tree_reload()
+        messagebox.showinfo(
+            title="Import",
+            message=f"Inserted: {result.inserted}\n"
+            f"Duplicates: {result.duplicates}\n"
+            f"Rejected: {result.rejected}",
+            parent=self,
+        )
+
+    def __import_changes(self, directory: str) -> DeltaImport:
+        """Apply delta export directory, runs in background."""
+        return DeltaImporter(self._db_handler).apply(directory)
+
+    def __changes_imported(self, result: DeltaImport) -> None:
+        """Delta import finished handler."""
+        self.__tree_reload()
+        messagebox.showinfo(
+            title="Import",
+            message=f"Deltas: {result.deltas}\n"
+            f"Inserted: {result.inserted}\n"
+            f"Deleted: {result.deleted}\n"
+            f"Skipped: {result.skipped}",
+            parent=self,
+        )
 
     def __on_closing(self) -> None:
         """On Closing Event."""
         self._set_data(key=Keys.W_CLOSED, value=True)
+        self.__executor.shutdown()
         self.destroy()
 
     def __bt_switch(self) -> None:
@@ -445,10 +555,8 @@ class ReportDialog(TkBase, BDbHandler, tk.Toplevel):
         dialog.wait_window()
         if dialog.dialog_return == True:
             if dialog.dialog_data:
-                # add record
+                # add record and reload data
                 self.__add_record(dialog.dialog_data)
-                # reload data
-                self.__tree_reload()
         dialog.destroy()
 
     def __bt_save(self) -> None:
@@ -463,13 +571,26 @@ class ReportDialog(TkBase, BDbHandler, tk.Toplevel):
         )
         self.focus()
         if file is not None:
-            tree: ttk.Treeview = self._get_data(key=Keys.D_REPORT)  # type: ignore
-            for child in tree.get_children():
-                list_data: List = tree.item(child)["values"]  # type: ignore
-                start = list_data[0]
-                duration = list_data[1]
-                notes = list_data[2]
+            # the tree holds only a window of rows, so read them from database
+            report = ReportData(
+                self._db_handler, previous=self._get_data(key=Keys.SWITCH_FLAG)  # type: ignore
+            )
+            self.__loading("Saving...")
+            self.__executor.submit(
+                self.__save,
+                report,
+                file,
+                callback=lambda _: self.__loading(None),
+                errback=self.__failed,
+            )
+
+    @staticmethod
+    def __save(report: ReportData, file: Any) -> None:
+        """Write report to text file, runs in background."""
+        try:
+            for start, duration, notes in report.rows():
                 file.write(f"{start}\t{duration}\t{notes}\n")
+        finally:
             file.close()
 
     def __add_record(self, arg: Tuple) -> None:
@@ -480,106 +601,45 @@ class ReportDialog(TkBase, BDbHandler, tk.Toplevel):
         rec_minute: float = arg[3]
         rec_note: str = arg[4]
 
-        rec = TWorkTime()
-        rec.start = int(
+        start: int = int(
             datetime(
                 year=rec_date.year, month=rec_date.month, day=rec_date.day
             ).timestamp()
         )
         multi: Literal[-1, 1] = -1 if rec_opr == "-" else 1
-        rec.duration = int(multi * (rec_hour * 3600 + rec_minute * 60))
-        rec.notes = rec_note.strip("\n")
-        session: Optional[Session] = self._db_handler.session
-        if session:
-            session.add(rec)
-            session.commit()
-            session.close()
-
-    def __get_data(self):  # -> tuple[Any, ...]:
-        """Gets data for reports."""
-        session: Optional[Session] = self._db_handler.session
-
-        if session is None:
-            return tuple()
-
-        # cleanup garbage
-        dataset = (
-            session.query(TWorkTime)
-            .filter(and_(TWorkTime.duration <= 120, TWorkTime.duration >= -120))
-            .all()
-        )
-        for item in dataset:
-            session.delete(item)
-        if dataset:
-            session.commit()
-
-        # getting report
-        date_sum = 0
-        out = list()
-        tmp: datetime = DateTime.now()
-        if self._get_data(key=Keys.SWITCH_FLAG):
-            # reset initial time to previous month
-            tmp2 = datetime(year=tmp.year, month=tmp.month, day=1)
-            tmp = DateTime.datetime_from_timestamp(tmp2.timestamp() - 1)
-        # beginning of the month timestamp
-        beginning_month: int = int(
-            datetime(year=tmp.year, month=tmp.month, day=1).timestamp()
-        )
-        row = (
-            session.query(func.sum(TWorkTime.duration))
-            .filter(TWorkTime.start < beginning_month)
-            .order_by(TWorkTime.start)
-            .first()
-        )
-        if row and row[0] is not None:
-            date_sum += row[0]
-            out.append(
-                (
-                    DateTime.datetime_from_timestamp(beginning_month),
-                    self.__format_time(
-                        DateTime.elapsed_time_from_seconds(date_sum).total_seconds()
-                    ),
-                    "Balance of the previous month",
-                )
-            )
-
-        # getting data for the current month
-        dataset: List[TWorkTime] = (
-            session.query(TWorkTime)
-            .filter(TWorkTime.start > beginning_month)
-            .order_by(TWorkTime.start)
-            .all()
-        )
-        for item in dataset:
-            item_date: datetime = DateTime.datetime_from_timestamp(item.start)
-            item_dur: timedelta = DateTime.elapsed_time_from_seconds(abs(item.duration))
-            opr: Literal["-", ""] = "-" if item.duration < 0 else ""
-            date_sum += item.duration
-            out.append((item_date, f"{opr}{item_dur}", item.notes))
-
-        if dataset:
-            out.append(
-                (
-                    DateTime.datetime_from_timestamp(Timestamp.now()),
-                    self.__format_time(
-                        DateTime.elapsed_time_from_seconds(date_sum).total_seconds()
-                    ),
-                    "Current Balance",
-                )
-            )
+        duration: int = int(multi * (rec_hour * 3600 + rec_minute * 60))
+        self.__executor.watch(
+            self._db_handler.writer.submit(
+                self.__insert_record, start, duration, rec_note.strip("\n")
+            ),
+            callback=lambda added: self.__record_added(added, rec_date.year),
+            errback=self.__failed,
+        )
 
-        session.close()
-        return tuple(out)
-
-    def __format_time(self, total_seconds: float) -> str:
-        """Returns formatted time string."""
-        hours: float
-        reminder: float
-        minutes: float
-        seconds: float
-        hours, reminder = divmod(total_seconds, 3600)
-        minutes, seconds = divmod(reminder, 60)
-        return f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}"
+    @staticmethod
+    def __insert_record(
+        session: Session, start: int, duration: int, notes: str
+    ) -> bool:
+        """Insert record, writer job, returns False for archived years."""
+        if start < Rollup.boundary(session):
+            return False
+        # Core insert, ids of rows routed to partitions are not returned
+        session.execute(
+            insert(TWorkTime).values(start=start, duration=duration, notes=notes)
+        )
+        Rollup.refresh(session, start)
+        return True
+
+    def __record_added(self, added: bool, year: int) -> None:
+        """Record added handler."""
+        if added:
+            self.__tree_reload()
+            return
+        messagebox.showerror(
+            title="Add record",
+            message=f"The year {year} is archived and can not be changed.",
+            parent=self,
+        )
 
     @property
     def is_closed(self) -> bool:
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+  report_cache.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:38:33
+
+  Purpose: LRU cache of report pages with write driven invalidation.
+
+  Every write path refreshes rollups with the earliest timestamp it has
+  touched, Rollup marks the session with it, and the cache drops only
+  the entries that a write at that time can change, after the session
+  commits. A report ending before the written timestamp is never
+  affected: its rows, opening and closing balances lie before it.
+  Open ended reports always show the current balance, so they are
+  dropped on every write. Writes made by other processes, like the
+  CLI or a sync server, are not seen by the commit listener: every
+  lookup compares PRAGMA data_version of a private connection with the
+  value seen before and drops all pages of the database when it moved.
+  Commits of this process move it as well, the listener takes the new
+  value after the selective invalidation.
+"""
+
+import sqlite3
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from libs.database import Database
+from libs.rollup import Rollup
+
+
+class _Store(object):
+    """Cached pages of one database."""
+
+    __slots__ = ("entries", "rows", "generation", "path", "probe", "version")
+
+    def __init__(self, path: str) -> None:
+        """Constructor."""
+        # key -> (end, rows)
+        self.entries: "OrderedDict[Hashable, Tuple[Optional[int], List[Any]]]" = (
+            OrderedDict()
+        )
+        self.rows: int = 0
+        self.generation: int = 0
+        self.path: str = path
+        # private connection, data_version is counted per connection
+        self.probe: Optional[sqlite3.Connection] = None
+        self.version: Optional[int] = None
+
+    def data_version(self) -> Optional[int]:
+        """Returns data_version of the main database, None if unknown."""
+        try:
+            if self.probe is None:
+                if not self.path or self.path == ":memory:":
+                    return None
+                self.probe = sqlite3.connect(self.path, check_same_thread=False)
+            return self.probe.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            self.close()
+            return None
+
+    def close(self) -> None:
+        """Close the private connection."""
+        if self.probe is not None:
+            self.probe.close()
+            self.probe = None
+        self.version = None
+
+    def drop(self) -> None:
+        """Drop all pages."""
+        self.generation += 1
+        self.entries.clear()
+        self.rows = 0
+
+    def check(self) -> None:
+        """Drop all pages if another connection committed since last check."""
+        version: Optional[int] = self.data_version()
+        if version != self.version:
+            if self.version is not None:
+                self.drop()
+            self.version = version
+
+    def seen(self) -> None:
+        """Take the data_version moved by a commit of this process."""
+        if self.version is not None:
+            self.version = self.data_version()
+
+
+class ReportCache(object):
+    """Process wide report pages cache."""
+
+    # memory cap, number of cached rows per database
+    MAX_ROWS: int = 50000
+
+    __lock: Lock = Lock()
+    __stores: Dict[str, _Store] = {}
+
+    @classmethod
+    def __store(cls, dbh: Database) -> _Store:
+        """Returns store of the database, attaches commit listener once."""
+        store: Optional[_Store] = cls.__stores.get(dbh.path)
+        if store is None:
+            store = cls.__stores[dbh.path] = _Store(dbh.path)
+            if dbh.session_factory is not None:
+                event.listen(dbh.session_factory, "after_commit", cls.__on_commit)
+        return store
+
+    @classmethod
+    def generation(cls, dbh: Database) -> int:
+        """Returns write generation, taken before a page is queried."""
+        with cls.__lock:
+            store: _Store = cls.__store(dbh)
+            store.check()
+            return store.generation
+
+    @classmethod
+    def get(cls, dbh: Database, key: Hashable) -> Optional[List[Any]]:
+        """Returns cached page or None."""
+        with cls.__lock:
+            store: _Store = cls.__store(dbh)
+            store.check()
+            entry = store.entries.get(key)
+            if entry is None:
+                return None
+            store.entries.move_to_end(key)
+            return list(entry[1])
+
+    @classmethod
+    def put(
+        cls,
+        dbh: Database,
+        key: Hashable,
+        end: Optional[int],
+        rows: List[Any],
+        generation: int,
+    ) -> None:
+        """Store page queried in the 'generation', unless a write came since.
+
+        ### Arguments:
+        * dbh: Database - database handler,
+        * key: Hashable - page key,
+        * end: Optional[int] - end timestamp of the report, None if open ended,
+        * rows: List - page rows,
+        * generation: int - value of generation() taken before the query.
+        """
+        with cls.__lock:
+            store: _Store = cls.__store(dbh)
+            if generation != store.generation or len(rows) > cls.MAX_ROWS:
+                return
+            old = store.entries.pop(key, None)
+            if old is not None:
+                store.rows -= len(old[1])
+            store.entries[key] = (end, list(rows))
+            store.rows += len(rows)
+            while store.rows > cls.MAX_ROWS:
+                _, (_, evicted) = store.entries.popitem(last=False)
+                store.rows -= len(evicted)
+
+    @classmethod
+    def invalidate(cls, path: str, since: int) -> None:
+        """Drop pages changed by a write of this process at 'since' timestamp."""
+        with cls.__lock:
+            store: Optional[_Store] = cls.__stores.get(path)
+            if store is None:
+                return
+            store.generation += 1
+            for key, (end, rows) in list(store.entries.items()):
+                if end is None or since < end:
+                    del store.entries[key]
+                    store.rows -= len(rows)
+            store.seen()
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop all cached pages, the database files may have been replaced."""
+        with cls.__lock:
+            for store in cls.__stores.values():
+                store.drop()
+                store.close()
+
+    @classmethod
+    def __on_commit(cls, session: Session) -> None:
+        """Session event, invalidates pages touched by the transaction."""
+        since: Optional[int] = Rollup.pop_dirty(session)
+        path: str = session.get_bind().url.database or ""
+        if since is not None:
+            cls.invalidate(path, since)
+            return
+        # commits not touching the records, like heartbeats, keep the pages
+        with cls.__lock:
+            store: Optional[_Store] = cls.__stores.get(path)
+            if store is not None:
+                store.seen()
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+  report_data.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:23:20
+
+  Purpose: Report data source, free of any GUI dependencies.
+
+  Report rows are returned in keyset paginated pages ordered by
+  (start, id), so a view never has to load the whole range at once.
+  The synthetic 'Balance of the previous month' and 'Current Balance'
+  rows get sentinel keys placed before and after all database rows.
+  Pages are read with Core select() into plain tuples, no ORM instances
+  are built, and elapsed time strings are cached, as durations repeat.
+  Rows of archived years come from the archive files, see libs.archive.
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.orm import Session
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.datetool import DateTime, Timestamp
+
+from libs.archive import Archive
+from libs.base import BDbHandler
+from libs.database import Database, TWorkTime
+from libs.instrument import Instrument
+from libs.report_cache import ReportCache
+from libs.rollup import Rollup
+
+
+class ReportLine(NamedTuple):
+    """Formatted report line."""
+
+    date: datetime
+    elapsed: str
+    notes: Optional[str]
+
+
+# ((start, id), ReportLine)
+ReportKey = Tuple[int, int]
+ReportRow = Tuple[ReportKey, ReportLine]
+
+
+@lru_cache(maxsize=8192)
+def _elapsed(duration: int) -> str:
+    """Returns signed elapsed time string of duration in seconds."""
+    out: str = str(timedelta(seconds=abs(duration)))
+    return f"-{out}" if duration < 0 else out
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    BEGINNING: str = "_beginning_"
+    END: str = "_end_"
+    PREVIOUS: str = "_previous_"
+
+
+class ReportData(BDbHandler):
+    """Report data source class."""
+
+    # sentinel key for the closing balance row
+    TAIL: ReportKey = (2**62, 0)
+
+    def __init__(
+        self,
+        dbh: Database,
+        previous: bool = False,
+        now: Optional[datetime] = None,
+        single: bool = False,
+    ) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * dbh: Database - database handler,
+        * previous: bool - report starts at the beginning of previous month,
+        * now: Optional[datetime] - reference time, default: current time,
+        * single: bool - report ends with the end of its first month.
+        """
+        self._db_handler = dbh
+        self._set_data(key=_Keys.PREVIOUS, value=previous, set_default_type=bool)
+
+        tmp: datetime = now or DateTime.now()
+        if previous:
+            # reset initial time to previous month
+            tmp2 = datetime(year=tmp.year, month=tmp.month, day=1)
+            tmp = DateTime.datetime_from_timestamp(tmp2.timestamp() - 1)
+        # beginning of the month timestamp
+        self._set_data(
+            key=_Keys.BEGINNING,
+            value=int(datetime(year=tmp.year, month=tmp.month, day=1).timestamp()),
+            set_default_type=int,
+        )
+        end: Optional[int] = None
+        if single:
+            # beginning of the next month
+            year, month = divmod(tmp.year * 12 + tmp.month, 12)
+            end = int(datetime(year=year, month=month + 1, day=1).timestamp())
+        self._set_data(key=_Keys.END, value=end, set_default_type=Optional[int])
+
+    @property
+    def beginning(self) -> int:
+        """Returns timestamp of the beginning of the report."""
+        return self._get_data(key=_Keys.BEGINNING)  # type: ignore
+
+    @property
+    def end(self) -> Optional[int]:
+        """Returns timestamp of the end of the report, None if open ended."""
+        return self._get_data(key=_Keys.END)
+
+    @property
+    def head(self) -> ReportKey:
+        """Returns sentinel key for the opening balance row."""
+        return (self.beginning - 1, 0)
+
+    @staticmethod
+    def format_time(total_seconds: float) -> str:
+        """Returns formatted time string."""
+        hours: float
+        reminder: float
+        minutes: float
+        seconds: float
+        hours, reminder = divmod(total_seconds, 3600)
+        minutes, seconds = divmod(reminder, 60)
+        return f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}"
+
+    def __opening(self, session: Session) -> Optional[ReportRow]:
+        """Returns 'Balance of the previous month' row."""
+        balance: Optional[int] = Rollup.balance_before(
+            session, Rollup.month_key(self.beginning)
+        )
+        if balance is None:
+            return None
+        return (
+            self.head,
+            ReportLine(
+                DateTime.datetime_from_timestamp(self.beginning),
+                self.format_time(
+                    DateTime.elapsed_time_from_seconds(balance).total_seconds()
+                ),
+                "Balance of the previous month",
+            ),
+        )
+
+    def __select(self, *columns: Any, lower: Optional[int] = None) -> Select:
+        """Returns select limited to the report range.
+
+        ### Arguments:
+        * columns - selected columns,
+        * lower: Optional[int] - lower start bound, if later than the beginning.
+        """
+        # SQLite bounds the index range with a single 'start >=' term and
+        # checks the keyset row value per row, so the bound must be the
+        # keyset start itself, or every page rescans the report from its
+        # beginning
+        query = select(*columns).where(
+            TWorkTime.start >= max(self.beginning, lower or self.beginning)
+        )
+        if self.end is not None:
+            query = query.where(TWorkTime.start < self.end)
+        return query
+
+    def __closing(self, session: Session) -> Optional[ReportRow]:
+        """Returns the closing balance row if the report range has any data."""
+        if session.execute(
+            self.__select(TWorkTime.id).limit(1)
+        ).first() is None and not Archive(self._db_handler).exists(
+            session, self.beginning, self.end
+        ):
+            return None
+        if self.end is None:
+            balance: int = Rollup.balance(session) or 0
+            stamp: int = Timestamp.now()
+            title: str = "Current Balance"
+        else:
+            balance = Rollup.balance_before(session, Rollup.month_key(self.end)) or 0
+            stamp = self.end - 1
+            title = "Balance at the end of the month"
+        return (
+            self.TAIL,
+            ReportLine(
+                DateTime.datetime_from_timestamp(stamp),
+                self.format_time(
+                    DateTime.elapsed_time_from_seconds(balance).total_seconds()
+                ),
+                title,
+            ),
+        )
+
+    @staticmethod
+    def __rows(result: Any) -> List[ReportRow]:
+        """Returns formatted report rows of (start, id, duration, notes) tuples."""
+        fromtimestamp = datetime.fromtimestamp
+        return [
+            ((start, ident), ReportLine(fromtimestamp(start), _elapsed(duration), notes))
+            for start, ident, duration, notes in result
+        ]
+
+    @Instrument.timed("report.page")
+    def page(
+        self, after: Optional[ReportKey] = None, limit: int = 200, backward: bool = False
+    ) -> List[ReportRow]:
+        """Returns up to 'limit' report rows next to the 'after' key.
+
+        ### Arguments:
+        * after: Optional[ReportKey] - keyset position, None means the edge
+          of the report: the beginning, or the end if 'backward' is set,
+        * limit: int - page size,
+        * backward: bool - fetch rows preceding the 'after' key.
+
+        ### Returns:
+        List of report rows in ascending order.
+        """
+        key = (self.beginning, self.end, after, limit, backward)
+        out: Optional[List[ReportRow]] = ReportCache.get(self._db_handler, key)
+        if out is None:
+            generation: int = ReportCache.generation(self._db_handler)
+            out = self.__page(after, limit, backward)
+            ReportCache.put(self._db_handler, key, self.end, out, generation)
+        return out
+
+    def __fetch(
+        self,
+        session: Session,
+        after: Optional[ReportKey],
+        limit: int,
+        backward: bool,
+    ) -> List[ReportRow]:
+        """Returns up to 'limit' rows next to the 'after' key, archive included.
+
+        Archived rows precede all live rows, so both sources are simply
+        concatenated. Rows are in descending order if 'backward' is set.
+        """
+        boundary: int = Rollup.boundary(session)
+        archived: bool = self.beginning < boundary
+        live: bool = self.end is None or self.end > boundary
+        archive_end: int = boundary if self.end is None else min(self.end, boundary)
+        # plain Core execution, the ORM loading layer is skipped
+        key = tuple_(TWorkTime.start, TWorkTime.id)
+        columns = (TWorkTime.start, TWorkTime.id, TWorkTime.duration, TWorkTime.notes)
+        out: List[Any] = []
+        if not backward:
+            if archived and (after is None or after[0] < boundary):
+                out = Archive(self._db_handler).page(
+                    session, self.beginning, archive_end, after, limit
+                )
+            if live and len(out) < limit:
+                query: Select = self.__select(
+                    *columns, lower=None if after is None else after[0]
+                )
+                if after is not None:
+                    query = query.where(key > tuple_(*after))
+                out.extend(
+                    session.connection().execute(
+                        query.order_by(TWorkTime.start, TWorkTime.id).limit(
+                            limit - len(out)
+                        )
+                    )
+                )
+        else:
+            if live:
+                query = self.__select(*columns)
+                if after is not None:
+                    query = query.where(key < tuple_(*after))
+                out.extend(
+                    session.connection().execute(
+                        query.order_by(
+                            TWorkTime.start.desc(), TWorkTime.id.desc()
+                        ).limit(limit)
+                    )
+                )
+            if archived and len(out) < limit:
+                out.extend(
+                    Archive(self._db_handler).page(
+                        session,
+                        self.beginning,
+                        archive_end,
+                        after,
+                        limit - len(out),
+                        backward=True,
+                    )
+                )
+        return self.__rows(out)
+
+    @Instrument.timed("report.query")
+    def __page(
+        self, after: Optional[ReportKey], limit: int, backward: bool
+    ) -> List[ReportRow]:
+        """Query report rows, see page()."""
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return []
+        out: List[ReportRow] = []
+        if not backward:
+            if after is None or after < self.head:
+                opening: Optional[ReportRow] = self.__opening(session)
+                if opening:
+                    out.append(opening)
+                after = None
+            elif after >= self.TAIL:
+                session.close()
+                return out
+            dataset: List[ReportRow] = self.__fetch(session, after, limit, False)
+            out.extend(dataset)
+            if len(dataset) < limit:
+                closing: Optional[ReportRow] = self.__closing(session)
+                if closing:
+                    out.append(closing)
+        else:
+            if after is None or after > self.TAIL:
+                closing = self.__closing(session)
+                if closing:
+                    out.append(closing)
+                after = None
+            elif after <= self.head:
+                session.close()
+                return out
+            elif after == self.TAIL:
+                after = None
+            dataset = self.__fetch(session, after, limit, True)
+            out.extend(dataset)
+            if len(dataset) < limit:
+                opening = self.__opening(session)
+                if opening:
+                    out.append(opening)
+            out.reverse()
+        session.close()
+        return out
+
+    def rows(self, limit: int = 1000) -> Iterator[Tuple[Any, ...]]:
+        """Iterates over all report rows, page by page."""
+        after: Optional[ReportKey] = None
+        while True:
+            # streamed past the cache, it would only evict visited pages
+            dataset: List[ReportRow] = self.__page(after, limit, False)
+            for key, values in dataset:
+                yield values
+            if not dataset or dataset[-1][0] == self.TAIL:
+                break
+            after = dataset[-1][0]
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+  rollup.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:21:34
+
+  Purpose: Materialized monthly totals and running balances.
+
+  The month_balance table holds one row per local time month (YYYYMM)
+  with the sum of durations for that month and the running balance
+  up to and including that month. Every write to the worktime table
+  has to call Rollup.refresh with the smallest touched start timestamp
+  before the commit. Rows of archived years are kept, their entries
+  are no longer in the worktime table and must not be written again.
+"""
+
+from datetime import datetime
+from inspect import currentframe
+from typing import Optional, Union
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from jsktoolbox.datetool import DateTime
+from jsktoolbox.raisetool import Raise
+
+
+class Rollup(object):
+    """Monthly balance rollups helper class."""
+
+    # session.info key of the earliest timestamp touched by the transaction
+    DIRTY: str = "rollup_dirty"
+
+    @classmethod
+    def mark_dirty(cls, session: Session, since: Union[int, float]) -> None:
+        """Remember the earliest timestamp written in the transaction."""
+        current: Optional[int] = session.info.get(cls.DIRTY)
+        session.info[cls.DIRTY] = (
+            int(since) if current is None else min(current, int(since))
+        )
+
+    @classmethod
+    def pop_dirty(cls, session: Session) -> Optional[int]:
+        """Returns and forgets the earliest timestamp written, None if clean."""
+        return session.info.pop(cls.DIRTY, None)
+
+    @classmethod
+    def month_key(cls, timestamp: Union[int, float]) -> int:
+        """Returns YYYYMM month key for timestamp in local time."""
+        tmp: datetime = DateTime.datetime_from_timestamp(timestamp)
+        return tmp.year * 100 + tmp.month
+
+    @classmethod
+    def month_start(cls, month_key: int) -> int:
+        """Returns timestamp of the beginning of the month."""
+        year, month = divmod(month_key, 100)
+        return int(datetime(year=year, month=month, day=1).timestamp())
+
+    @classmethod
+    def boundary(cls, session: Session) -> int:
+        """Returns timestamp of the end of archived years, 0 without archive."""
+        row = session.execute(text("SELECT MAX(year) FROM archive_year")).first()
+        if row is None or row[0] is None:
+            return 0
+        return cls.month_start((row[0] + 1) * 100 + 1)
+
+    @classmethod
+    def refresh(cls, session: Session, since: Union[int, float]) -> None:
+        """Recompute rollups from the month containing 'since' timestamp.
+
+        Only the rows of the touched months and later are scanned,
+        the opening balance is taken from the previous rollup row.
+
+        ### Raises:
+        * ValueError: if 'since' lies in an archived year.
+        """
+        if since < cls.boundary(session):
+            raise Raise.error(
+                "Archived years are read-only.",
+                ValueError,
+                cls.__qualname__,
+                currentframe(),
+            )
+        session.flush()
+        cls.mark_dirty(session, since)
+        key: int = cls.month_key(since)
+        base: int = cls.balance_before(session, key) or 0
+        session.execute(
+            text("DELETE FROM month_balance WHERE month >= :month"), {"month": key}
+        )
+        session.execute(
+            text(
+                "INSERT INTO month_balance (month, total, balance, entries) "
+                "SELECT month, total, :base + SUM(total) OVER (ORDER BY month), "
+                "entries FROM (SELECT CAST(strftime('%Y%m', start, 'unixepoch', "
+                "'localtime') AS INTEGER) AS month, SUM(duration) AS total, "
+                "COUNT(*) AS entries FROM worktime WHERE start >= :start "
+                "GROUP BY month)"
+            ),
+            {"base": base, "start": cls.month_start(key)},
+        )
+
+    @classmethod
+    def rebuild(cls, session: Session) -> None:
+        """Recompute all rollups of not archived years from scratch."""
+        session.flush()
+        cls.mark_dirty(session, 0)
+        boundary: int = cls.boundary(session)
+        session.execute(
+            text("DELETE FROM month_balance WHERE month >= :month"),
+            {"month": cls.month_key(boundary) if boundary else 0},
+        )
+        row = session.execute(text("SELECT MIN(start) FROM worktime")).first()
+        if row and row[0] is not None:
+            cls.refresh(session, row[0])
+
+    @classmethod
+    def balance(cls, session: Session) -> Optional[int]:
+        """Returns the latest running balance, None if there is no data."""
+        row = session.execute(
+            text("SELECT balance FROM month_balance ORDER BY month DESC LIMIT 1")
+        ).first()
+        if row is None:
+            return None
+        return row[0]
+
+    @classmethod
+    def balance_before(cls, session: Session, month_key: int) -> Optional[int]:
+        """Returns running balance at the end of the last month before month_key.
+
+        None means there is no data before that month.
+        """
+        row = session.execute(
+            text(
+                "SELECT balance FROM month_balance WHERE month < :month "
+                "ORDER BY month DESC LIMIT 1"
+            ),
+            {"month": month_key},
+        ).first()
+        if row is None:
+            return None
+        return row[0]
+
+
+# #[EOF]#######################################################################
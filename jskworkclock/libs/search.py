@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+  search.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:07:35
+
+  Purpose: Full-text search over session notes.
+
+  Non empty notes are copied to the notes_index table with the start
+  and duration of their entry, and indexed by the notes_fts FTS5 table
+  using notes_index as its external content. Triggers of the worktime
+  table, or of the partitions view, keep both in sync. The copy does not
+  depend on where the entry is stored, so notes of archived years stay
+  searchable. Results are ranked by bm25 and read in pages.
+"""
+
+import re
+
+from itertools import chain
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from libs.archive import Archive
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.instrument import Instrument
+
+
+class SearchHit(NamedTuple):
+    """One found entry."""
+
+    start: int
+    duration: int
+    # notes fragment with matches in square brackets
+    snippet: str
+    rank: float
+
+
+class NotesSearch(BDbHandler):
+    """Notes full-text search class."""
+
+    # snippet length in tokens
+    SNIPPET_TOKENS: int = 16
+
+    def __init__(self, dbh: Database) -> None:
+        """Constructor."""
+        self._db_handler = dbh
+
+    @staticmethod
+    def query(phrase: str) -> str:
+        """Returns FTS5 query of the words of the phrase.
+
+        Every word is quoted, so punctuation of ticket numbers or paths
+        is not taken for the query syntax. All words have to match,
+        the last one as a prefix.
+        """
+        words: List[str] = [
+            '"' + word.replace('"', '""') + '"'
+            for word in re.split(r"\s+", phrase.strip())
+            if word
+        ]
+        if words:
+            words[-1] += "*"
+        return " ".join(words)
+
+    def count(self, phrase: str) -> int:
+        """Returns number of entries matching the phrase."""
+        query: str = self.query(phrase)
+        session: Optional[Session] = self._db_handler.session
+        if not query or session is None:
+            return 0
+        try:
+            return session.execute(
+                text("SELECT COUNT(*) FROM notes_fts WHERE notes_fts MATCH :query"),
+                {"query": query},
+            ).scalar()  # type: ignore
+        finally:
+            session.close()
+
+    @Instrument.timed("search.page")
+    def page(self, phrase: str, page: int = 0, size: int = 50) -> List[SearchHit]:
+        """Returns one page of entries matching the phrase, best first.
+
+        ### Arguments:
+        * phrase: str - searched words,
+        * page: int - page number, from 0,
+        * size: int - page size.
+        """
+        query: str = self.query(phrase)
+        session: Optional[Session] = self._db_handler.session
+        if not query or session is None:
+            return []
+        try:
+            return [
+                SearchHit(*row)
+                for row in session.connection().execute(
+                    text(
+                        "SELECT i.start, i.duration, snippet(notes_fts, 0, '[', ']', "
+                        "'...', :tokens), notes_fts.rank FROM notes_fts "
+                        "JOIN notes_index i ON i.id = notes_fts.rowid "
+                        "WHERE notes_fts MATCH :query "
+                        "ORDER BY notes_fts.rank, i.start DESC "
+                        "LIMIT :size OFFSET :offset"
+                    ),
+                    {
+                        "tokens": self.SNIPPET_TOKENS,
+                        "query": query,
+                        "size": size,
+                        "offset": page * size,
+                    },
+                )
+            ]
+        finally:
+            session.close()
+
+    def verify(self) -> bool:
+        """Compare the index with the stored notes, rebuild on mismatch.
+
+        Only the numbers of entries are compared. Notes of the years
+        archived before the index existed are added here.
+
+        Returns True if the index was valid.
+        """
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return True
+        try:
+            expected: int = session.execute(
+                text("SELECT COUNT(*) FROM worktime WHERE notes <> ''")
+            ).scalar()  # type: ignore
+            expected += sum(
+                1 for row in Archive(self._db_handler).rows(session) if row[3]
+            )
+            indexed: int = session.execute(
+                text("SELECT COUNT(*) FROM notes_index")
+            ).scalar()  # type: ignore
+        finally:
+            session.close()
+        if indexed == expected:
+            return True
+        self._db_handler.writer.submit(self.__rebuild).result()
+        return False
+
+    @Instrument.timed("search.rebuild")
+    def __rebuild(self, session: Session) -> None:
+        """Rewrite the index from the archive and worktime data, writer job."""
+        session.execute(text("DELETE FROM notes_index"))
+        session.execute(text("INSERT INTO notes_fts (notes_fts) VALUES ('delete-all')"))
+        live = session.execute(
+            text(
+                "SELECT start, id, duration, notes FROM worktime "
+                "WHERE notes <> '' ORDER BY start, id"
+            )
+        ).all()
+        session.connection().exec_driver_sql(
+            "INSERT INTO notes_index (start, duration, notes) VALUES (?, ?, ?)",
+            [  # type: ignore
+                (start, duration, notes)
+                for start, _, duration, notes in chain(
+                    Archive(self._db_handler).rows(session), live
+                )
+                if notes
+            ],
+        )
+
+
+# #[EOF]#######################################################################
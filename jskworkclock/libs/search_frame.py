@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+  search_frame.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:07:35
+
+  Purpose: Notes search tab of the report window.
+"""
+
+import tkinter as tk
+
+from tkinter import ttk
+from typing import List, Tuple
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.datetool import DateTime
+from jsktoolbox.tktool.base import TkBase
+from jsktoolbox.tktool.layout import Pack
+
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.executor import TkExecutor
+from libs.search import NotesSearch, SearchHit
+from libs.summary import Summary
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    EXECUTOR: str = "_executor_"
+    PAGE: str = "_page_"
+    PHRASE: str = "_phrase_"
+    STATUS: str = "_status_"
+    TOTAL: str = "_total_"
+    TREE: str = "_tree_"
+
+
+class SearchFrame(TkBase, BDbHandler, ttk.Frame):
+    """Notes search frame."""
+
+    PAGE_SIZE: int = 50
+
+    def __init__(self, master, dbh: Database, executor: TkExecutor, **args) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * master - parent widget,
+        * dbh: Database - database handler,
+        * executor: TkExecutor - background queries executor.
+        """
+        super().__init__(master, **args)
+        self._db_handler = dbh
+        self._set_data(key=_Keys.EXECUTOR, value=executor, set_default_type=TkExecutor)
+        self._set_data(
+            key=_Keys.PHRASE,
+            value=tk.StringVar(self, value=""),
+            set_default_type=tk.StringVar,
+        )
+        self._set_data(key=_Keys.PAGE, value=0, set_default_type=int)
+        self._set_data(key=_Keys.TOTAL, value=0, set_default_type=int)
+
+        self.__init_ui()
+
+    def __init_ui(self) -> None:
+        """Create user interface."""
+        # search frame
+        search_frame = ttk.Frame(self)
+        search_frame.pack(side=Pack.Side.TOP, fill=Pack.Fill.X, padx=5, pady=5)
+        ttk.Label(search_frame, text="Notes:").pack(side=Pack.Side.LEFT, padx=2)
+        entry = ttk.Entry(
+            search_frame, textvariable=self._get_data(key=_Keys.PHRASE), width=30
+        )
+        entry.pack(side=Pack.Side.LEFT, padx=2)
+        entry.bind("<Return>", lambda _: self.__bt_search())
+        ttk.Button(search_frame, text="Search", command=self.__bt_search).pack(
+            side=Pack.Side.LEFT, padx=2
+        )
+        ttk.Button(search_frame, text="<", width=3, command=self.__bt_previous).pack(
+            side=Pack.Side.LEFT, padx=2
+        )
+        ttk.Button(search_frame, text=">", width=3, command=self.__bt_next).pack(
+            side=Pack.Side.LEFT, padx=2
+        )
+        status = ttk.Label(search_frame, text="")
+        status.pack(side=Pack.Side.LEFT, padx=2)
+        self._set_data(key=_Keys.STATUS, value=status, set_default_type=ttk.Label)
+
+        # data frame
+        data_frame = ttk.Frame(self)
+        data_frame.pack(side=Pack.Side.TOP, fill=Pack.Fill.BOTH, expand=True)
+        tree = ttk.Treeview(
+            data_frame, columns=("date", "time", "notes"), show="headings"
+        )
+        tree.heading("date", text="Date")
+        tree.column("date", minwidth=0, width=150, stretch=False)
+        tree.heading("time", text="Time")
+        tree.column("time", minwidth=0, width=80, stretch=False)
+        tree.heading("notes", text="Notes")
+        tree.column("notes", minwidth=0, width=400, stretch=True)
+        tree.pack(side=Pack.Side.LEFT, fill=Pack.Fill.BOTH, expand=True)
+        self._set_data(key=_Keys.TREE, value=tree, set_default_type=ttk.Treeview)
+        scrollbar = ttk.Scrollbar(data_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=Pack.Side.RIGHT, fill=Pack.Fill.Y)
+
+    def __status(self, text: str) -> None:
+        """Show status text."""
+        self._get_data(key=_Keys.STATUS)["text"] = text  # type: ignore
+
+    def __query(self, page: int) -> None:
+        """Search for the page of results in background."""
+        phrase: str = self._get_data(key=_Keys.PHRASE).get()  # type: ignore
+        self._set_data(key=_Keys.PAGE, value=page)
+        self.__status("Searching...")
+        self._get_data(key=_Keys.EXECUTOR).submit(  # type: ignore
+            self.__search,
+            NotesSearch(self._db_handler),
+            phrase,
+            page,
+            self.PAGE_SIZE,
+            callback=self.__loaded,
+            errback=self.__failed,
+            group=self._w,
+        )
+
+    @staticmethod
+    def __search(
+        search: NotesSearch, phrase: str, page: int, size: int
+    ) -> Tuple[int, List[SearchHit]]:
+        """Returns (total, hits), runs in background."""
+        return search.count(phrase), search.page(phrase, page, size)
+
+    def __bt_search(self) -> None:
+        """Button SEARCH handler."""
+        self.__query(0)
+
+    def __bt_previous(self) -> None:
+        """Button PREVIOUS handler."""
+        page: int = self._get_data(key=_Keys.PAGE)  # type: ignore
+        if page > 0:
+            self.__query(page - 1)
+
+    def __bt_next(self) -> None:
+        """Button NEXT handler."""
+        page: int = self._get_data(key=_Keys.PAGE)  # type: ignore
+        if (page + 1) * self.PAGE_SIZE < self._get_data(key=_Keys.TOTAL):  # type: ignore
+            self.__query(page + 1)
+
+    def __loaded(self, result: Tuple[int, List[SearchHit]]) -> None:
+        """Search results handler."""
+        total, hits = result
+        self._set_data(key=_Keys.TOTAL, value=total)
+        tree: ttk.Treeview = self._get_data(key=_Keys.TREE)  # type: ignore
+        children = tree.get_children()
+        if children:
+            tree.delete(*children)
+        for hit in hits:
+            tree.insert(
+                "",
+                tk.END,
+                values=(
+                    DateTime.datetime_from_timestamp(hit.start),
+                    Summary.format_time(hit.duration),
+                    " ".join(hit.snippet.split()),
+                ),
+            )
+        page: int = self._get_data(key=_Keys.PAGE)  # type: ignore
+        pages: int = max(1, -(-total // self.PAGE_SIZE))
+        self.__status(f"{total} found, page {page + 1}/{pages}")
+
+    def __failed(self, ex: BaseException) -> None:
+        """Background job failure handler."""
+        self.__status("")
+        self.report_callback_exception(type(ex), ex, ex.__traceback__)
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+  stats.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:45:35
+
+  Purpose: Vectorized overtime statistics.
+
+  The start and duration columns are read through the DBAPI cursor
+  straight into NumPy arrays, without ORM objects, archived years are
+  taken from the mapped archive columns, and every statistic is
+  computed with array operations. Local time offsets are taken once
+  per day and per entry only on days with a DST change, so local days
+  are exact at a cost that does not grow with the number of rows.
+  NumPy is an optional dependency, it is imported on first use.
+"""
+
+from inspect import currentframe
+from itertools import chain
+from time import localtime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from sqlalchemy.orm import Session
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.raisetool import Raise
+
+from libs.archive import Archive
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.instrument import Instrument
+
+
+def _numpy() -> Any:
+    """Returns numpy module, it is an optional dependency."""
+    try:
+        import numpy  # type: ignore
+
+        return numpy
+    except ImportError:
+        raise Raise.error(
+            "Statistics require 'numpy' package.",
+            ImportError,
+            "stats",
+            currentframe(),
+        )
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    BEGIN: str = "_begin_"
+    DATA: str = "_data_"
+    END: str = "_end_"
+
+
+class WeekdayStat(NamedTuple):
+    """Statistics of one weekday, Monday is 0."""
+
+    weekday: int
+    entries: int
+    total: int
+    mean_entry: float
+    mean_day: float
+
+
+class HistogramBin(NamedTuple):
+    """Session length histogram bin in seconds, high is excluded."""
+
+    low: float
+    high: float
+    count: int
+
+
+class StatsSummary(NamedTuple):
+    """All statistics of the range at once."""
+
+    entries: int
+    weekdays: List[WeekdayStat]
+    histogram: List[HistogramBin]
+    percentiles: Dict[float, float]
+    # window in days -> sum of the last 'window' days up to the last entry
+    rolling: Dict[int, int]
+    # seconds per day
+    trend: float
+
+
+class Stats(BDbHandler):
+    """Overtime statistics class."""
+
+    WEEKDAYS: Tuple[str, ...] = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+    # rolling balance windows in days
+    WINDOWS: Tuple[int, ...] = (30, 90)
+
+    # default session length histogram edges in minutes
+    EDGES: Tuple[float, ...] = (0, 15, 30, 60, 120, 240, 480, float("inf"))
+
+    def __init__(
+        self,
+        dbh: Database,
+        begin: Optional[Union[int, float]] = None,
+        end: Optional[Union[int, float]] = None,
+    ) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * dbh: Database - database handler,
+        * begin: Optional[int] - range beginning timestamp, None for all data,
+        * end: Optional[int] - range end timestamp, excluded, None for all data.
+        """
+        self._db_handler = dbh
+        self._set_data(
+            key=_Keys.BEGIN,
+            value=None if begin is None else int(begin),
+            set_default_type=Optional[int],
+        )
+        self._set_data(
+            key=_Keys.END,
+            value=None if end is None else int(end),
+            set_default_type=Optional[int],
+        )
+        # (starts, durations, local days) arrays, loaded on first use
+        self._set_data(key=_Keys.DATA, value=None, set_default_type=Optional[tuple])
+
+    @Instrument.timed("stats.load")
+    def __load(self) -> Tuple[Any, Any, Any]:
+        """Returns (starts, durations, local days since epoch) arrays."""
+        data: Optional[Tuple[Any, Any, Any]] = self._get_data(key=_Keys.DATA)
+        if data is not None:
+            return data
+        np = _numpy()
+        sql: str = "SELECT start, duration FROM worktime"
+        where: List[str] = []
+        params: List[int] = []
+        if self._get_data(key=_Keys.BEGIN) is not None:
+            where.append("start >= ?")
+            params.append(self._get_data(key=_Keys.BEGIN))  # type: ignore
+        if self._get_data(key=_Keys.END) is not None:
+            where.append("start < ?")
+            params.append(self._get_data(key=_Keys.END))  # type: ignore
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY start"
+
+        if self._db_handler.engine is None:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        conn = self._db_handler.engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            flat = np.fromiter(chain.from_iterable(cursor), dtype=np.int64)
+            cursor.close()
+        finally:
+            conn.close()
+        pairs = flat.reshape(-1, 2)
+
+        # archived years precede the live rows, their columns are mapped
+        session: Optional[Session] = self._db_handler.session
+        archived: List[Tuple[Any, Any]] = []
+        if session is not None:
+            archived = Archive(self._db_handler).columns(
+                session,
+                self._get_data(key=_Keys.BEGIN),
+                self._get_data(key=_Keys.END),
+            )
+            session.close()
+        starts = np.concatenate(
+            [np.frombuffer(column, dtype=np.int64) for column, _ in archived]
+            + [pairs[:, 0]]
+        )
+        durations = np.concatenate(
+            [np.frombuffer(column, dtype=np.int64) for _, column in archived]
+            + [pairs[:, 1]]
+        )
+
+        # local time offsets per UTC day, per entry only on DST change days
+        utc_days, inverse = np.unique(starts // 86400, return_inverse=True)
+        first = self.__offsets(np, utc_days * 86400)
+        last = self.__offsets(np, utc_days * 86400 + 86399)
+        offsets = first[inverse]
+        changed = (first != last)[inverse]
+        if changed.any():
+            offsets[changed] = self.__offsets(np, starts[changed])
+        days = (starts + offsets) // 86400
+        data = (starts, durations, days)
+        self._set_data(key=_Keys.DATA, value=data)
+        return data
+
+    @staticmethod
+    def __offsets(np: Any, timestamps: Any) -> Any:
+        """Returns local time UTC offsets of timestamps array."""
+        return np.fromiter(
+            (localtime(int(stamp)).tm_gmtoff for stamp in timestamps),
+            dtype=np.int64,
+            count=len(timestamps),
+        )
+
+    @property
+    def count(self) -> int:
+        """Returns number of entries."""
+        return len(self.__load()[0])
+
+    def weekdays(self) -> List[WeekdayStat]:
+        """Returns per weekday statistics in local time.
+
+        mean_day is the total divided by the number of such weekdays
+        between the first and the last entry, days without entries included.
+        """
+        np = _numpy()
+        _, durations, days = self.__load()
+        if not len(days):
+            return []
+        weekday = (days + 3) % 7  # 1970-01-01 was Thursday
+        entries = np.bincount(weekday, minlength=7)
+        totals = np.bincount(weekday, weights=durations, minlength=7)
+        calendar = np.bincount(
+            (np.arange(days[0], days[-1] + 1) + 3) % 7, minlength=7
+        )
+        return [
+            WeekdayStat(
+                day,
+                int(entries[day]),
+                int(totals[day]),
+                float(totals[day] / entries[day]) if entries[day] else 0.0,
+                float(totals[day] / calendar[day]) if calendar[day] else 0.0,
+            )
+            for day in range(7)
+        ]
+
+    def histogram(
+        self, edges: Optional[Sequence[float]] = None
+    ) -> List[HistogramBin]:
+        """Returns histogram of positive session lengths.
+
+        ### Arguments:
+        * edges: Optional[Sequence[float]] - bin edges in minutes.
+        """
+        np = _numpy()
+        durations = self.__load()[1]
+        bounds = np.asarray(edges or self.EDGES, dtype=np.float64) * 60
+        counts, _ = np.histogram(durations[durations > 0], bins=bounds)
+        return [
+            HistogramBin(float(bounds[i]), float(bounds[i + 1]), int(counts[i]))
+            for i in range(len(counts))
+        ]
+
+    def percentiles(
+        self, quantiles: Sequence[float] = (50, 75, 90, 95, 99)
+    ) -> Dict[float, float]:
+        """Returns percentiles of positive session lengths in seconds."""
+        np = _numpy()
+        durations = self.__load()[1]
+        sessions = durations[durations > 0]
+        if not len(sessions):
+            return {}
+        values = np.percentile(sessions, quantiles)
+        return {float(q): float(v) for q, v in zip(quantiles, values)}
+
+    def daily(self) -> Tuple[Any, Any]:
+        """Returns (local days since epoch, daily totals) without gaps."""
+        np = _numpy()
+        _, durations, days = self.__load()
+        if not len(days):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        totals = np.bincount(days - days[0], weights=durations).astype(np.int64)
+        return np.arange(days[0], days[-1] + 1), totals
+
+    def rolling(self, window: int) -> Tuple[Any, Any]:
+        """Returns (local days, sums of the last 'window' days) arrays."""
+        np = _numpy()
+        days, totals = self.daily()
+        cumulative = np.concatenate(([0], np.cumsum(totals)))
+        start = np.maximum(np.arange(1, len(totals) + 1) - window, 0)
+        return days, cumulative[1:] - cumulative[start]
+
+    def trend(self) -> float:
+        """Returns linear trend of daily totals in seconds per day."""
+        np = _numpy()
+        days, totals = self.daily()
+        if len(days) < 2:
+            return 0.0
+        slope, _ = np.polyfit(days - days[0], totals, 1)
+        return float(slope)
+
+    @Instrument.timed("stats.summary")
+    def summary(self) -> StatsSummary:
+        """Returns all statistics of the range."""
+        rolling: Dict[int, int] = {}
+        for window in self.WINDOWS:
+            sums = self.rolling(window)[1]
+            rolling[window] = int(sums[-1]) if len(sums) else 0
+        return StatsSummary(
+            self.count,
+            self.weekdays(),
+            self.histogram(),
+            self.percentiles(),
+            rolling,
+            self.trend(),
+        )
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+  stats_frame.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:45:35
+
+  Purpose: Statistics tab of the report window.
+"""
+
+import tkinter as tk
+
+from datetime import datetime, timedelta
+from tkinter import ttk
+from typing import Optional
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.tktool.base import TkBase
+from jsktoolbox.tktool.layout import Pack
+
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.executor import TkExecutor
+from libs.stats import Stats, StatsSummary
+from libs.summary import Summary
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    BEGIN: str = "_begin_"
+    END: str = "_end_"
+    EXECUTOR: str = "_executor_"
+    STATUS: str = "_status_"
+    TREE: str = "_tree_"
+
+
+class StatsFrame(TkBase, BDbHandler, ttk.Frame):
+    """Overtime statistics frame."""
+
+    DATE_FORMAT: str = "%Y-%m-%d"
+
+    def __init__(self, master, dbh: Database, executor: TkExecutor, **args) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * master - parent widget,
+        * dbh: Database - database handler,
+        * executor: TkExecutor - background queries executor.
+        """
+        super().__init__(master, **args)
+        self._db_handler = dbh
+        self._set_data(key=_Keys.EXECUTOR, value=executor, set_default_type=TkExecutor)
+
+        # empty range fields mean all records
+        self._set_data(
+            key=_Keys.BEGIN,
+            value=tk.StringVar(self, value=""),
+            set_default_type=tk.StringVar,
+        )
+        self._set_data(
+            key=_Keys.END,
+            value=tk.StringVar(self, value=""),
+            set_default_type=tk.StringVar,
+        )
+
+        self.__init_ui()
+
+    def __init_ui(self) -> None:
+        """Create user interface."""
+        # range frame
+        range_frame = ttk.Frame(self)
+        range_frame.pack(side=Pack.Side.TOP, fill=Pack.Fill.X, padx=5, pady=5)
+        ttk.Label(range_frame, text="From:").pack(side=Pack.Side.LEFT, padx=2)
+        ttk.Entry(
+            range_frame, textvariable=self._get_data(key=_Keys.BEGIN), width=12
+        ).pack(side=Pack.Side.LEFT, padx=2)
+        ttk.Label(range_frame, text="To:").pack(side=Pack.Side.LEFT, padx=2)
+        ttk.Entry(
+            range_frame, textvariable=self._get_data(key=_Keys.END), width=12
+        ).pack(side=Pack.Side.LEFT, padx=2)
+        ttk.Button(range_frame, text="Compute", command=self.__bt_compute).pack(
+            side=Pack.Side.LEFT, padx=2
+        )
+        status = ttk.Label(range_frame, text="")
+        status.pack(side=Pack.Side.LEFT, padx=2)
+        self._set_data(key=_Keys.STATUS, value=status, set_default_type=ttk.Label)
+
+        # data frame
+        data_frame = ttk.Frame(self)
+        data_frame.pack(side=Pack.Side.TOP, fill=Pack.Fill.BOTH, expand=True)
+        tree = ttk.Treeview(data_frame, columns=("value",), show="tree headings")
+        tree.heading("#0", text="Statistic")
+        tree.column("#0", minwidth=0, width=260, stretch=True)
+        tree.heading("value", text="Value")
+        tree.column("value", minwidth=0, width=260, stretch=True)
+        tree.pack(side=Pack.Side.LEFT, fill=Pack.Fill.BOTH, expand=True)
+        self._set_data(key=_Keys.TREE, value=tree, set_default_type=ttk.Treeview)
+        scrollbar = ttk.Scrollbar(data_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=Pack.Side.RIGHT, fill=Pack.Fill.Y)
+
+    def __status(self, text: str) -> None:
+        """Show status text."""
+        self._get_data(key=_Keys.STATUS)["text"] = text  # type: ignore
+
+    def __date(self, key: str, shift: int = 0) -> Optional[float]:
+        """Returns timestamp of the date field or None if it is empty."""
+        value: str = self._get_data(key=key).get().strip()  # type: ignore
+        if not value:
+            return None
+        return (
+            datetime.strptime(value, self.DATE_FORMAT) + timedelta(days=shift)
+        ).timestamp()
+
+    def __bt_compute(self) -> None:
+        """Button COMPUTE handler."""
+        try:
+            begin: Optional[float] = self.__date(_Keys.BEGIN)
+            # the 'To' day is included
+            end: Optional[float] = self.__date(_Keys.END, 1)
+        except ValueError:
+            self.__status("Dates must be given as YYYY-MM-DD")
+            return
+        self.__status("Computing...")
+        self._get_data(key=_Keys.EXECUTOR).submit(  # type: ignore
+            Stats(self._db_handler, begin, end).summary,
+            callback=self.__loaded,
+            errback=self.__failed,
+            group=self._w,
+        )
+
+    def __loaded(self, stats: StatsSummary) -> None:
+        """Statistics handler."""
+        tree: ttk.Treeview = self._get_data(key=_Keys.TREE)  # type: ignore
+        children = tree.get_children()
+        if children:
+            tree.delete(*children)
+        fmt = Summary.format_time
+
+        tree.insert("", tk.END, text="Entries", values=(stats.entries,))
+        node = tree.insert("", tk.END, text="Average per weekday", open=True)
+        for row in stats.weekdays:
+            tree.insert(
+                node,
+                tk.END,
+                text=Stats.WEEKDAYS[row.weekday],
+                values=(
+                    f"{fmt(int(row.mean_day))} per day, "
+                    f"{fmt(int(row.mean_entry))} per entry",
+                ),
+            )
+        node = tree.insert("", tk.END, text="Session length", open=True)
+        for item in stats.histogram:
+            high: str = "" if item.high == float("inf") else fmt(int(item.high))
+            tree.insert(
+                node,
+                tk.END,
+                text=f"{fmt(int(item.low))} - {high}",
+                values=(item.count,),
+            )
+        node = tree.insert("", tk.END, text="Session length percentiles", open=True)
+        for quantile, value in stats.percentiles.items():
+            tree.insert(node, tk.END, text=f"p{quantile:g}", values=(fmt(int(value)),))
+        node = tree.insert("", tk.END, text="Rolling balance", open=True)
+        for window, value in stats.rolling.items():
+            tree.insert(
+                node, tk.END, text=f"last {window} days", values=(fmt(value),)
+            )
+        tree.insert(
+            "",
+            tk.END,
+            text="Trend",
+            values=(f"{fmt(int(stats.trend * 30))} per 30 days",),
+        )
+        self.__status("")
+
+    def __failed(self, ex: BaseException) -> None:
+        """Background job failure handler."""
+        if isinstance(ex, ImportError):
+            self.__status(str(ex))
+            return
+        self.__status("")
+        self.report_callback_exception(type(ex), ex, ex.__traceback__)
+
+
+# #[EOF]#######################################################################
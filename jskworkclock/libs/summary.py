@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+  summary.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:40:33
+
+  Purpose: Date range summaries aggregated in SQL.
+
+  Entries of any [begin, end) range are grouped per day, week, month or
+  year by a single GROUP BY over the (start, duration) covering index,
+  with running balances computed by a window function. Monthly and
+  yearly summaries take whole months from the month_balance rollups and
+  scan worktime only for the partial months at the range edges. Periods
+  of archived years are summed from the daily totals of the archive.
+"""
+
+from datetime import datetime
+from inspect import currentframe
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.raisetool import Raise
+
+from libs.archive import Archive
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.instrument import Instrument
+from libs.rollup import Rollup
+
+
+class Granularity(object, metaclass=ReadOnlyClass):
+    """Summary granularity constants."""
+
+    DAY: str = "day"
+    WEEK: str = "week"
+    MONTH: str = "month"
+    YEAR: str = "year"
+
+
+class SummaryRow(NamedTuple):
+    """Summary of one period."""
+
+    period: str
+    entries: int
+    total: int
+    balance: int
+
+
+class Summary(BDbHandler):
+    """Date range summary class."""
+
+    # strftime formats of period labels, weeks start on Monday
+    FORMATS: Dict[str, str] = {
+        Granularity.DAY: "%Y-%m-%d",
+        Granularity.WEEK: "%Y-W%W",
+        Granularity.MONTH: "%Y-%m",
+        Granularity.YEAR: "%Y",
+    }
+
+    # the same labels built from YYYYMM month keys of the rollups
+    MONTH_LABELS: Dict[str, str] = {
+        Granularity.MONTH: "printf('%04d-%02d', month / 100, month % 100)",
+        Granularity.YEAR: "printf('%04d', month / 100)",
+    }
+
+    def __init__(self, dbh: Database) -> None:
+        """Constructor."""
+        self._db_handler = dbh
+
+    @staticmethod
+    def format_time(seconds: int) -> str:
+        """Returns signed H:MM:SS string."""
+        hours, reminder = divmod(abs(seconds), 3600)
+        minutes, secs = divmod(reminder, 60)
+        return f"{'-' if seconds < 0 else ''}{hours}:{minutes:02}:{secs:02}"
+
+    @staticmethod
+    def __next_month(timestamp: int) -> int:
+        """Returns the first month boundary not earlier than timestamp."""
+        key: int = Rollup.month_key(timestamp)
+        start: int = Rollup.month_start(key)
+        if start == timestamp:
+            return start
+        year, month = divmod(key, 100)
+        year, month = divmod(year * 12 + month, 12)
+        return int(datetime(year=year, month=month + 1, day=1).timestamp())
+
+    @Instrument.timed("summary.report")
+    def report(
+        self,
+        begin: Union[int, float],
+        end: Union[int, float],
+        granularity: str = Granularity.MONTH,
+    ) -> List[SummaryRow]:
+        """Returns per period summaries of the [begin, end) range.
+
+        ### Arguments:
+        * begin: int - range beginning timestamp,
+        * end: int - range end timestamp, excluded,
+        * granularity: str - one of Granularity constants.
+
+        ### Returns:
+        List of SummaryRow in chronological order, balance includes
+        everything recorded before the range.
+        """
+        if granularity not in self.FORMATS:
+            raise Raise.error(
+                f"Unknown granularity: '{granularity}'",
+                ValueError,
+                self._c_name,
+                currentframe(),
+            )
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return []
+        begin, end = int(begin), int(end)
+        boundary: int = Rollup.boundary(session)
+        if begin < boundary:
+            # archived periods first, their labels never continue after
+            # the year boundary
+            balance: int = self.__balance_at(session, begin)
+            out: List[SummaryRow] = []
+            for period, entries, total in Archive(self._db_handler).periods(
+                session, begin, min(end, boundary), self.FORMATS[granularity]
+            ):
+                balance += total
+                out.append(SummaryRow(period, entries, total, balance))
+            session.close()
+            if end > boundary:
+                out.extend(self.report(boundary, end, granularity))
+            return out
+        params: Dict[str, Union[int, str]] = {
+            "begin": begin,
+            "end": end,
+            "format": self.FORMATS[granularity],
+            "base": self.__balance_at(session, begin),
+        }
+
+        if granularity in self.MONTH_LABELS:
+            # whole months from rollups, edges from worktime
+            first: int = self.__next_month(begin)
+            last: int = Rollup.month_start(Rollup.month_key(end))
+            if first >= last:
+                first = last = end
+            params.update(
+                {
+                    "first": first,
+                    "last": last,
+                    "first_key": Rollup.month_key(first),
+                    "last_key": Rollup.month_key(last),
+                }
+            )
+            source: str = (
+                f"SELECT {self.MONTH_LABELS[granularity]} AS period, "
+                "entries, total FROM month_balance "
+                "WHERE month >= :first_key AND month < :last_key AND :first < :last "
+                "UNION ALL "
+                "SELECT strftime(:format, start, 'unixepoch', 'localtime'), "
+                "1, duration FROM worktime "
+                "WHERE start >= :begin AND start < :first "
+                "UNION ALL "
+                "SELECT strftime(:format, start, 'unixepoch', 'localtime'), "
+                "1, duration FROM worktime "
+                "WHERE start >= :last AND start < :end AND :first < :last"
+            )
+        else:
+            source = (
+                "SELECT strftime(:format, start, 'unixepoch', 'localtime') "
+                "AS period, 1 AS entries, duration AS total FROM worktime "
+                "WHERE start >= :begin AND start < :end"
+            )
+
+        rows = session.execute(
+            text(
+                "SELECT period, SUM(entries), SUM(total), "
+                ":base + SUM(SUM(total)) OVER (ORDER BY period) "
+                f"FROM ({source}) GROUP BY period ORDER BY period"
+            ),
+            params,
+        ).all()
+        session.close()
+        return [SummaryRow(*row) for row in rows]
+
+    def __balance_at(self, session: Session, timestamp: int) -> int:
+        """Returns balance of everything recorded before timestamp."""
+        key: int = Rollup.month_key(timestamp)
+        base: int = Rollup.balance_before(session, key) or 0
+        if timestamp < Rollup.boundary(session):
+            return base + Archive(self._db_handler).total(
+                session, Rollup.month_start(key), timestamp
+            )
+        row = session.execute(
+            text(
+                "SELECT COALESCE(SUM(duration), 0) FROM worktime "
+                "WHERE start >= :start AND start < :timestamp"
+            ),
+            {"start": Rollup.month_start(key), "timestamp": timestamp},
+        ).first()
+        return base + (row[0] if row else 0)
+
+
+# #[EOF]#######################################################################
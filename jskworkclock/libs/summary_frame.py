@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+  summary_frame.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:40:33
+
+  Purpose: Summary tab of the report window.
+"""
+
+import tkinter as tk
+
+from datetime import datetime, timedelta
+from tkinter import ttk
+from typing import List, Tuple
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.tktool.base import TkBase
+from jsktoolbox.tktool.layout import Pack
+
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.executor import TkExecutor
+from libs.summary import Granularity, Summary, SummaryRow
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    BEGIN: str = "_begin_"
+    END: str = "_end_"
+    EXECUTOR: str = "_executor_"
+    GRANULARITY: str = "_granularity_"
+    STATUS: str = "_status_"
+    TREE: str = "_tree_"
+
+
+class SummaryFrame(TkBase, BDbHandler, ttk.Frame):
+    """Date range summary frame."""
+
+    DATE_FORMAT: str = "%Y-%m-%d"
+
+    def __init__(self, master, dbh: Database, executor: TkExecutor, **args) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * master - parent widget,
+        * dbh: Database - database handler,
+        * executor: TkExecutor - background queries executor.
+        """
+        super().__init__(master, **args)
+        self._db_handler = dbh
+        self._set_data(key=_Keys.EXECUTOR, value=executor, set_default_type=TkExecutor)
+
+        today: datetime = datetime.now()
+        self._set_data(
+            key=_Keys.BEGIN,
+            value=tk.StringVar(self, value=f"{today.year}-01-01"),
+            set_default_type=tk.StringVar,
+        )
+        self._set_data(
+            key=_Keys.END,
+            value=tk.StringVar(self, value=today.strftime(self.DATE_FORMAT)),
+            set_default_type=tk.StringVar,
+        )
+        self._set_data(
+            key=_Keys.GRANULARITY,
+            value=tk.StringVar(self, value=Granularity.MONTH),
+            set_default_type=tk.StringVar,
+        )
+
+        self.__init_ui()
+
+    def __init_ui(self) -> None:
+        """Create user interface."""
+        # range frame
+        range_frame = ttk.Frame(self)
+        range_frame.pack(side=Pack.Side.TOP, fill=Pack.Fill.X, padx=5, pady=5)
+        ttk.Label(range_frame, text="From:").pack(side=Pack.Side.LEFT, padx=2)
+        ttk.Entry(
+            range_frame, textvariable=self._get_data(key=_Keys.BEGIN), width=12
+        ).pack(side=Pack.Side.LEFT, padx=2)
+        ttk.Label(range_frame, text="To:").pack(side=Pack.Side.LEFT, padx=2)
+        ttk.Entry(
+            range_frame, textvariable=self._get_data(key=_Keys.END), width=12
+        ).pack(side=Pack.Side.LEFT, padx=2)
+        ttk.Label(range_frame, text="Per:").pack(side=Pack.Side.LEFT, padx=2)
+        ttk.Combobox(
+            range_frame,
+            textvariable=self._get_data(key=_Keys.GRANULARITY),
+            values=list(Summary.FORMATS),
+            state="readonly",
+            width=8,
+        ).pack(side=Pack.Side.LEFT, padx=2)
+        ttk.Button(range_frame, text="Show", command=self.__bt_show).pack(
+            side=Pack.Side.LEFT, padx=2
+        )
+        status = ttk.Label(range_frame, text="")
+        status.pack(side=Pack.Side.LEFT, padx=2)
+        self._set_data(key=_Keys.STATUS, value=status, set_default_type=ttk.Label)
+
+        # data frame
+        data_frame = ttk.Frame(self)
+        data_frame.pack(side=Pack.Side.TOP, fill=Pack.Fill.BOTH, expand=True)
+        columns: Tuple[str, ...] = ("period", "entries", "total", "balance")
+        tree = ttk.Treeview(data_frame, columns=columns, show="headings")
+        for column, title, width in (
+            ("period", "Period", 160),
+            ("entries", "Entries", 100),
+            ("total", "Total", 160),
+            ("balance", "Balance", 160),
+        ):
+            tree.heading(column, text=title)
+            tree.column(column, minwidth=0, width=width, stretch=column == "period")
+        tree.pack(side=Pack.Side.LEFT, fill=Pack.Fill.BOTH, expand=True)
+        self._set_data(key=_Keys.TREE, value=tree, set_default_type=ttk.Treeview)
+        scrollbar = ttk.Scrollbar(data_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=Pack.Side.RIGHT, fill=Pack.Fill.Y)
+
+    def __status(self, text: str) -> None:
+        """Show status text."""
+        self._get_data(key=_Keys.STATUS)["text"] = text  # type: ignore
+
+    def __bt_show(self) -> None:
+        """Button SHOW handler."""
+        try:
+            begin: datetime = datetime.strptime(
+                self._get_data(key=_Keys.BEGIN).get(), self.DATE_FORMAT  # type: ignore
+            )
+            # the 'To' day is included
+            end: datetime = datetime.strptime(
+                self._get_data(key=_Keys.END).get(), self.DATE_FORMAT  # type: ignore
+            ) + timedelta(days=1)
+        except ValueError:
+            self.__status("Dates must be given as YYYY-MM-DD")
+            return
+        self.__status("Loading...")
+        self._get_data(key=_Keys.EXECUTOR).submit(  # type: ignore
+            Summary(self._db_handler).report,
+            begin.timestamp(),
+            end.timestamp(),
+            self._get_data(key=_Keys.GRANULARITY).get(),  # type: ignore
+            callback=self.__loaded,
+            errback=self.__failed,
+            group=self._w,
+        )
+
+    def __loaded(self, rows: List[SummaryRow]) -> None:
+        """Summary rows handler."""
+        tree: ttk.Treeview = self._get_data(key=_Keys.TREE)  # type: ignore
+        children = tree.get_children()
+        if children:
+            tree.delete(*children)
+        for row in rows:
+            tree.insert(
+                "",
+                tk.END,
+                values=(
+                    row.period,
+                    row.entries,
+                    Summary.format_time(row.total),
+                    Summary.format_time(row.balance),
+                ),
+            )
+        self.__status(f"{len(rows)} periods")
+
+    def __failed(self, ex: BaseException) -> None:
+        """Background job failure handler."""
+        self.__status("")
+        self.report_callback_exception(type(ex), ex, ex.__traceback__)
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+"""
+  sync.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:27:29
+
+  Purpose: Two-way synchronization of worktime with a sync server.
+
+  Every database keeps working offline and logs its changes to the
+  change_log table, see libs.delta. A sync cycle pushes the local
+  changes not sent yet to the server in batches, then pulls the
+  changes the server received from the other devices. Both sides
+  remember the change_log ranges written by changes received from
+  a peer and never send them back to it.
+
+  Conflict rules:
+  * records are never modified, a record is identified by a UUID
+    derived from its content, so the same record added on two devices
+    is one record,
+  * adding a present record and removing a missing one are no-ops,
+  * an addition and a removal of the same record are applied in the
+    order the server received them, the later one wins,
+  * changes of years archived on the receiving side are rejected.
+"""
+
+import json
+import logging
+
+from inspect import currentframe
+from threading import Event, Thread
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from uuid import UUID, uuid5
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.datetool import Timestamp
+from jsktoolbox.raisetool import Raise
+
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.delta import (
+    ChangeCounts,
+    DeltaExporter,
+    DeltaFormat,
+    DeltaImporter,
+    DeltaRecord,
+)
+from libs.instrument import Instrument
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    INTERVAL: str = "_interval_"
+    SERVER: str = "_server_"
+    STOP: str = "_stop_"
+    THREAD: str = "_thread_"
+    WAKE: str = "_wake_"
+
+
+class SyncFormat(object, metaclass=ReadOnlyClass):
+    """Sync protocol constants."""
+
+    NAME: str = "jskworkclock-sync"
+    VERSION: int = 1
+    # namespace of the record UUIDs, never change it
+    NAMESPACE: UUID = UUID("5f0e8d2a-93c4-4b7e-a1d6-7c2b9e40f318")
+
+    INFO: str = "/info"
+    CHANGES: str = "/changes"
+
+    # changes in one request
+    BATCH: int = 500
+    # seconds
+    TIMEOUT: float = 30.0
+
+
+def record_uid(start: int, duration: int, notes: Optional[str]) -> str:
+    """Returns UUID of the record.
+
+    Records are never modified, so the UUID is derived from the content,
+    it is stable without being stored in partitions and archive files.
+    """
+    return str(uuid5(SyncFormat.NAMESPACE, json.dumps([start, duration, notes])))
+
+
+def encode_changes(records: List[DeltaRecord]) -> List[List[Any]]:
+    """Returns [uid, op, start, duration, notes] lists of the changes."""
+    return [
+        [record_uid(start, duration, notes), op, start, duration, notes]
+        for op, start, duration, notes in records
+    ]
+
+
+def decode_changes(items: Any) -> List[DeltaRecord]:
+    """Returns changes of the [uid, op, start, duration, notes] lists.
+
+    ### Raises:
+    * ValueError: if a change is malformed or its UUID does not match.
+    """
+    out: List[DeltaRecord] = []
+    if not isinstance(items, list):
+        raise Raise.error("Changes list expected.", ValueError, "sync", currentframe())
+    for item in items:
+        if (
+            not isinstance(item, list)
+            or len(item) != 5
+            or item[1] not in (DeltaFormat.INSERT, DeltaFormat.DELETE)
+            or type(item[2]) is not int
+            or type(item[3]) is not int
+            or not (item[4] is None or type(item[4]) is str)
+            or item[0] != record_uid(item[2], item[3], item[4])
+        ):
+            raise Raise.error(
+                f"Malformed change: {item!r}", ValueError, "sync", currentframe()
+            )
+        out.append((item[1], item[2], item[3], item[4]))
+    return out
+
+
+class SyncLog(object):
+    """Change log operations shared by the sync client and server."""
+
+    @staticmethod
+    def changes(
+        session: Session, since: int, peer: str, limit: int
+    ) -> Tuple[List[DeltaRecord], int, bool]:
+        """Returns changes after 'since' not received from the peer.
+
+        Returns the changes, the seq to continue from and True if more
+        changes remain.
+        """
+        last: int = DeltaExporter.last_change(session)
+        rows = session.execute(
+            text(
+                "SELECT seq, op, start, duration, notes FROM change_log c "
+                "WHERE seq > :since AND seq <= :last AND NOT EXISTS ("
+                "SELECT 1 FROM sync_origin o WHERE o.peer = :peer "
+                "AND o.first <= c.seq AND c.seq <= o.last) "
+                "ORDER BY seq LIMIT :limit"
+            ),
+            {"since": since, "last": last, "peer": peer, "limit": limit},
+        ).all()
+        records: List[DeltaRecord] = [tuple(row[1:]) for row in rows]  # type: ignore
+        if len(rows) < limit:
+            return records, last, False
+        return records, rows[-1][0], True
+
+    @staticmethod
+    def complete(session: Session, since: int) -> bool:
+        """Returns True if no change after 'since' was pruned."""
+        last: int = DeltaExporter.last_change(session)
+        return (
+            session.execute(
+                text(
+                    "SELECT COUNT(*) FROM change_log "
+                    "WHERE seq > :since AND seq <= :last"
+                ),
+                {"since": since, "last": last},
+            ).scalar()
+            == last - since
+        )
+
+    @staticmethod
+    def receive(
+        session: Session, records: List[DeltaRecord], peer: str
+    ) -> ChangeCounts:
+        """Apply changes received from the peer, to be called from a writer job."""
+        first: int = DeltaExporter.last_change(session) + 1
+        counts: ChangeCounts = DeltaImporter.apply_changes(session, records)
+        last: int = DeltaExporter.last_change(session)
+        if last >= first:
+            session.execute(
+                text(
+                    "INSERT INTO sync_origin (peer, first, last) "
+                    "VALUES (:peer, :first, :last)"
+                ),
+                {"peer": peer, "first": first, "last": last},
+            )
+        return counts
+
+
+class SyncResult(NamedTuple):
+    """Sync cycle statistics."""
+
+    pushed: int
+    pulled: int
+    inserted: int
+    deleted: int
+    skipped: int
+    rejected: int
+
+
+class SyncClient(BDbHandler):
+    """Sync client class."""
+
+    def __init__(self, dbh: Database, server: str, interval: float = 300) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * dbh: Database - database handler,
+        * server: str - sync server URL,
+        * interval: float - seconds between background cycles.
+        """
+        self._db_handler = dbh
+        self._set_data(key=_Keys.SERVER, value=server.rstrip("/"), set_default_type=str)
+        self._set_data(
+            key=_Keys.INTERVAL, value=float(interval), set_default_type=float
+        )
+        self._set_data(key=_Keys.STOP, value=Event(), set_default_type=Event)
+        self._set_data(key=_Keys.WAKE, value=Event(), set_default_type=Event)
+        self._set_data(key=_Keys.THREAD, value=None, set_default_type=Optional[Thread])
+
+    @property
+    def server(self) -> str:
+        """Returns sync server URL."""
+        return self._get_data(key=_Keys.SERVER)  # type: ignore
+
+    @staticmethod
+    def servers(dbh: Database) -> List[str]:
+        """Returns URLs of the configured sync servers."""
+        session: Optional[Session] = dbh.session
+        if session is None:
+            return []
+        try:
+            return list(
+                session.execute(
+                    text("SELECT server FROM sync_state ORDER BY server")
+                ).scalars()
+            )
+        finally:
+            session.close()
+
+    def register(self) -> None:
+        """Add the server to the configured ones."""
+        self._db_handler.writer.submit(self.__register, self.server).result()
+
+    def forget(self) -> None:
+        """Remove the server from the configured ones."""
+        self._db_handler.writer.submit(self.__forget, self.server).result()
+
+    @staticmethod
+    def __register(session: Session, server: str) -> None:
+        """Add sync_state row, writer job."""
+        session.execute(
+            text("INSERT OR IGNORE INTO sync_state (server) VALUES (:server)"),
+            {"server": server},
+        )
+
+    @staticmethod
+    def __forget(session: Session, server: str) -> None:
+        """Remove sync_state row and the ranges received from it, writer job."""
+        session.execute(
+            text("DELETE FROM sync_state WHERE server=:server"), {"server": server}
+        )
+        session.execute(
+            text("DELETE FROM sync_origin WHERE peer=:server"), {"server": server}
+        )
+
+    def __request(
+        self,
+        path: str,
+        query: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Send request to the server, POST if the body is given."""
+        url: str = self.server + path
+        if query:
+            url += "?" + urlencode(query)
+        request = Request(url)
+        if body is not None:
+            request.data = json.dumps(body).encode("utf-8")
+            request.add_header("Content-Type", "application/json")
+        try:
+            with urlopen(request, timeout=SyncFormat.TIMEOUT) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except HTTPError as ex:
+            try:
+                message: str = json.loads(ex.read().decode("utf-8"))["error"]
+            except Exception:
+                message = str(ex)
+            raise Raise.error(
+                f"Sync server error {ex.code}: {message}",
+                ConnectionError,
+                self._c_name,
+                currentframe(),
+            )
+        except URLError as ex:
+            raise Raise.error(
+                f"Sync server unavailable: {ex.reason}",
+                ConnectionError,
+                self._c_name,
+                currentframe(),
+            )
+
+    @Instrument.timed("sync.run")
+    def sync(self) -> SyncResult:
+        """Push local changes and pull the remote ones, one sync cycle."""
+        info: Dict[str, Any] = self.__request(SyncFormat.INFO)
+        if info.get("format") != SyncFormat.NAME or info.get("version", 0) > (
+            SyncFormat.VERSION
+        ):
+            raise Raise.error(
+                f"Not a WorkClock sync server: '{self.server}'",
+                ConnectionError,
+                self._c_name,
+                currentframe(),
+            )
+        hub: str = info["hub"]
+        self.register()
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return SyncResult(0, 0, 0, 0, 0, 0)
+        try:
+            client: str = DeltaExporter.database_id(session)
+            row = session.execute(
+                text("SELECT hub, pushed, pulled FROM sync_state WHERE server=:server"),
+                {"server": self.server},
+            ).first()
+            known: Optional[str] = row[0] if row is not None else None
+            pushed: int = row[1] if row is not None else 0
+            pulled: int = row[2] if known == hub else 0
+            count: int = 0
+            if known != hub or not SyncLog.complete(session, pushed):
+                # a new server, or the log lost track of the server,
+                # changes later than the seq are pushed twice
+                pushed = DeltaExporter.last_change(session)
+                batch: List[DeltaRecord] = []
+                for record in DeltaExporter.records(session, self._db_handler):
+                    batch.append(record)
+                    if len(batch) == SyncFormat.BATCH:
+                        count += self.__push(client, batch)
+                        batch = []
+                count += self.__push(client, batch)
+            more: bool = True
+            while more:
+                records, pushed, more = SyncLog.changes(
+                    session, pushed, self.server, SyncFormat.BATCH
+                )
+                count += self.__push(client, records)
+                # the next batch is read in a new transaction
+                session.commit()
+        finally:
+            session.close()
+        self._db_handler.writer.submit(
+            self.__pushed, self.server, hub, pushed, pulled
+        ).result()
+        result: SyncResult = SyncResult(count, 0, 0, 0, 0, 0)
+        more = True
+        while more:
+            answer: Dict[str, Any] = self.__request(
+                SyncFormat.CHANGES,
+                query={"client": client, "since": pulled, "limit": SyncFormat.BATCH},
+            )
+            records = decode_changes(answer["changes"])
+            pulled, more = int(answer["seq"]), bool(answer["more"])
+            counts: ChangeCounts = self._db_handler.writer.submit(
+                self.__pulled, records, self.server, pulled
+            ).result()
+            result = result._replace(
+                pulled=result.pulled + len(records),
+                inserted=result.inserted + counts.inserted,
+                deleted=result.deleted + counts.deleted,
+                skipped=result.skipped + counts.skipped,
+                rejected=result.rejected + counts.rejected,
+            )
+        return result
+
+    def __push(self, client: str, records: List[DeltaRecord]) -> int:
+        """Send changes to the server, returns their number."""
+        if records:
+            self.__request(
+                SyncFormat.CHANGES,
+                body={"client": client, "changes": encode_changes(records)},
+            )
+        return len(records)
+
+    @staticmethod
+    def __pushed(
+        session: Session, server: str, hub: str, pushed: int, pulled: int
+    ) -> None:
+        """Remember the pushed changes, writer job."""
+        session.execute(
+            text(
+                "UPDATE sync_state SET hub=:hub, pushed=:pushed, pulled=:pulled, "
+                "updated=:updated WHERE server=:server"
+            ),
+            {
+                "server": server,
+                "hub": hub,
+                "pushed": pushed,
+                "pulled": pulled,
+                "updated": Timestamp.now(),
+            },
+        )
+
+    @staticmethod
+    def __pulled(
+        session: Session, records: List[DeltaRecord], server: str, pulled: int
+    ) -> ChangeCounts:
+        """Apply pulled changes with the mark, writer job."""
+        counts: ChangeCounts = SyncLog.receive(session, records, server)
+        session.execute(
+            text(
+                "UPDATE sync_state SET pulled=:pulled, updated=:updated "
+                "WHERE server=:server"
+            ),
+            {"server": server, "pulled": pulled, "updated": Timestamp.now()},
+        )
+        return counts
+
+    def start(self) -> None:
+        """Start the background sync thread."""
+        if self._get_data(key=_Keys.THREAD) is not None:
+            return
+        thread = Thread(target=self.__run, name="WorkClock sync", daemon=True)
+        self._set_data(key=_Keys.THREAD, value=thread)
+        thread.start()
+
+    def wake(self) -> None:
+        """Run the next background cycle now."""
+        self._get_data(key=_Keys.WAKE).set()  # type: ignore
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background sync thread."""
+        self._get_data(key=_Keys.STOP).set()  # type: ignore
+        self.wake()
+        thread: Optional[Thread] = self._get_data(key=_Keys.THREAD)
+        if thread is not None:
+            thread.join(timeout)
+            self._set_data(key=_Keys.THREAD, value=None)
+
+    def __run(self) -> None:
+        """Background sync loop, the first cycle runs at once."""
+        stop: Event = self._get_data(key=_Keys.STOP)  # type: ignore
+        wake: Event = self._get_data(key=_Keys.WAKE)  # type: ignore
+        while not stop.is_set():
+            try:
+                result: SyncResult = self.sync()
+                logger.info("sync %s: %s", self.server, result)
+            except Exception as ex:
+                # offline, try again in the next cycle
+                logger.warning("sync %s failed: %s", self.server, ex)
+            wake.wait(self._get_data(key=_Keys.INTERVAL))  # type: ignore
+            wake.clear()
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+  sync_server.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:27:29
+
+  Purpose: Sync server, a WorkClock database shared over HTTP.
+
+  The server database is an ordinary WorkClock database, the changes
+  pushed by the clients are applied to it and logged to its change_log,
+  which the clients pull from. The log of a server database is never
+  pruned. The server binds to the loopback interface by default, it
+  has no authentication, so expose it only through a trusted network.
+
+  Protocol, JSON bodies:
+  * GET /info - {"format", "version", "hub"},
+  * GET /changes?client=ID&since=SEQ&limit=N - {"changes", "seq", "more"},
+  * POST /changes {"client", "changes"} - {"inserted", "deleted",
+    "skipped", "rejected"}.
+"""
+
+import json
+import logging
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from inspect import currentframe
+from threading import Thread
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.basetool.data import BData
+from jsktoolbox.raisetool import Raise
+
+from libs.base import BDbHandler
+from libs.database import Database
+from libs.delta import ChangeCounts, DeltaExporter, DeltaRecord
+from libs.sync import SyncFormat, SyncLog, decode_changes, encode_changes
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    HTTPD: str = "_httpd_"
+    HUB: str = "_hub_"
+    THREAD: str = "_thread_"
+
+
+class SyncHub(BDbHandler):
+    """Server side of the sync."""
+
+    # largest request body in bytes
+    MAX_BODY: int = 16 * 1024 * 1024
+
+    def __init__(self, dbh: Database) -> None:
+        """Constructor."""
+        self._db_handler = dbh
+
+    def prepare(self) -> None:
+        """Make the database a server one.
+
+        The log of a database used before lacks the older records, they
+        are logged once as insertions.
+        """
+        self._db_handler.writer.submit(self.__prepare, self._db_handler).result()
+
+    @staticmethod
+    def __prepare(session: Session, dbh: Database) -> None:
+        """Log the present records once, writer job."""
+        if (
+            session.execute(
+                text("SELECT 1 FROM database_info WHERE key='hub'")
+            ).first()
+            is not None
+        ):
+            return
+        batch: List[Dict[str, Any]] = []
+        for op, start, duration, notes in list(DeltaExporter.records(session, dbh)):
+            batch.append(
+                {"op": op, "start": start, "duration": duration, "notes": notes}
+            )
+            if len(batch) == 1000:
+                SyncHub.__log(session, batch)
+                batch = []
+        SyncHub.__log(session, batch)
+        session.execute(
+            text("INSERT INTO database_info (key, value) VALUES ('hub', :seq)"),
+            {"seq": str(DeltaExporter.last_change(session))},
+        )
+
+    @staticmethod
+    def __log(session: Session, batch: List[Dict[str, Any]]) -> None:
+        """Insert change_log rows."""
+        if batch:
+            session.execute(
+                text(
+                    "INSERT INTO change_log (op, start, duration, notes) "
+                    "VALUES (:op, :start, :duration, :notes)"
+                ),
+                batch,
+            )
+
+    def info(self) -> Dict[str, Any]:
+        """Returns server identification."""
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            raise Raise.error(
+                "Database is not available.", OSError, self._c_name, currentframe()
+            )
+        try:
+            hub: str = DeltaExporter.database_id(session)
+        finally:
+            session.close()
+        return {"format": SyncFormat.NAME, "version": SyncFormat.VERSION, "hub": hub}
+
+    def pull(self, client: str, since: int, limit: int) -> Dict[str, Any]:
+        """Returns changes after 'since' not pushed by the client."""
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            raise Raise.error(
+                "Database is not available.", OSError, self._c_name, currentframe()
+            )
+        try:
+            records, seq, more = SyncLog.changes(
+                session, since, client, max(1, min(limit, SyncFormat.BATCH))
+            )
+        finally:
+            session.close()
+        return {"changes": encode_changes(records), "seq": seq, "more": more}
+
+    def push(self, client: str, items: Any) -> Dict[str, Any]:
+        """Apply changes pushed by the client."""
+        records: List[DeltaRecord] = decode_changes(items)
+        counts: ChangeCounts = self._db_handler.writer.submit(
+            SyncLog.receive, records, client
+        ).result()
+        return counts._asdict()
+
+
+class _HttpServer(ThreadingHTTPServer):
+    """HTTP server with the hub."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Any, hub: SyncHub) -> None:
+        """Constructor."""
+        self.hub: SyncHub = hub
+        super().__init__(address, _SyncRequestHandler)
+
+
+class _SyncRequestHandler(BaseHTTPRequestHandler):
+    """Sync protocol request handler."""
+
+    server: _HttpServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Log requests to the module logger."""
+        logger.debug("%s %s", self.address_string(), format % args)
+
+    def __reply(self, code: int, data: Dict[str, Any]) -> None:
+        """Send JSON response."""
+        body: bytes = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def __handle(self, post: bool) -> None:
+        """Dispatch request."""
+        url = urlsplit(self.path)
+        hub: SyncHub = self.server.hub
+        try:
+            if not post and url.path == SyncFormat.INFO:
+                self.__reply(200, hub.info())
+            elif not post and url.path == SyncFormat.CHANGES:
+                query: Dict[str, List[str]] = parse_qs(url.query)
+                self.__reply(
+                    200,
+                    hub.pull(
+                        query["client"][0],
+                        int(query["since"][0]),
+                        int(query.get("limit", [SyncFormat.BATCH])[0]),
+                    ),
+                )
+            elif post and url.path == SyncFormat.CHANGES:
+                size: int = int(self.headers.get("Content-Length", 0))
+                if size > SyncHub.MAX_BODY:
+                    self.__reply(413, {"error": "Request too large."})
+                    return
+                body: Any = json.loads(self.rfile.read(size).decode("utf-8"))
+                self.__reply(200, hub.push(body["client"], body["changes"]))
+            else:
+                self.__reply(404, {"error": f"Unknown path: {url.path}"})
+        except (KeyError, TypeError, ValueError) as ex:
+            self.__reply(400, {"error": f"Bad request: {ex}"})
+        except Exception as ex:
+            logger.warning("sync request %s failed: %s", self.path, ex)
+            self.__reply(500, {"error": str(ex)})
+
+    def do_GET(self) -> None:
+        """GET request."""
+        self.__handle(False)
+
+    def do_POST(self) -> None:
+        """POST request."""
+        self.__handle(True)
+
+
+class SyncServer(BData):
+    """Sync HTTP server class."""
+
+    def __init__(
+        self, dbh: Database, host: str = "127.0.0.1", port: int = 8765
+    ) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * dbh: Database - server database handler,
+        * host: str - address to bind,
+        * port: int - port to bind, 0 binds a free one.
+        """
+        hub = SyncHub(dbh)
+        hub.prepare()
+        self._set_data(key=_Keys.HUB, value=hub, set_default_type=SyncHub)
+        self._set_data(
+            key=_Keys.HTTPD,
+            value=_HttpServer((host, port), hub),
+            set_default_type=_HttpServer,
+        )
+        self._set_data(key=_Keys.THREAD, value=None, set_default_type=Optional[Thread])
+
+    @property
+    def url(self) -> str:
+        """Returns server URL."""
+        httpd: _HttpServer = self._get_data(key=_Keys.HTTPD)  # type: ignore
+        host, port = httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        """Serve requests until stopped."""
+        httpd: _HttpServer = self._get_data(key=_Keys.HTTPD)  # type: ignore
+        try:
+            httpd.serve_forever()
+        finally:
+            httpd.server_close()
+
+    def start(self) -> None:
+        """Serve requests on a background thread."""
+        if self._get_data(key=_Keys.THREAD) is not None:
+            return
+        thread = Thread(target=self.serve_forever, name="WorkClock sync server")
+        thread.daemon = True
+        self._set_data(key=_Keys.THREAD, value=thread)
+        thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop serving."""
+        httpd: _HttpServer = self._get_data(key=_Keys.HTTPD)  # type: ignore
+        thread: Optional[Thread] = self._get_data(key=_Keys.THREAD)
+        if thread is None:
+            httpd.server_close()
+            return
+        # shutdown waits for the serve_forever loop to exit
+        httpd.shutdown()
+        thread.join(timeout)
+        self._set_data(key=_Keys.THREAD, value=None)
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+  transfer.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:25:18
+
+  Purpose: Streaming export and import of worktime data.
+
+  Export file is NDJSON: the first line is a header object, every next
+  line is one record as a [start, duration, notes] array. The file can
+  be compressed with gzip or zstd (requires 'zstandard' package),
+  the reader detects compression by the magic bytes. Old '.wrk' files
+  with pickled TWorkTime objects are still readable. Archived years are
+  exported too, records of archived years are never imported again.
+"""
+
+import gzip
+import io
+import json
+import pickle
+
+from inspect import currentframe
+from concurrent.futures import Future
+from itertools import chain, islice
+from typing import IO, Any, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from jsktoolbox.basetool.data import BData
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.raisetool import Raise
+
+from libs.archive import Archive
+from libs.base import BDbHandler
+from libs.database import Database, TWorkTime
+from libs.instrument import Instrument
+from libs.rollup import Rollup
+from libs.writer import DbWriter
+
+
+# (start, duration, notes)
+ExportRecord = Tuple[int, int, str]
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    BATCH: str = "_batch_"
+    PATH: str = "_path_"
+    REJECTED: str = "_rejected_"
+    VERSION: str = "_version_"
+
+
+class ExportFormat(object, metaclass=ReadOnlyClass):
+    """Export format constants."""
+
+    NAME: str = "jskworkclock-export"
+    VERSION: int = 1
+    COLUMNS: Tuple[str, ...] = ("start", "duration", "notes")
+
+    GZIP: str = "gzip"
+    ZSTD: str = "zstd"
+
+    MAGIC_GZIP: bytes = b"\x1f\x8b"
+    MAGIC_ZSTD: bytes = b"\x28\xb5\x2f\xfd"
+    MAGIC_PICKLE: bytes = b"\x80"
+
+
+def _zstandard() -> Any:
+    """Returns zstandard module, it is an optional dependency."""
+    try:
+        import zstandard  # type: ignore
+
+        return zstandard
+    except ImportError:
+        raise Raise.error(
+            "zstd compression requires 'zstandard' package.",
+            ImportError,
+            "transfer",
+            currentframe(),
+        )
+
+
+def compressed_writer(raw: IO[bytes], compression: Optional[str]) -> IO[bytes]:
+    """Returns stream compressing to the raw file, the raw file if None.
+
+    ### Arguments:
+    * raw: IO[bytes] - binary output file,
+    * compression: Optional[str] - ExportFormat.GZIP, ExportFormat.ZSTD or None.
+    """
+    if compression == ExportFormat.GZIP:
+        return gzip.GzipFile(fileobj=raw, mode="wb")  # type: ignore
+    if compression == ExportFormat.ZSTD:
+        return _zstandard().ZstdCompressor().stream_writer(raw)
+    if compression is not None:
+        raise Raise.error(
+            f"Unknown compression: '{compression}'",
+            ValueError,
+            "transfer",
+            currentframe(),
+        )
+    return raw
+
+
+def compressed_reader(raw: IO[bytes]) -> IO[bytes]:
+    """Returns stream decompressing the raw file, detected by magic bytes."""
+    magic: bytes = raw.read(4)
+    raw.seek(0)
+    if magic.startswith(ExportFormat.MAGIC_GZIP):
+        return gzip.GzipFile(fileobj=raw, mode="rb")  # type: ignore
+    if magic.startswith(ExportFormat.MAGIC_ZSTD):
+        return _zstandard().ZstdDecompressor().stream_reader(raw)
+    return raw
+
+
+class Exporter(BDbHandler):
+    """Streaming exporter class."""
+
+    def __init__(self, dbh: Database) -> None:
+        """Constructor."""
+        self._db_handler = dbh
+
+    @Instrument.timed("transfer.export")
+    def export(
+        self, path: str, compression: Optional[str] = ExportFormat.GZIP
+    ) -> int:
+        """Export all records to file, returns number of exported records.
+
+        ### Arguments:
+        * path: str - output file path,
+        * compression: Optional[str] - ExportFormat.GZIP, ExportFormat.ZSTD or None.
+        """
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return 0
+        count: int = 0
+        with open(path, "wb") as raw:
+            stream: IO[bytes] = compressed_writer(raw, compression)
+            try:
+                out = io.TextIOWrapper(stream, encoding="utf-8", newline="\n")  # type: ignore
+                out.write(
+                    json.dumps(
+                        {
+                            "format": ExportFormat.NAME,
+                            "version": ExportFormat.VERSION,
+                            "columns": list(ExportFormat.COLUMNS),
+                        }
+                    )
+                )
+                out.write("\n")
+                archived: Iterator[Tuple[int, int, str]] = (
+                    (start, duration, notes)
+                    for start, _, duration, notes in Archive(
+                        self._db_handler
+                    ).rows(session)
+                )
+                result = session.execute(
+                    select(TWorkTime.start, TWorkTime.duration, TWorkTime.notes)
+                    .order_by(TWorkTime.start, TWorkTime.id)
+                    .execution_options(yield_per=1000)
+                )
+                for start, duration, notes in chain(archived, result):
+                    out.write(
+                        json.dumps([start, duration, notes or ""], ensure_ascii=False)
+                    )
+                    out.write("\n")
+                    count += 1
+                out.flush()
+                out.detach()
+            finally:
+                if stream is not raw:
+                    stream.close()
+                session.close()
+        return count
+
+
+class ExportReader(BData):
+    """Streaming reader for export files."""
+
+    def __init__(self, path: str) -> None:
+        """Constructor."""
+        self._set_data(key=_Keys.PATH, value=path, set_default_type=str)
+        self._set_data(key=_Keys.VERSION, value=None, set_default_type=Optional[int])
+        self._set_data(key=_Keys.REJECTED, value=0, set_default_type=int)
+
+    @property
+    def version(self) -> Optional[int]:
+        """Returns format version, 0 for legacy pickle, None before reading."""
+        return self._get_data(key=_Keys.VERSION)
+
+    @property
+    def rejected(self) -> int:
+        """Returns number of skipped malformed lines."""
+        return self._get_data(key=_Keys.REJECTED)  # type: ignore
+
+    def __iter__(self) -> Iterator[ExportRecord]:
+        """Iterates over exported records."""
+        with open(self._get_data(key=_Keys.PATH), "rb") as raw:  # type: ignore
+            magic: bytes = raw.read(4)
+            raw.seek(0)
+            if magic.startswith(ExportFormat.MAGIC_PICKLE):
+                yield from self.__legacy(raw)
+                return
+            yield from self.__ndjson(compressed_reader(raw))
+
+    def __legacy(self, raw: IO[bytes]) -> Iterator[ExportRecord]:
+        """Reads old pickled list of TWorkTime objects."""
+        self._set_data(key=_Keys.VERSION, value=0)
+        for item in pickle.load(raw):
+            yield (item.start, item.duration, item.notes)
+
+    def __ndjson(self, stream: IO[bytes]) -> Iterator[ExportRecord]:
+        """Reads NDJSON export stream."""
+        lines = io.TextIOWrapper(stream, encoding="utf-8", newline="\n")  # type: ignore
+        header: Any = None
+        try:
+            header = json.loads(lines.readline())
+        except ValueError:
+            pass
+        if not isinstance(header, dict) or header.get("format") != ExportFormat.NAME:
+            raise Raise.error(
+                "Unknown export file format.", ValueError, self._c_name, currentframe()
+            )
+        version: int = header.get("version", 0)
+        if version > ExportFormat.VERSION:
+            raise Raise.error(
+                f"Unsupported export file version: {version}",
+                ValueError,
+                self._c_name,
+                currentframe(),
+            )
+        self._set_data(key=_Keys.VERSION, value=version)
+        while True:
+            chunk: List[str] = [line for line in islice(lines, 10000) if line.strip()]
+            if not chunk:
+                break
+            try:
+                # one decoder call per chunk is much faster than per line
+                records: List[Any] = json.loads(f"[{','.join(chunk)}]")
+            except ValueError:
+                records = []
+                for line in chunk:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        records.append(None)
+            for record in records:
+                try:
+                    start, duration, notes = record
+                except (TypeError, ValueError):
+                    self._set_data(key=_Keys.REJECTED, value=self.rejected + 1)
+                    continue
+                yield (start, duration, notes)
+
+
+class ImportResult(NamedTuple):
+    """Import statistics."""
+
+    inserted: int
+    duplicates: int
+    rejected: int
+
+
+class Importer(BDbHandler):
+    """Set based bulk importer class.
+
+    Records are staged in batches into a temporary table and inserted
+    with a single INSERT ... SELECT skipping the records already present,
+    so every batch costs a few statements and one commit.
+    """
+
+    def __init__(self, dbh: Database, batch: int = 50000) -> None:
+        """Constructor."""
+        self._db_handler = dbh
+        self._set_data(key=_Keys.BATCH, value=batch, set_default_type=int)
+
+    @staticmethod
+    def __valid(record: Any) -> bool:
+        """Check record types, bool is not accepted as int."""
+        start, duration, notes = record
+        return (
+            type(start) is int
+            and type(duration) is int
+            and (notes is None or type(notes) is str)
+        )
+
+    def import_file(self, path: str) -> ImportResult:
+        """Import export file, old pickled '.wrk' files included."""
+        reader = ExportReader(path)
+        result: ImportResult = self.import_records(reader)
+        return result._replace(rejected=result.rejected + reader.rejected)
+
+    @Instrument.timed("transfer.import")
+    def import_records(self, records: Iterator[Any]) -> ImportResult:
+        """Import (start, duration, notes) records."""
+        inserted: int = 0
+        duplicates: int = 0
+        rejected: int = 0
+        since: Optional[int] = None
+        batch_size: int = self._get_data(key=_Keys.BATCH)  # type: ignore
+        batch: List[ExportRecord]
+
+        session: Optional[Session] = self._db_handler.session
+        if session is None:
+            return ImportResult(0, 0, 0)
+        writer: DbWriter = self._db_handler.writer
+        # batches are inserted by the writer while the next ones are read
+        pending: List[Tuple[Future, int, int]] = []
+        try:
+            archive = Archive(self._db_handler)
+            boundary: int = Rollup.boundary(session)
+            iterator = iter(records)
+            while True:
+                batch = []
+                for record in iterator:
+                    try:
+                        valid: bool = self.__valid(record)
+                    except (TypeError, ValueError):
+                        valid = False
+                    if not valid:
+                        rejected += 1
+                        continue
+                    if record[0] < boundary:
+                        # archived years are read-only
+                        if archive.contains(session, *record):
+                            duplicates += 1
+                        else:
+                            rejected += 1
+                        continue
+                    batch.append((record[0], record[1], record[2]))
+                    if len(batch) >= batch_size:
+                        break
+                if not batch:
+                    break
+                pending.append(
+                    (
+                        writer.submit(self.__insert, batch),
+                        len(batch),
+                        min(item[0] for item in batch),
+                    )
+                )
+        finally:
+            session.close()
+        error: Optional[BaseException] = None
+        for future, size, first in pending:
+            try:
+                count: int = future.result()
+            except Exception as ex:
+                # rollups of the committed batches are refreshed anyway
+                error = error or ex
+                continue
+            inserted += count
+            duplicates += size - count
+            if count:
+                since = first if since is None else min(since, first)
+        if since is not None:
+            writer.submit(Rollup.refresh, since).result()
+        if error is not None:
+            raise error
+        return ImportResult(inserted, duplicates, rejected)
+
+    @staticmethod
+    def __insert(session: Session, batch: List[ExportRecord]) -> int:
+        """Stage batch and insert missing records, returns inserted count."""
+        # temporary tables live per connection, so check it in every batch
+        session.execute(
+            text(
+                "CREATE TEMP TABLE IF NOT EXISTS import_stage ("
+                "start INTEGER NOT NULL, duration INTEGER NOT NULL, notes TEXT)"
+            )
+        )
+        session.execute(text("DELETE FROM import_stage"))
+        # plain DBAPI executemany, skips per row parameters processing
+        session.connection().exec_driver_sql(
+            "INSERT INTO import_stage (start, duration, notes) VALUES (?, ?, ?)",
+            batch,  # type: ignore
+        )
+        # neither the rowcount nor the total changes of the connection
+        # count the inserted rows, when triggers route them to partitions
+        # and copy their notes to the search index, so count the stage
+        session.execute(
+            text(
+                "DELETE FROM import_stage WHERE EXISTS (SELECT 1 FROM worktime w "
+                "WHERE w.start = import_stage.start "
+                "AND w.duration = import_stage.duration "
+                "AND w.notes IS import_stage.notes)"
+            )
+        )
+        count: int = session.execute(
+            text(
+                "SELECT COUNT(*) FROM "
+                "(SELECT DISTINCT start, duration, notes FROM import_stage)"
+            )
+        ).scalar()  # type: ignore
+        session.execute(
+            text(
+                "INSERT INTO worktime (start, duration, notes) "
+                "SELECT DISTINCT start, duration, notes FROM import_stage"
+            )
+        )
+        session.execute(text("DELETE FROM import_stage"))
+        return count
+
+
+# #[EOF]#######################################################################
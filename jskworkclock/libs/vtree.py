@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+  vtree.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 08:23:20
+
+  Purpose: Virtualized Treeview with lazily fetched, keyset paginated rows.
+
+  Only a bounded window of rows is materialized as Treeview items.
+  When the view scrolls close to the edge of the window, the next page
+  is fetched and the same amount of items is evicted from the opposite
+  side, so memory and redraw time do not depend on the data size.
+"""
+
+import tkinter as tk
+
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from jsktoolbox.basetool.data import BData
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.tktool.base import TkBase
+
+from libs.executor import TkExecutor
+from libs.instrument import Instrument
+
+
+# fetch(after_key, limit, backward) -> [(key, values), ...] in ascending order
+FetchFunction = Callable[[Optional[Any], int, bool], List[Tuple[Any, Tuple]]]
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    AT_END: str = "_at_end_"
+    AT_START: str = "_at_start_"
+    EXECUTOR: str = "_executor_"
+    FETCH: str = "_fetch_"
+    ITEMS: str = "_items_"
+    PAGE: str = "_page_"
+    PENDING: str = "_pending_"
+    SCROLLBAR: str = "_scrollbar_"
+    WINDOW: str = "_window_"
+
+
+class VirtualTreeview(BData, TkBase, ttk.Treeview):
+    """Treeview materializing only a window of rows."""
+
+    def __init__(self, master, page: int = 200, window: int = 1000, **args) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * master - parent widget,
+        * page: int - number of rows fetched at once,
+        * window: int - maximum number of materialized items.
+        """
+        super().__init__(master, **args)
+        self._set_data(key=_Keys.PAGE, value=page, set_default_type=int)
+        self._set_data(
+            key=_Keys.WINDOW, value=max(window, 2 * page), set_default_type=int
+        )
+        self._set_data(
+            key=_Keys.FETCH, value=None, set_default_type=Optional[Callable]
+        )
+        self._set_data(
+            key=_Keys.SCROLLBAR,
+            value=None,
+            set_default_type=Optional[ttk.Scrollbar],
+        )
+        self._set_data(
+            key=_Keys.EXECUTOR, value=None, set_default_type=Optional[TkExecutor]
+        )
+        # item id -> row key
+        self._set_data(key=_Keys.ITEMS, value={}, set_default_type=Dict)
+        self._set_data(key=_Keys.AT_START, value=True, set_default_type=bool)
+        self._set_data(key=_Keys.AT_END, value=True, set_default_type=bool)
+        self._set_data(key=_Keys.PENDING, value=False, set_default_type=bool)
+
+        self.configure(yscrollcommand=self.__on_scroll)
+
+    @property
+    def scrollbar(self) -> Optional[ttk.Scrollbar]:
+        """Returns attached scrollbar."""
+        return self._get_data(key=_Keys.SCROLLBAR)
+
+    @scrollbar.setter
+    def scrollbar(self, value: Optional[ttk.Scrollbar]) -> None:
+        """Sets scrollbar updated by the view."""
+        self._set_data(key=_Keys.SCROLLBAR, value=value)
+
+    @property
+    def executor(self) -> Optional[TkExecutor]:
+        """Returns executor used for fetching pages."""
+        return self._get_data(key=_Keys.EXECUTOR)
+
+    @executor.setter
+    def executor(self, value: Optional[TkExecutor]) -> None:
+        """Sets executor, without it pages are fetched on Tk thread."""
+        self._set_data(key=_Keys.EXECUTOR, value=value)
+
+    @property
+    def __items(self) -> Dict[str, Any]:
+        """Returns materialized item id to key map."""
+        return self._get_data(key=_Keys.ITEMS)  # type: ignore
+
+    def reset(
+        self,
+        fetch: Optional[FetchFunction],
+        rows: Optional[List[Tuple[Any, Tuple]]] = None,
+    ) -> None:
+        """Set new rows source and load its first page.
+
+        ### Arguments:
+        * fetch: Optional[FetchFunction] - rows source,
+        * rows: Optional[List] - already fetched first page.
+        """
+        if self.executor is not None:
+            # drop pages requested from the previous source
+            self.executor.cancel(self._w)
+        self._set_data(key=_Keys.PENDING, value=False)
+        self._set_data(key=_Keys.FETCH, value=fetch)
+        self.clear()
+        if fetch is not None:
+            self._set_data(key=_Keys.AT_START, value=True)
+            self._set_data(key=_Keys.AT_END, value=False)
+            if rows is not None:
+                self.put(rows, backward=False)
+            else:
+                self._set_data(key=_Keys.PENDING, value=True)
+                self.__load(backward=False)
+
+    def clear(self) -> None:
+        """Remove all items at once."""
+        children = self.get_children()
+        if children:
+            self.delete(*children)
+        self.__items.clear()
+        self._set_data(key=_Keys.AT_START, value=True)
+        self._set_data(key=_Keys.AT_END, value=True)
+
+    def __on_scroll(self, first: str, last: str) -> None:
+        """Treeview yscrollcommand handler."""
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if self._get_data(key=_Keys.PENDING):
+            return
+        if float(last) > 0.9 and not self._get_data(key=_Keys.AT_END):
+            self._set_data(key=_Keys.PENDING, value=True)
+            self.after_idle(self.__load, False)
+        elif float(first) < 0.1 and not self._get_data(key=_Keys.AT_START):
+            self._set_data(key=_Keys.PENDING, value=True)
+            self.after_idle(self.__load, True)
+
+    def __load(self, backward: bool) -> None:
+        """Fetch and materialize the next page."""
+        fetch: Optional[FetchFunction] = self._get_data(key=_Keys.FETCH)
+        if fetch is None:
+            self._set_data(key=_Keys.PENDING, value=False)
+            return
+        children = self.get_children()
+        after: Optional[Any] = None
+        if children:
+            after = self.__items[children[0] if backward else children[-1]]
+        page: int = self._get_data(key=_Keys.PAGE)  # type: ignore
+        if self.executor is None:
+            self.__loaded(fetch(after, page, backward), backward)
+        else:
+            self.executor.submit(
+                fetch,
+                after,
+                page,
+                backward,
+                callback=lambda rows: self.__loaded(rows, backward),
+                errback=self.__failed,
+                group=self._w,
+            )
+
+    def __loaded(self, rows: List[Tuple[Any, Tuple]], backward: bool) -> None:
+        """Fetched page handler."""
+        self._set_data(key=_Keys.PENDING, value=False)
+        self.put(rows, backward)
+
+    def __failed(self, ex: BaseException) -> None:
+        """Failed fetch handler."""
+        self._set_data(key=_Keys.PENDING, value=False)
+        self._root().report_callback_exception(type(ex), ex, ex.__traceback__)  # type: ignore
+
+    @Instrument.timed("tree.put")
+    def put(self, rows: List[Tuple[Any, Tuple]], backward: bool) -> None:
+        """Materialize fetched page and evict rows outside the window."""
+        page: int = self._get_data(key=_Keys.PAGE)  # type: ignore
+        window: int = self._get_data(key=_Keys.WINDOW)  # type: ignore
+        items: Dict[str, Any] = self.__items
+        children = self.get_children()
+        total: int = len(children)
+        # index of the first visible item, kept in place after eviction
+        top: int = int(round(self.yview()[0] * total)) if total else 0
+
+        if backward:
+            self._set_data(key=_Keys.AT_START, value=len(rows) < page)
+            for index, (key, values) in enumerate(rows):
+                items[self.insert("", index, values=values)] = key
+            top += len(rows)
+        else:
+            self._set_data(key=_Keys.AT_END, value=len(rows) < page)
+            for key, values in rows:
+                items[self.insert("", tk.END, values=values)] = key
+
+        children = self.get_children()
+        excess: int = len(children) - window
+        if excess > 0:
+            if backward:
+                evicted = children[-excess:]
+                self._set_data(key=_Keys.AT_END, value=False)
+            else:
+                evicted = children[:excess]
+                self._set_data(key=_Keys.AT_START, value=False)
+                top -= excess
+            self.delete(*evicted)
+            for item in evicted:
+                del items[item]
+        total = len(children) - max(excess, 0)
+        if total and (backward or excess > 0):
+            self.yview_moveto(max(top, 0) / total)
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+  writer.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:11:04
+
+  Purpose: Single serialized database writer with group commit.
+
+  All mutations are queued as jobs and run one by one on the writer
+  thread, so writers never compete for the SQLite write lock. Jobs
+  queued at the same time are run in one transaction, each in its own
+  savepoint, and committed together, so bursts of small writes share
+  one fsync. A failed job is rolled back alone. Results are reported
+  through futures, resolved after the commit.
+"""
+
+import logging
+
+from concurrent.futures import Future
+from inspect import currentframe
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+from time import monotonic
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from jsktoolbox.basetool.data import BData
+from jsktoolbox.attribtool import ReadOnlyClass
+from jsktoolbox.raisetool import Raise
+
+from libs.instrument import Instrument
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# (future, job, args), None stops the writer thread
+WriteJob = Optional[Tuple[Future, Callable[..., Any], Tuple]]
+
+
+class _Keys(object, metaclass=ReadOnlyClass):
+    """Local keys."""
+
+    BATCH: str = "_batch_"
+    CLOSED: str = "_closed_"
+    FACTORY: str = "_factory_"
+    LINGER: str = "_linger_"
+    LOCK: str = "_lock_"
+    QUEUE: str = "_queue_"
+    THREAD: str = "_thread_"
+
+
+class DbWriter(BData):
+    """Database writer thread class."""
+
+    def __init__(
+        self,
+        factory: sessionmaker,
+        size: int = 256,
+        batch: int = 64,
+        linger: float = 0.005,
+    ) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * factory: sessionmaker - Session factory of the database,
+        * size: int - queue size, submit blocks when the queue is full,
+        * batch: int - maximum number of jobs in one commit,
+        * linger: float - seconds to wait for more jobs before the commit.
+        """
+        self._set_data(key=_Keys.FACTORY, value=factory, set_default_type=sessionmaker)
+        self._set_data(key=_Keys.QUEUE, value=Queue(size), set_default_type=Queue)
+        self._set_data(key=_Keys.BATCH, value=max(batch, 1), set_default_type=int)
+        self._set_data(key=_Keys.LINGER, value=float(linger), set_default_type=float)
+        self._set_data(key=_Keys.LOCK, value=Lock(), set_default_type=type(Lock()))
+        self._set_data(key=_Keys.CLOSED, value=False, set_default_type=bool)
+        self._set_data(key=_Keys.THREAD, value=None, set_default_type=Optional[Thread])
+
+    @property
+    def __queue(self) -> Queue:
+        """Returns jobs queue."""
+        return self._get_data(key=_Keys.QUEUE)  # type: ignore
+
+    def submit(
+        self, job: Callable[..., Any], *args, timeout: Optional[float] = None
+    ) -> Future:
+        """Queue job(session, *args) for the writer thread.
+
+        The job must not commit nor close the session.
+
+        ### Arguments:
+        * job: Callable - mutation, called with the writer Session first,
+        * timeout: Optional[float] - seconds to wait for a free place
+          in the queue, None waits forever.
+
+        ### Returns:
+        Future of the job result, resolved after the commit.
+        """
+        with self._get_data(key=_Keys.LOCK):  # type: ignore
+            if self._get_data(key=_Keys.CLOSED):
+                raise Raise.error(
+                    "Database writer is closed.",
+                    RuntimeError,
+                    self._c_name,
+                    currentframe(),
+                )
+            if self._get_data(key=_Keys.THREAD) is None:
+                thread = Thread(target=self.__run, name="WorkClock writer", daemon=True)
+                self._set_data(key=_Keys.THREAD, value=thread)
+                thread.start()
+        future: Future = Future()
+        try:
+            self.__queue.put((future, job, args), timeout=timeout)
+        except Full:
+            raise Raise.error(
+                "Database writer queue is full.",
+                TimeoutError,
+                self._c_name,
+                currentframe(),
+            )
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the queued jobs are committed.
+
+        Returns False if the timeout expired first.
+        """
+        # a job queued behind the others is done after all of them
+        if self._get_data(key=_Keys.THREAD) is None:
+            return True
+        try:
+            self.submit(lambda session: None, timeout=timeout).result(timeout)
+        except Exception:
+            return False
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Commit the queued jobs and stop the writer thread.
+
+        Returns False if the timeout expired first.
+        """
+        with self._get_data(key=_Keys.LOCK):  # type: ignore
+            if self._get_data(key=_Keys.CLOSED):
+                return True
+            self._set_data(key=_Keys.CLOSED, value=True)
+            thread: Optional[Thread] = self._get_data(key=_Keys.THREAD)
+        if thread is None:
+            return True
+        try:
+            self.__queue.put(None, timeout=timeout)
+        except Full:
+            return False
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def __run(self) -> None:
+        """Writer loop."""
+        queue: Queue = self.__queue
+        batch: int = self._get_data(key=_Keys.BATCH)  # type: ignore
+        linger: float = self._get_data(key=_Keys.LINGER)  # type: ignore
+        stop: bool = False
+        while not stop:
+            jobs: List[Tuple[Future, Callable[..., Any], Tuple]] = []
+            item: WriteJob = queue.get()
+            deadline: float = monotonic() + linger
+            while item is not None:
+                jobs.append(item)
+                if len(jobs) >= batch:
+                    break
+                try:
+                    item = queue.get(timeout=max(deadline - monotonic(), 0))
+                except Empty:
+                    break
+            if item is None:
+                stop = True
+            if jobs:
+                self.__commit(jobs)
+
+    @Instrument.timed("writer.commit")
+    def __commit(self, jobs: List[Tuple[Future, Callable[..., Any], Tuple]]) -> None:
+        """Run jobs in one transaction and resolve their futures."""
+        done: List[Tuple[Future, Any]] = []
+        session: Session = self._get_data(key=_Keys.FACTORY)()  # type: ignore
+        try:
+            # pysqlite begins transactions lazily, the savepoints need
+            # an open one, and the write lock is taken once for the batch
+            session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            for future, job, args in jobs:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                savepoint = session.begin_nested()
+                try:
+                    result: Any = job(session, *args)
+                    savepoint.commit()
+                except Exception as ex:
+                    savepoint.rollback()
+                    future.set_exception(ex)
+                    continue
+                done.append((future, result))
+            session.commit()
+        except Exception as ex:
+            logger.warning("database writer commit failed: %s", ex)
+            session.rollback()
+            for future, _, _ in jobs:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+        finally:
+            session.close()
+        for future, result in done:
+            future.set_result(result)
+
+
+# #[EOF]#######################################################################
@@ -10,44 +10,77 @@
   https://ttkbootstrap.readthedocs.io/en/version-0.5/widgets/spinbox.html
 """
 
+import logging
 import os
 import tkinter as tk
 
-from tkinter import ttk
-from time import sleep
-from typing import Optional, Union
-from time import sleep
-from threading import Thread
+from tkinter import ttk, messagebox, simpledialog
+from time import monotonic
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from inspect import currentframe
-from datetime import timedelta
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
 
 from jsktoolbox.datetool import DateTime, Timestamp
-from jsktoolbox.systemtool import PathChecker, Env
+from jsktoolbox.systemtool import PathChecker
 from jsktoolbox.raisetool import Raise
 from jsktoolbox.tktool.base import TkBase
 from jsktoolbox.tktool.layout import Pack
 
 from libs.base import BDbHandler
+from libs.clock import ClockEngine
+from libs.executor import TkExecutor
 from libs.ico import ImageBase64
-from libs.database import Database, TWorkTime
+from libs.instrument import Instrument
 from libs.keys import Keys
 from libs.notes import NotesDialog
-from libs.report import ReportDialog
+from libs.paths import AppPaths
+
+if TYPE_CHECKING:
+    # the database layer and the report window are loaded on demand,
+    # so the main window shows up before SQLAlchemy and tkcalendar
+    from libs.checkpoint import ActiveSession
+    from libs.database import Database
+    from libs.report import ReportDialog
+    from libs.sync import SyncClient
+
+logger: logging.Logger = logging.getLogger(__name__)
 
 
 class MainFrame(TkBase, BDbHandler, ttk.Frame):
     """WorkClock main frame class."""
 
-    def __init__(self, master, dbh: Database, **args) -> None:
-        """Constructor."""
+    def __init__(
+        self,
+        master,
+        heartbeat: int = 60,
+        iconified: int = 30,
+        **args,
+    ) -> None:
+        """Constructor.
+
+        ### Arguments:
+        * master - parent widget,
+        * heartbeat: int - running session checkpoint interval in seconds,
+        * iconified: int - clock refresh interval in seconds while iconified.
+        """
         super().__init__(master, **args)
 
         # init locals
-        self._set_data(key=Keys.F_STOP, value=False, set_default_type=bool)
+        self._set_data(key=Keys.HEARTBEAT, value=heartbeat, set_default_type=int)
         self._set_data(key=Keys.DEF_NAME, value=master.title(), set_default_type=str)
-        self._set_data(key=Keys.TH_CLOCK, value=None, set_default_type=Optional[Thread])
-        self._db_handler = dbh
+        self._set_data(key=Keys.START, value=None, set_default_type=Optional[int])
+        self._set_data(key=Keys.LAST_BEAT, value=0.0, set_default_type=float)
+        self._set_data(
+            key=Keys.CLOCK,
+            value=ClockEngine(self, self.__on_tick, iconified=iconified),
+            set_default_type=ClockEngine,
+        )
+        # results of database writes are delivered on Tk thread
+        self._set_data(
+            key=Keys.EXECUTOR,
+            value=TkExecutor(self, workers=1),
+            set_default_type=TkExecutor,
+        )
 
         # init ui
         self.__init_ui()
@@ -63,6 +96,7 @@ class MainFrame(TkBase, BDbHandler, ttk.Frame):
                 text="Start",
                 command=self.__bt_start,
                 width=15,
+                state=tk.DISABLED,
             ),
             set_default_type=ttk.Button,
         )
@@ -80,34 +114,83 @@ class MainFrame(TkBase, BDbHandler, ttk.Frame):
             side=Pack.Side.RIGHT, expand=True, fill=Pack.Fill.BOTH, padx=4, pady=4
         )
 
+    @property
+    def __clock(self) -> ClockEngine:
+        """Returns clock engine."""
+        return self._get_data(key=Keys.CLOCK)  # type: ignore
+
+    @property
+    def __executor(self) -> TkExecutor:
+        """Returns database writes results executor."""
+        return self._get_data(key=Keys.EXECUTOR)  # type: ignore
+
+    @property
+    def __checkpoint(self) -> "ActiveSession":
+        """Returns running session checkpoint handler."""
+        from libs.checkpoint import ActiveSession
+
+        return ActiveSession(self._db_handler)
+
+    def attach(self, dbh: "Database") -> None:
+        """Set opened database and enable the clock."""
+        self._db_handler = dbh
+        if self._get_data(key=Keys.START) is None:
+            self._get_data(key=Keys.BT_START)[Keys.STATE] = tk.NORMAL  # type: ignore
+
     def __bt_start(self) -> None:
         """[Start] click."""
-        self._set_data(key=Keys.F_STOP, value=False)
-        self._set_data(
-            key=Keys.TH_CLOCK,
-            value=Thread(
-                target=self.__th_worker, name="WorkingTime worker", daemon=True
-            ),
+        start: int = Timestamp.now()  # type: ignore
+        self.__executor.watch(
+            self.__checkpoint.begin(start),
+            errback=lambda ex: self.__start_failed(start, ex),
+        )
+        self.start(start)
+
+    def __start_failed(self, start: int, ex: BaseException) -> None:
+        """Checkpoint refused, the session was started elsewhere."""
+        if self._get_data(key=Keys.START) == start and self.__clock.running:
+            self.__clock.stop()
+            self._set_data(key=Keys.START, value=None)
+            self.master.title(f"{self._get_data(key=Keys.DEF_NAME)}")  # type: ignore
+            self._get_data(key=Keys.BT_START)[Keys.STATE] = tk.NORMAL  # type: ignore
+            self._get_data(key=Keys.BT_STOP)[Keys.STATE] = tk.DISABLED  # type: ignore
+        messagebox.showerror(
+            title="Start", message=f"Session not started:\n\n{ex}", parent=self
+        )
+
+    def __stop_failed(self, ex: BaseException) -> None:
+        """Session not recorded, it was stopped elsewhere."""
+        messagebox.showerror(
+            title="Stop", message=f"Session not recorded:\n\n{ex}", parent=self
         )
-        self._get_data(key=Keys.TH_CLOCK).start()  # type: ignore
+
+    def start(self, start: int) -> None:
+        """Run the clock for session started at 'start' timestamp."""
+        self._set_data(key=Keys.START, value=start)
+        self._set_data(key=Keys.LAST_BEAT, value=monotonic())
         self._get_data(key=Keys.BT_START)[Keys.STATE] = tk.DISABLED  # type: ignore
         self._get_data(key=Keys.BT_STOP)[Keys.STATE] = tk.NORMAL  # type: ignore
+        self.__clock.start(start)
+
+    def __on_tick(self, elapsed: float) -> None:
+        """Clock tick handler, runs on Tk thread."""
+        elapsed_time: timedelta = DateTime.elapsed_time_from_seconds(int(elapsed))
+        self.master.title(f"{self._get_data(key=Keys.DEF_NAME)}: {elapsed_time}")  # type: ignore
+        now: float = monotonic()
+        if now - self._get_data(key=Keys.LAST_BEAT) >= self._get_data(  # type: ignore
+            key=Keys.HEARTBEAT
+        ):
+            # single row update, piggybacks on the clock tick
+            self._set_data(key=Keys.LAST_BEAT, value=now)
+            self.__executor.watch(self.__checkpoint.heartbeat(Timestamp.now()))
 
     def __bt_stop(self) -> None:
         """[Stop] click."""
-        self._set_data(key=Keys.F_STOP, value=True)
-
-    def __th_worker(self) -> None:
-        """Threaded worker."""
         notes: Optional[str] = None
-        elapsed_time: Optional[timedelta] = None
-        start: Union[int, float] = Timestamp.now()
-        title: str = f"{self._get_data(key=Keys.DEF_NAME)}"
-        while not self._get_data(key=Keys.F_STOP):
-            elapsed_time = DateTime.elapsed_time_from_seconds(Timestamp.now() - start)
-            if self.master is not None:
-                self.master.title(f"{title}: {elapsed_time}")  # type: ignore
-            sleep(1)
+        start: int = self._get_data(key=Keys.START)  # type: ignore
+        self.__clock.stop()
+        end: int = Timestamp.now()  # type: ignore
+        self.master.title(f"{self._get_data(key=Keys.DEF_NAME)}")  # type: ignore
 
         self._get_data(key=Keys.BT_START)[Keys.STATE] = tk.NORMAL  # type: ignore
         self._get_data(key=Keys.BT_STOP)[Keys.STATE] = tk.DISABLED  # type: ignore
@@ -119,68 +202,113 @@ class MainFrame(TkBase, BDbHandler, ttk.Frame):
             notes = dialog.get_notes
         del dialog
         dialog = None
-        # insert data to database
-        session: Optional[Session] = self._db_handler.session
-        if session:
-            obj = TWorkTime()
-            obj.start = int(start)
-            obj.duration = int(
-                DateTime.elapsed_time_from_seconds(
-                    Timestamp.now() - start
-                ).total_seconds()
-            )
-            if notes:
-                obj.notes = notes
-            session.add(obj)
-            session.commit()
-            session.close()
-
-        print(elapsed_time)
+        # insert data to database and remove the checkpoint
+        self.__executor.watch(
+            self.__checkpoint.stop(start, end, notes), errback=self.__stop_failed
+        )
 
 
 class WorkClock(tk.Tk, TkBase, BDbHandler):
     """WorkClock main application class."""
 
+    # running session checkpoint interval in seconds
+    HEARTBEAT: int = 60
+    HEARTBEAT_ENV: str = "WORKCLOCK_HEARTBEAT"
+
     def __init__(self) -> None:
         """Constructor."""
         super().__init__()
 
         # init locals
         self._set_data(
-            key=Keys.W_REPORT, value=None, set_default_type=Optional[ReportDialog]
+            key=Keys.W_REPORT, value=None, set_default_type=Optional[tk.Toplevel]
+        )
+        self._set_data(
+            key=Keys.W_DIAGNOSTICS, value=None, set_default_type=Optional[tk.Toplevel]
         )
         self._set_data(
-            key=Keys.CACHE_DIR, value=".cache/jskworkclock", set_default_type=str
+            key=Keys.EXECUTOR,
+            value=TkExecutor(self, workers=1),
+            set_default_type=TkExecutor,
         )
-        self._set_data(key=Keys.DATABASE, value="data.sqlite", set_default_type=str)
 
         # init dirs
         self.__init_dirs()
 
-        # init db
-        self.__init_db()
-
         # init GUI
         self.__init_ui()
 
+        # init db, the window is already visible
+        self._get_data(key=Keys.EXECUTOR).submit(  # type: ignore
+            self.__open_db,
+            self.__db_path,
+            callback=self.__db_ready,
+            errback=self.__db_failed,
+        )
+
     @property
     def __db_path(self) -> str:
         """Return database path."""
-        return os.path.join(
-            Env().home,
-            f"{self._get_data(key=Keys.CACHE_DIR)}",
-            f"{self._get_data(key=Keys.DATABASE)}",
-        )
+        return AppPaths.database()
 
-    def __init_db(self) -> None:
-        """Initialize database connection."""
-        db = Database(self.__db_path)
-        if db is not None:
-            self._db_handler = db
-        else:
-            raise Raise.error(
-                "Init database error.", OSError, self._c_name, currentframe()
+    @property
+    def __heartbeat(self) -> int:
+        """Return checkpoint interval, the environment variable overrides it."""
+        value: str = os.environ.get(self.HEARTBEAT_ENV, "").strip()
+        if not value:
+            return self.HEARTBEAT
+        if not value.isdigit() or int(value) < 1:
+            logger.warning(
+                "%s must be a positive number of seconds, got: '%s'",
+                self.HEARTBEAT_ENV,
+                value,
             )
+            return self.HEARTBEAT
+        return int(value)
+
+    @staticmethod
+    def __open_db(path: str) -> "Database":
+        """Open database and upgrade its schema, runs in background."""
+        from libs.database import Database
+
+        # preload modules used right after the database is ready
+        import libs.checkpoint
+        import libs.maintenance
+
+        return Database(path)
+
+    def __db_ready(self, db: "Database") -> None:
+        """Opened database handler, runs on Tk thread."""
+        from libs.maintenance import Maintenance
+
+        self._db_handler = db
+        mf: MainFrame = self._get_data(key=Keys.MAIN_FRAME)  # type: ignore
+        mf.attach(db)
+
+        # database maintenance, postponed while the report window is open
+        self._set_data(
+            key=Keys.MAINTENANCE,
+            value=Maintenance(db, idle=self.__is_idle),
+            set_default_type=Maintenance,
+        )
+        self._get_data(key=Keys.MAINTENANCE).start()  # type: ignore
+
+        # background sync with the configured server
+        self._get_data(key=Keys.EXECUTOR).submit(  # type: ignore
+            self.__sync_servers, db, callback=self.__sync_start
+        )
+
+        # check for a session interrupted by a crash
+        self.__recover()
+
+    def __db_failed(self, ex: BaseException) -> None:
+        """Database initialization error handler."""
+        messagebox.showerror(
+            title="Database error",
+            message=f"Init database error: '{self.__db_path}'\n\n{ex}",
+            parent=self,
+        )
+        self.__quit_window()
 
     def __init_dirs(self) -> None:
         """Initialize local path for database."""
@@ -205,19 +333,23 @@ class WorkClock(tk.Tk, TkBase, BDbHandler):
 
         self.protocol("WM_DELETE_WINDOW", self.__quit_window)
 
-        mf = MainFrame(self, self._db_handler)
+        mf = MainFrame(self, heartbeat=self.__heartbeat)
         # mf.grid(column=0, row=0, sticky=tk.NSEW)
         mf.pack(side=Pack.Side.TOP, fill=Pack.Fill.BOTH, anchor=Pack.Anchor.CENTER)
+        self._set_data(key=Keys.MAIN_FRAME, value=mf, set_default_type=MainFrame)
 
         # menu
         menubar = tk.Menu(self)
         # File
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Report", command=self.__report)
+        file_menu.add_command(label="Backup", command=self.__backup)
+        file_menu.add_command(label="Sync...", command=self.__sync)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.__quit_window)
         # Help
         help_menu = tk.Menu(menubar, tearoff=0)
+        help_menu.add_command(label="Diagnostics", command=self.__diagnostics)
         help_menu.add_command(label="About", command=self.__about)
         menubar.add_cascade(label="File", menu=file_menu)
         menubar.add_cascade(label="Help", menu=help_menu)
@@ -225,10 +357,158 @@ class WorkClock(tk.Tk, TkBase, BDbHandler):
         self.config(menu=menubar)
         self.update()
 
+    def __recover(self) -> None:
+        """Resume or finalize the session interrupted by a crash."""
+        from libs.checkpoint import ActiveSession
+
+        checkpoint = ActiveSession(self._db_handler)
+        row: Optional[Tuple[int, int]] = checkpoint.get()
+        if row is None:
+            return
+        start: datetime = DateTime.datetime_from_timestamp(row[0])
+        last: datetime = DateTime.datetime_from_timestamp(row[1])
+        if messagebox.askyesno(
+            title="Interrupted session",
+            message=f"The session started at {start} was interrupted, "
+            f"last checkpoint: {last}.\n\n"
+            "Resume the session?\n"
+            "Choose 'No' to record it until the last checkpoint.",
+            parent=self,
+        ):
+            mf: MainFrame = self._get_data(key=Keys.MAIN_FRAME)  # type: ignore
+            mf.start(row[0])
+        else:
+            future = checkpoint.finalize()
+            if future is not None:
+                self._get_data(key=Keys.EXECUTOR).watch(future)  # type: ignore
+
+    def __is_idle(self) -> bool:
+        """Returns True if no window works with the database."""
+        wr: Optional["ReportDialog"] = self._get_data(key=Keys.W_REPORT)
+        return wr is None or wr.is_closed
+
     def __quit_window(self) -> None:
         """Quit sequence."""
+        self._get_data(key=Keys.EXECUTOR).shutdown()  # type: ignore
+        if self._get_data(key=Keys.MAINTENANCE) is not None:
+            self._get_data(key=Keys.MAINTENANCE).stop(timeout=5)  # type: ignore
+        if self._get_data(key=Keys.SYNC) is not None:
+            self._get_data(key=Keys.SYNC).stop(timeout=5)  # type: ignore
+        if self._db_handler is not None:
+            # commit the queued writes, the stopped session included
+            self._db_handler.writer.close(timeout=5)
         self.destroy()
 
+    def __backup(self) -> None:
+        """Backup snapshot of the database, created in background."""
+        if self._db_handler is None:
+            # database is still being opened
+            return
+        self._get_data(key=Keys.EXECUTOR).submit(  # type: ignore
+            self.__snapshot,
+            self._db_handler,
+            callback=self.__snapshot_done,
+            errback=self.__snapshot_failed,
+        )
+
+    @staticmethod
+    def __snapshot(db: "Database") -> str:
+        """Create snapshot and prune the old ones, runs in background."""
+        from libs.backup import Backups
+
+        backups = Backups(db)
+        name: str = backups.snapshot()
+        backups.prune()
+        return os.path.join(backups.directory, name)
+
+    def __snapshot_done(self, path: str) -> None:
+        """Snapshot created handler."""
+        messagebox.showinfo(
+            title="Backup", message=f"Snapshot saved:\n{path}", parent=self
+        )
+
+    def __snapshot_failed(self, ex: BaseException) -> None:
+        """Snapshot error handler."""
+        messagebox.showerror(
+            title="Backup", message=f"Backup failed:\n\n{ex}", parent=self
+        )
+
+    def __sync(self) -> None:
+        """Set the sync server, an empty URL turns the sync off."""
+        if self._db_handler is None:
+            # database is still being opened
+            return
+        client: Optional["SyncClient"] = self._get_data(key=Keys.SYNC)
+        url: Optional[str] = simpledialog.askstring(
+            title="Sync",
+            prompt="Sync server URL, e.g. http://127.0.0.1:8765:",
+            initialvalue=client.server if client is not None else "",
+            parent=self,
+        )
+        if url is None:
+            return
+        url = url.strip().rstrip("/")
+        if client is not None:
+            if client.server == url:
+                client.wake()
+                return
+            # the running cycle finishes on its own
+            client.stop(timeout=0)
+            self._delete_data(key=Keys.SYNC)
+        self._get_data(key=Keys.EXECUTOR).submit(  # type: ignore
+            self.__sync_configure,
+            self._db_handler,
+            url or None,
+            callback=self.__sync_start,
+            errback=self.__sync_failed,
+        )
+
+    @staticmethod
+    def __sync_servers(db: "Database") -> List[str]:
+        """Returns configured sync servers, runs in background."""
+        from libs.sync import SyncClient
+
+        return SyncClient.servers(db)
+
+    @staticmethod
+    def __sync_configure(db: "Database", url: Optional[str]) -> List[str]:
+        """Replace the sync server, runs in background."""
+        from libs.sync import SyncClient
+
+        # the GUI syncs with one server
+        for server in SyncClient.servers(db):
+            if server != url:
+                SyncClient(db, server).forget()
+        if url is not None:
+            SyncClient(db, url).register()
+        return SyncClient.servers(db)
+
+    def __sync_start(self, servers: List[str]) -> None:
+        """Start background sync with the first configured server."""
+        if not servers or self._get_data(key=Keys.SYNC) is not None:
+            return
+        from libs.sync import SyncClient
+
+        client = SyncClient(self._db_handler, servers[0])
+        self._set_data(key=Keys.SYNC, value=client, set_default_type=SyncClient)
+        client.start()
+
+    def __sync_failed(self, ex: BaseException) -> None:
+        """Sync configuration error handler."""
+        messagebox.showerror(
+            title="Sync", message=f"Sync setup failed:\n\n{ex}", parent=self
+        )
+
+    def __diagnostics(self) -> None:
+        """Diagnostics dialog."""
+        wd: Optional[tk.Toplevel] = self._get_data(key=Keys.W_DIAGNOSTICS)
+        if wd is not None and wd.winfo_exists():
+            wd.lift()
+            return
+        from libs.diagnostics import DiagnosticsDialog
+
+        self._set_data(key=Keys.W_DIAGNOSTICS, value=DiagnosticsDialog(self))
+
     def __about(self) -> None:
         """About dialog."""
         # TODO: implement about dialog
@@ -236,6 +516,11 @@ class WorkClock(tk.Tk, TkBase, BDbHandler):
 
     def __report(self) -> None:
         """Report dialog."""
+        if self._db_handler is None:
+            # database is still being opened
+            return
+        from libs.report import ReportDialog
+
         wr: Optional[ReportDialog] = self._get_data(key=Keys.W_REPORT)
         if wr is None or wr.is_closed:
             if wr is not None:
@@ -247,6 +532,8 @@ class WorkClock(tk.Tk, TkBase, BDbHandler):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    Instrument.setup()
     app = WorkClock()
     app.mainloop()
 
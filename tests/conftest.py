@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+  conftest.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:34:29
+
+  Purpose: Shared test setup.
+
+  The application modules import each other as 'libs.xxx', rooted at
+  the jskworkclock directory, like the entry points do. The helpers
+  below write and read records of temporary databases.
+"""
+
+import os
+import sys
+
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCES: str = os.path.join(ROOT, "jskworkclock")
+
+for path in (SOURCES, ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# importable only with the paths above
+from sqlalchemy import text  # noqa: E402
+
+from libs.database import Database  # noqa: E402
+
+
+Row = Tuple[int, int, Optional[str]]
+
+
+def stamp(year: int, month: int, day: int, hour: int = 18) -> int:
+    """Returns local timestamp."""
+    return int(datetime(year, month, day, hour).timestamp())
+
+
+def add(db: Database, start: int, duration: int, notes: Optional[str]) -> None:
+    """Insert record through the writer."""
+    db.writer.submit(
+        lambda session: session.execute(
+            text(
+                "INSERT INTO worktime (start, duration, notes) "
+                "VALUES (:start, :duration, :notes)"
+            ),
+            {"start": start, "duration": duration, "notes": notes},
+        )
+    ).result()
+
+
+def remove(db: Database, start: int) -> None:
+    """Delete records starting at the timestamp through the writer."""
+    db.writer.submit(
+        lambda session: session.execute(
+            text("DELETE FROM worktime WHERE start = :start"), {"start": start}
+        )
+    ).result()
+
+
+def rows(db: Database) -> List[Row]:
+    """Returns live records in order."""
+    session = db.session
+    assert session is not None
+    try:
+        return [
+            tuple(row)  # type: ignore
+            for row in session.execute(
+                text("SELECT start, duration, notes FROM worktime ORDER BY start")
+            )
+        ]
+    finally:
+        session.close()
+
+
+# #[EOF]#######################################################################
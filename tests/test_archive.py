@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+  test_archive.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:40:38
+
+  Purpose: Moving closed years into archive files.
+"""
+
+import os
+
+from typing import Iterator, List
+
+import pytest
+
+from sqlalchemy import text
+
+from libs.archive import Archive, ArchiveYear
+from libs.database import Database
+
+from tests.conftest import add, rows, stamp
+
+
+@pytest.fixture
+def db(tmp_path) -> Iterator[Database]:
+    """Database with records of two closed years and the current one."""
+    out = Database(str(tmp_path / "data.sqlite"))
+    add(out, stamp(2020, 5, 4), 3600, "a")
+    add(out, stamp(2021, 7, 1), 1800, "b")
+    add(out, stamp(2026, 1, 5), 600, "c")
+    try:
+        yield out
+    finally:
+        out.writer.close(timeout=5)
+
+
+def archived(db: Database) -> List[int]:
+    """Returns the registered archive years."""
+    session = db.session
+    assert session is not None
+    try:
+        return [
+            row[0]
+            for row in session.execute(
+                text("SELECT year FROM archive_year ORDER BY year")
+            )
+        ]
+    finally:
+        session.close()
+
+
+def test_freeze_moves_closed_years(db: Database) -> None:
+    archive = Archive(db)
+    assert archive.freeze(2021) == 2
+    assert archived(db) == [2020, 2021]
+    assert rows(db) == [(stamp(2026, 1, 5), 600, "c")]
+    assert sorted(os.listdir(archive.directory)) == ["2020.wca", "2021.wca"]
+    # nothing left to archive
+    assert archive.freeze(2021) == 0
+
+
+def test_freeze_fails_when_records_change(db: Database, monkeypatch) -> None:
+    write = ArchiveYear.write
+
+    def racing(path: str, year: int, chunk) -> None:
+        write(path, year, chunk)
+        if year == 2021:
+            # another writer adds a record of an archived year
+            add(db, stamp(2021, 9, 1), 900, "late")
+
+    monkeypatch.setattr(ArchiveYear, "write", staticmethod(racing))
+    archive = Archive(db)
+    with pytest.raises(RuntimeError):
+        archive.freeze(2021)
+    assert archived(db) == []
+    assert len(rows(db)) == 4
+    assert os.listdir(archive.directory) == []
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+  test_backup.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:51:56
+
+  Purpose: Backup snapshots and their restore.
+"""
+
+import os
+
+from typing import Iterator
+
+import pytest
+
+from libs.backup import Backups
+from libs.database import Database
+from libs.partition import Partitions
+
+from tests.conftest import add, remove, rows, stamp
+
+
+@pytest.fixture
+def db(tmp_path) -> Iterator[Database]:
+    """Database with one record."""
+    out = Database(str(tmp_path / "data.sqlite"))
+    add(out, stamp(2026, 3, 1), 3600, "first")
+    try:
+        yield out
+    finally:
+        out.writer.close(timeout=5)
+
+
+def test_restore_brings_back_the_snapshot(db: Database) -> None:
+    backups = Backups(db)
+    first: str = backups.snapshot()
+    before = rows(db)
+    remove(db, stamp(2026, 3, 1))
+    add(db, stamp(2026, 3, 2), 1800, "second")
+    after = rows(db)
+    saved: str = backups.restore(first)
+    assert rows(db) == before
+    # the state before the restore is kept as a snapshot
+    assert saved in [item.name for item in backups.snapshots()]
+    backups.restore(saved)
+    assert rows(db) == after
+
+
+def test_restore_removes_partitions_missing_in_the_snapshot(db: Database) -> None:
+    partitions = Partitions(db)
+    partitions.enable()
+    backups = Backups(db)
+    first: str = backups.snapshot()
+    add(db, stamp(2023, 5, 1), 1800, "later")
+    partitions.split()
+    later: str = os.path.join(partitions.directory, f"2023{Partitions.SUFFIX}")
+    assert os.path.exists(later)
+    backups.restore(first)
+    assert not os.path.exists(later)
+    assert 2023 not in [year for year, _, _, _ in partitions.layout()]
+    assert rows(db) == [(stamp(2026, 3, 1), 3600, "first")]
+    # a partition of the year created again starts empty
+    add(db, stamp(2023, 6, 1), 600, "again")
+    partitions.split()
+    assert rows(db) == [
+        (stamp(2023, 6, 1), 600, "again"),
+        (stamp(2026, 3, 1), 3600, "first"),
+    ]
+
+
+def test_restore_of_unknown_snapshot_fails(db: Database) -> None:
+    with pytest.raises(ValueError):
+        Backups(db).restore("20000101-000000")
+    assert rows(db) == [(stamp(2026, 3, 1), 3600, "first")]
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+  test_checkpoint.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:50:23
+
+  Purpose: Running session shared by the GUI and the CLI.
+"""
+
+from typing import Iterator
+
+import pytest
+
+import cli
+
+from libs.checkpoint import ActiveSession
+from libs.checkpoint_file import ActiveSessionFile
+from libs.database import Database
+
+from tests.conftest import rows
+
+
+@pytest.fixture
+def db(tmp_path) -> Iterator[Database]:
+    """Empty database."""
+    out = Database(str(tmp_path / "data.sqlite"))
+    try:
+        yield out
+    finally:
+        out.writer.close(timeout=5)
+
+
+def test_begin_refuses_a_running_session(db: Database) -> None:
+    checkpoint = ActiveSession(db)
+    checkpoint.begin(1000).result()
+    with pytest.raises(RuntimeError):
+        checkpoint.begin(2000).result()
+    with pytest.raises(RuntimeError):
+        ActiveSessionFile(db.path).begin(3000)
+    assert checkpoint.get() == (1000, 1000)
+
+
+def test_session_stopped_by_the_cli_is_not_recorded_twice(db: Database) -> None:
+    # the GUI clock runs, the CLI stops the session
+    checkpoint = ActiveSession(db)
+    checkpoint.begin(1000).result()
+    assert cli.main(["--database", db.path, "stop", "-n", "cli"]) == 0
+    with pytest.raises(RuntimeError):
+        checkpoint.stop(1000, 1600, "gui").result()
+    assert [notes for _, _, notes in rows(db)] == ["cli"]
+
+
+def test_stop_of_a_replaced_session_fails(db: Database) -> None:
+    checkpoint = ActiveSession(db)
+    checkpoint.begin(1000).result()
+    checkpoint.discard().result()
+    checkpoint.begin(5000).result()
+    with pytest.raises(RuntimeError):
+        checkpoint.stop(1000, 1600, None).result()
+    assert checkpoint.get() == (5000, 5000)
+    assert rows(db) == []
+
+
+# #[EOF]#######################################################################
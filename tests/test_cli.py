@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+  test_cli.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:37:09
+
+  Purpose: Command line session commands.
+"""
+
+import json
+import subprocess
+import sys
+
+from typing import Any, Dict
+
+import cli
+
+from tests.conftest import SOURCES
+
+
+STATUS_PROBE: str = """
+import json, sys
+import cli
+code = cli.main(["--database", %r, "status"])
+print(json.dumps({"code": code, "sqlalchemy": "sqlalchemy" in sys.modules}))
+"""
+
+
+def test_start_stop_round_trip(tmp_path, capsys) -> None:
+    path: str = str(tmp_path / "data.sqlite")
+    assert cli.main(["--database", path, "status"]) == 0
+    assert cli.main(["--database", path, "start"]) == 0
+    assert cli.main(["--database", path, "start"]) == 1
+    assert cli.main(["--database", path, "status"]) == 0
+    assert cli.main(["--database", path, "stop", "-n", "cli"]) == 0
+    assert cli.main(["--database", path, "stop"]) == 1
+    out: str = capsys.readouterr().out
+    assert out.startswith("stopped\nstarted at ")
+    assert "\nrunning " in out
+    assert "\nstopped, elapsed " in out
+
+
+def test_status_does_not_load_the_database_layer(tmp_path) -> None:
+    path: str = str(tmp_path / "data.sqlite")
+    assert cli.main(["--database", path, "start"]) == 0
+    out = subprocess.run(
+        [sys.executable, "-c", STATUS_PROBE % path],
+        cwd=SOURCES,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    )
+    result: Dict[str, Any] = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result == {"code": 0, "sqlalchemy": False}
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+  test_delta.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:52:18
+
+  Purpose: Incremental delta export and import.
+"""
+
+import json
+import os
+
+from typing import Any, Dict, Iterator, Tuple
+
+import pytest
+
+from sqlalchemy import text
+
+from libs.database import Database
+from libs.delta import DeltaExport, DeltaExporter, DeltaFormat, DeltaImporter
+
+from tests.conftest import add, remove, rows, stamp
+
+
+@pytest.fixture
+def pair(tmp_path) -> Iterator[Tuple[Database, Database, str]]:
+    """Source and destination databases with the export directory."""
+    source = Database(str(tmp_path / "source.sqlite"))
+    destination = Database(str(tmp_path / "destination.sqlite"))
+    try:
+        yield source, destination, str(tmp_path / "deltas")
+    finally:
+        for db in (source, destination):
+            db.writer.close(timeout=5)
+
+
+def export(db: Database, directory: str) -> DeltaExport:
+    """Export uncompressed delta."""
+    return DeltaExporter(db).export(directory, None)
+
+
+def manifest(directory: str) -> Dict[str, Any]:
+    """Returns the manifest of the directory."""
+    with open(os.path.join(directory, DeltaFormat.MANIFEST), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def write_manifest(directory: str, data: Dict[str, Any]) -> None:
+    """Replace the manifest of the directory."""
+    with open(
+        os.path.join(directory, DeltaFormat.MANIFEST), "w", encoding="utf-8"
+    ) as file:
+        json.dump(data, file)
+
+
+def test_base_then_incremental_deltas(pair) -> None:
+    source, destination, directory = pair
+    add(source, stamp(2026, 3, 1), 3600, "a")
+    first: DeltaExport = export(source, directory)
+    assert first.base and first.records == 1
+    assert export(source, directory).file is None
+    add(source, stamp(2026, 3, 2), 1800, "b")
+    remove(source, stamp(2026, 3, 1))
+    second: DeltaExport = export(source, directory)
+    assert not second.base and second.records == 2
+    assert [item["base"] for item in manifest(directory)["deltas"]] == [True, False]
+    result = DeltaImporter(destination).apply(directory)
+    assert (result.deltas, result.inserted, result.deleted) == (2, 2, 1)
+    assert rows(destination) == rows(source)
+    # applied deltas are remembered
+    assert DeltaImporter(destination).apply(directory).deltas == 0
+
+
+def test_lost_log_starts_a_new_epoch(pair) -> None:
+    source, destination, directory = pair
+    add(source, stamp(2026, 3, 1), 3600, "a")
+    export(source, directory)
+    DeltaImporter(destination).apply(directory)
+    old: Dict[str, Any] = manifest(directory)
+    add(source, stamp(2026, 3, 2), 1800, "b")
+    # the log lost the change, the next export is a base one
+    source.writer.submit(
+        lambda session: session.execute(text("DELETE FROM change_log"))
+    ).result()
+    delta: DeltaExport = export(source, directory)
+    assert delta.base and delta.records == 2
+    new: Dict[str, Any] = manifest(directory)
+    assert new["epoch"] != old["epoch"]
+    assert [item["file"] for item in new["deltas"]] == [delta.file]
+    assert not os.path.exists(os.path.join(directory, old["deltas"][0]["file"]))
+    result = DeltaImporter(destination).apply(directory)
+    assert (result.deltas, result.inserted, result.skipped) == (1, 1, 1)
+    assert rows(destination) == rows(source)
+
+
+def test_gap_in_the_deltas_is_detected(pair) -> None:
+    source, destination, directory = pair
+    add(source, stamp(2026, 3, 1), 3600, "a")
+    export(source, directory)
+    DeltaImporter(destination).apply(directory)
+    add(source, stamp(2026, 3, 2), 1800, "b")
+    export(source, directory)
+    add(source, stamp(2026, 3, 3), 900, "c")
+    export(source, directory)
+    data: Dict[str, Any] = manifest(directory)
+    # the delta following the applied one is lost
+    del data["deltas"][1]
+    write_manifest(directory, data)
+    with pytest.raises(ValueError, match="Missing changes"):
+        DeltaImporter(destination).apply(directory)
+    assert len(rows(destination)) == 1
+
+
+def test_new_epoch_has_to_start_with_a_base_delta(pair) -> None:
+    source, destination, directory = pair
+    add(source, stamp(2026, 3, 1), 3600, "a")
+    export(source, directory)
+    add(source, stamp(2026, 3, 2), 1800, "b")
+    export(source, directory)
+    data: Dict[str, Any] = manifest(directory)
+    del data["deltas"][0]
+    write_manifest(directory, data)
+    with pytest.raises(ValueError, match="not a base one"):
+        DeltaImporter(destination).apply(directory)
+    assert rows(destination) == []
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+  test_generator.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:41:41
+
+  Purpose: Deterministic synthetic data of the benchmarks.
+"""
+
+from statistics import median
+from typing import List
+
+from benchmarks.generator import Generator, Record
+
+
+COUNT: int = 1000
+
+
+def test_same_seed_gives_same_records() -> None:
+    first: List[Record] = list(Generator(seed=7).records(COUNT))
+    second: List[Record] = list(Generator(seed=7).records(COUNT))
+    assert len(first) == COUNT
+    assert first == second
+    assert list(Generator(seed=8).records(COUNT)) != first
+
+
+def test_records_are_ordered_within_the_span() -> None:
+    generator = Generator(seed=7, years=1.0)
+    starts: List[int] = [start for start, _, _ in generator.records(COUNT)]
+    assert starts == sorted(starts)
+    assert generator.begin < starts[0]
+    # every step is at most 1.5 times the average one
+    assert starts[-1] <= generator.begin + generator.span * 1.5
+
+
+def test_duration_distribution() -> None:
+    records: List[Record] = list(Generator(seed=7).records(COUNT))
+    durations: List[int] = [duration for _, duration, _ in records]
+    garbage: List[int] = [item for item in durations if abs(item) <= 120]
+    taken: List[int] = [item for item in durations if item < -120]
+    worked: List[int] = [item for item in durations if item > 120]
+    # about 2% garbage, 15% hours taken off, the rest overtime sessions
+    assert 0 < len(garbage) < 0.05 * COUNT
+    assert 0.10 * COUNT < len(taken) < 0.20 * COUNT
+    assert {-item // 3600 for item in taken} <= {1, 2, 4, 8}
+    assert all(300 <= item <= 36000 for item in worked)
+    assert 2700 < median(worked) < 5400
+    # about 30% of records have notes
+    notes: int = sum(1 for _, _, item in records if item)
+    assert 0.2 * COUNT < notes < 0.4 * COUNT
+
+
+# #[EOF]#######################################################################
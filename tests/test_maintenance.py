@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+  test_maintenance.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:41:18
+
+  Purpose: Background maintenance of older database files.
+"""
+
+import sqlite3
+
+from typing import Iterator
+
+import pytest
+
+from libs.checkpoint import ActiveSession
+from libs.database import Database
+from libs.maintenance import Maintenance
+
+
+@pytest.fixture
+def db(tmp_path) -> Iterator[Database]:
+    """Database file created without incremental auto vacuum."""
+    path: str = str(tmp_path / "data.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA auto_vacuum=NONE")
+    conn.execute("CREATE TABLE legacy (id INTEGER)")
+    conn.close()
+    out = Database(path)
+    try:
+        yield out
+    finally:
+        out.writer.close(timeout=5)
+
+
+def auto_vacuum(db: Database) -> int:
+    """Returns auto vacuum mode of the database file."""
+    conn = sqlite3.connect(db.path)
+    try:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_conversion_waits_for_the_running_session(db: Database, caplog) -> None:
+    checkpoint = ActiveSession(db)
+    checkpoint.begin(1000).result()
+    with caplog.at_level("INFO", logger="libs.maintenance"):
+        assert Maintenance(db).vacuum() == 0
+    assert auto_vacuum(db) == 0
+    assert "skipped" in caplog.text
+    checkpoint.discard().result()
+    Maintenance(db).vacuum()
+    assert auto_vacuum(db) == 2
+
+
+def test_explicit_conversion_ignores_the_running_session(db: Database) -> None:
+    ActiveSession(db).begin(1000).result()
+    Maintenance(db).vacuum(convert=True)
+    assert auto_vacuum(db) == 2
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+  test_migrations.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:53:53
+
+  Purpose: Schema upgrade of databases created by the old versions.
+"""
+
+import sqlite3
+
+from typing import List, Tuple
+
+from libs.database import Database
+from libs.migrations import MIGRATIONS, Migrations
+
+from tests.conftest import add, rows, stamp
+
+
+# worktime table created by the unversioned releases, metadata.create_all()
+BASELINE: str = (
+    "CREATE TABLE worktime (\n"
+    "\tid INTEGER NOT NULL, \n"
+    "\tstart INTEGER NOT NULL, \n"
+    "\tduration INTEGER NOT NULL, \n"
+    "\tnotes TEXT, \n"
+    "\tPRIMARY KEY (id)\n"
+    ")"
+)
+
+RECORDS: List[Tuple[int, int, str]] = [
+    (stamp(2025, 11, 3), 3600, "release"),
+    (stamp(2025, 11, 20), -1800, ""),
+    (stamp(2025, 12, 1), 5400, "on-call"),
+]
+
+
+def baseline(path: str) -> None:
+    """Create database file as the unversioned releases did."""
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(BASELINE)
+        conn.executemany(
+            "INSERT INTO worktime (start, duration, notes) VALUES (?, ?, ?)", RECORDS
+        )
+    conn.close()
+
+
+def query(path: str, sql: str) -> List[Tuple]:
+    """Returns rows of the query run on a plain connection."""
+    conn = sqlite3.connect(path)
+    try:
+        return list(conn.execute(sql))
+    finally:
+        conn.close()
+
+
+def test_baseline_database_is_upgraded_to_the_latest_version(tmp_path) -> None:
+    path: str = str(tmp_path / "data.sqlite")
+    baseline(path)
+    db = Database(path)
+    try:
+        assert db.engine is not None
+        migrations = Migrations(db.engine)
+        assert migrations.latest == MIGRATIONS[-1][0] == 10
+        assert migrations.version == migrations.latest
+        assert rows(db) == RECORDS
+        # derived tables are filled from the existing records
+        assert query(
+            path, "SELECT month, total, balance, entries FROM month_balance"
+        ) == [(202511, 1800, 1800, 2), (202512, 5400, 7200, 1)]
+        assert query(path, "SELECT notes FROM notes_index ORDER BY start") == [
+            ("release",),
+            ("on-call",),
+        ]
+        assert query(path, "SELECT COUNT(*) FROM database_info WHERE key='id'") == [
+            (1,)
+        ]
+        assert query(
+            path,
+            "SELECT name FROM sqlite_master WHERE type='index' "
+            "AND name='ix_worktime_start_duration'",
+        ) == [("ix_worktime_start_duration",)]
+        # changes made after the upgrade are logged for sync
+        add(db, stamp(2026, 1, 5), 600, "new")
+        assert query(path, "SELECT op, start, notes FROM change_log") == [
+            ("+", stamp(2026, 1, 5), "new")
+        ]
+    finally:
+        db.writer.close(timeout=5)
+
+
+def test_upgraded_database_opens_without_changes(tmp_path) -> None:
+    path: str = str(tmp_path / "data.sqlite")
+    baseline(path)
+    Database(path).writer.close(timeout=5)
+    before = query(path, "SELECT * FROM notes_index")
+    db = Database(path)
+    try:
+        assert db.engine is not None
+        assert Migrations(db.engine).version == MIGRATIONS[-1][0]
+        assert query(path, "SELECT * FROM notes_index") == before
+        assert rows(db) == RECORDS
+    finally:
+        db.writer.close(timeout=5)
+
+
+# #[EOF]#######################################################################
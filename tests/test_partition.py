@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+  test_partition.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:51:39
+
+  Purpose: Per-year partitions of the worktime table.
+"""
+
+import os
+import sqlite3
+
+from typing import Iterator, List, Tuple
+
+import pytest
+
+from libs.archive import Archive
+from libs.database import Database
+from libs.partition import Partitions
+
+from tests.conftest import add, remove, rows, stamp
+
+
+@pytest.fixture
+def db(tmp_path) -> Iterator[Database]:
+    """Empty database."""
+    out = Database(str(tmp_path / "data.sqlite"))
+    try:
+        yield out
+    finally:
+        out.writer.close(timeout=5)
+
+
+def stored(db: Database, name: str) -> List[Tuple[int, int]]:
+    """Returns (id, start) rows of the partition file, read directly."""
+    conn = sqlite3.connect(
+        os.path.join(Partitions(db).directory, f"{name}{Partitions.SUFFIX}")
+    )
+    try:
+        return list(conn.execute(f"SELECT id, start FROM worktime_{name} ORDER BY id"))
+    finally:
+        conn.close()
+
+
+def main_table(db: Database) -> int:
+    """Returns number of rows left in the main worktime table."""
+    conn = sqlite3.connect(db.path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM worktime").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_enable_moves_records_to_their_years(db: Database) -> None:
+    add(db, stamp(2024, 3, 1), 3600, "a")
+    add(db, stamp(2025, 3, 1), 1800, "b")
+    add(db, stamp(2026, 3, 1), 600, "c")
+    before = rows(db)
+    partitions = Partitions(db)
+    assert partitions.enable() == 3
+    assert [year for year, _, _, _ in partitions.layout()] == [0, 2024, 2025, 2026]
+    assert main_table(db) == 0
+    assert [start for _, start in stored(db, "2025")] == [stamp(2025, 3, 1)]
+    assert stored(db, "default") == []
+    assert rows(db) == before
+
+
+def test_inserts_are_routed_by_start(db: Database) -> None:
+    Partitions(db).enable()
+    add(db, stamp(2026, 5, 1), 3600, "current")
+    # no partition of its own, goes to the default one
+    add(db, stamp(2010, 5, 1), 1800, "old")
+    assert [start for _, start in stored(db, "2026")] == [stamp(2026, 5, 1)]
+    assert [start for _, start in stored(db, "default")] == [stamp(2010, 5, 1)]
+    assert main_table(db) == 0
+    assert [notes for _, _, notes in rows(db)] == ["old", "current"]
+
+
+def test_deletes_with_ids_clashing_across_partitions(db: Database) -> None:
+    Partitions(db).enable()
+    add(db, stamp(2026, 5, 1), 3600, "current")
+    add(db, stamp(2010, 5, 1), 1800, "old")
+    # every partition numbers its rows on its own
+    assert stored(db, "2026")[0][0] == stored(db, "default")[0][0]
+    remove(db, stamp(2026, 5, 1))
+    assert stored(db, "2026") == []
+    assert [start for _, start in stored(db, "default")] == [stamp(2010, 5, 1)]
+    assert rows(db) == [(stamp(2010, 5, 1), 1800, "old")]
+
+
+def test_split_moves_default_rows_to_new_partitions(db: Database) -> None:
+    partitions = Partitions(db)
+    partitions.enable()
+    add(db, stamp(2023, 5, 1), 1800, "old")
+    assert [start for _, start in stored(db, "default")] == [stamp(2023, 5, 1)]
+    assert partitions.split() == 1
+    assert stored(db, "default") == []
+    assert [start for _, start in stored(db, "2023")] == [stamp(2023, 5, 1)]
+    assert rows(db) == [(stamp(2023, 5, 1), 1800, "old")]
+
+
+def test_dropped_partition_file_is_pruned_later(db: Database) -> None:
+    add(db, stamp(2024, 3, 1), 3600, "archived")
+    add(db, stamp(2026, 3, 1), 600, "kept")
+    partitions = Partitions(db)
+    partitions.enable()
+    assert Archive(db).freeze(2024) == 1
+    assert partitions.maintain()["2024"] == "dropped"
+    assert 2024 not in [year for year, _, _, _ in partitions.layout()]
+    path: str = os.path.join(partitions.directory, f"2024{Partitions.SUFFIX}")
+    # still attached to the pooled connections, removed by a later pass
+    assert os.path.exists(path)
+    assert partitions.prune() == []
+    old: float = os.path.getmtime(path) - 2 * Partitions.ORPHAN_AGE
+    os.utime(path, (old, old))
+    assert f"2024{Partitions.SUFFIX}" in partitions.prune()
+    assert not os.path.exists(path)
+    assert rows(db) == [(stamp(2026, 3, 1), 600, "kept")]
+
+
+# #[EOF]#######################################################################
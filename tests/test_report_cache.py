@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+  test_report_cache.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:49:16
+
+  Purpose: Report pages cache invalidation.
+"""
+
+import sqlite3
+
+from typing import Iterator
+
+import pytest
+
+from libs.checkpoint import ActiveSession
+from libs.database import Database
+from libs.report_cache import ReportCache
+
+
+@pytest.fixture
+def db(tmp_path) -> Iterator[Database]:
+    """Database with one cached open ended page."""
+    out = Database(str(tmp_path / "data.sqlite"))
+    ReportCache.put(out, "page", None, ["row"], ReportCache.generation(out))
+    try:
+        yield out
+    finally:
+        ReportCache.clear()
+        out.writer.close(timeout=5)
+
+
+def test_write_of_another_process_drops_the_pages(db: Database) -> None:
+    assert ReportCache.get(db, "page") == ["row"]
+    conn = sqlite3.connect(db.path)
+    with conn:
+        conn.execute(
+            "INSERT INTO worktime (start, duration, notes) VALUES (100, 60, 'cli')"
+        )
+    conn.close()
+    assert ReportCache.get(db, "page") is None
+
+
+def test_own_commits_keep_the_unaffected_pages(db: Database) -> None:
+    # the heartbeat does not touch the records
+    ActiveSession(db).begin(1000).result()
+    assert ReportCache.get(db, "page") == ["row"]
+    ReportCache.put(db, "closed", 500, ["old"], ReportCache.generation(db))
+    # a record stored after the closed report changes only the open one
+    ActiveSession(db).stop(1000, 1600, "own").result()
+    assert ReportCache.get(db, "closed") == ["old"]
+    assert ReportCache.get(db, "page") is None
+
+
+# #[EOF]#######################################################################
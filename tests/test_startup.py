@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+  test_startup.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:34:47
+
+  Purpose: GUI startup time budget.
+
+  Every probe runs in a fresh interpreter with a temporary HOME, so the
+  user database is never touched. Importing the GUI entry point must
+  not load the heavy modules, the first window must be drawn before
+  the database is opened.
+
+  Wall clock budgets depend on the machine, the timing tests run only
+  when the WORKCLOCK_TIMING environment variable is set. Its value is
+  the budget scale factor, e.g. WORKCLOCK_TIMING=1 on a developer
+  machine or WORKCLOCK_TIMING=3 on a slow one.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from typing import Any, Dict, List
+
+import pytest
+
+from tests.conftest import SOURCES
+
+
+# seconds, the best of REPEAT runs, multiplied by the WORKCLOCK_TIMING scale
+IMPORT_BUDGET: float = 0.25
+WINDOW_BUDGET: float = 0.6
+REPEAT: int = 3
+TIMING_ENV: str = "WORKCLOCK_TIMING"
+
+# modules that must be loaded on demand only
+DEFERRED: List[str] = [
+    "sqlalchemy",
+    "tkcalendar",
+    "l10n",
+    "libs.database",
+    "libs.report",
+]
+
+IMPORT_PROBE: str = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+WINDOW_PROBE: str = """
+import json, sys, time
+start = time.perf_counter()
+import main
+app = main.WorkClock()
+elapsed = time.perf_counter() - start
+app.after(1000, app.destroy)
+app.mainloop()
+print(json.dumps({"elapsed": elapsed}))
+"""
+
+
+def probe(code: str, home: str) -> Dict[str, Any]:
+    """Run probe in a fresh interpreter, returns its JSON output."""
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SOURCES,
+        env=dict(os.environ, HOME=home),
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def scale() -> float:
+    """Returns the budget scale factor, skips the test if timing is off."""
+    value: str = os.environ.get(TIMING_ENV, "").strip()
+    if not value:
+        pytest.skip(f"timing budgets are enabled with {TIMING_ENV}")
+    try:
+        out = float(value)
+    except ValueError:
+        pytest.fail(f"{TIMING_ENV} must be a number, got: {value!r}")
+    if out <= 0:
+        pytest.fail(f"{TIMING_ENV} must be positive, got: {value!r}")
+    return out
+
+
+def test_import_main_defers_heavy_modules(tmp_path) -> None:
+    assert probe(IMPORT_PROBE % DEFERRED, str(tmp_path))["loaded"] == []
+
+
+def test_import_main_within_budget(tmp_path) -> None:
+    budget: float = IMPORT_BUDGET * scale()
+    best: float = min(
+        probe(IMPORT_PROBE % DEFERRED, str(tmp_path))["elapsed"]
+        for _ in range(REPEAT)
+    )
+    assert best <= budget, f"import main took {best * 1000:.0f} ms"
+
+
+def test_first_window_within_budget(tmp_path) -> None:
+    budget: float = WINDOW_BUDGET * scale()
+    if not os.environ.get("DISPLAY") and sys.platform not in ("win32", "darwin"):
+        pytest.skip("no display")
+    best: float = min(
+        probe(WINDOW_PROBE, str(tmp_path))["elapsed"] for _ in range(REPEAT)
+    )
+    assert best <= budget, f"first window took {best * 1000:.0f} ms"
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+  test_sync.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:34:29
+
+  Purpose: Two-way sync against an in-process sync server.
+"""
+
+from typing import Iterator, List
+
+import pytest
+
+from sqlalchemy import text
+
+from libs.archive import Archive
+from libs.database import Database
+from libs.sync import SyncClient, SyncResult, decode_changes, record_uid
+from libs.sync_server import SyncServer
+
+from tests.conftest import Row, add, remove, rows, stamp
+
+
+class Devices(object):
+    """Server and two client databases."""
+
+    def __init__(self, hub: Database, a: Database, b: Database, url: str) -> None:
+        """Constructor."""
+        self.hub: Database = hub
+        self.a: Database = a
+        self.b: Database = b
+        self.url: str = url
+
+    def sync(self, db: Database) -> SyncResult:
+        """Run one sync cycle of the client."""
+        return SyncClient(db, self.url).sync()
+
+
+@pytest.fixture
+def devices(tmp_path) -> Iterator[Devices]:
+    """Sync server on a free port with two clients."""
+    hub = Database(str(tmp_path / "hub.sqlite"))
+    a = Database(str(tmp_path / "a.sqlite"))
+    b = Database(str(tmp_path / "b.sqlite"))
+    server = SyncServer(hub, port=0)
+    server.start()
+    try:
+        yield Devices(hub, a, b, server.url)
+    finally:
+        server.stop(timeout=5)
+        for db in (a, b, hub):
+            db.writer.close(timeout=5)
+
+
+def converge(devices: Devices) -> None:
+    """Sync both clients until every change reached both of them."""
+    devices.sync(devices.a)
+    devices.sync(devices.b)
+    devices.sync(devices.a)
+
+
+def test_inserts_reach_the_other_client(devices: Devices) -> None:
+    add(devices.a, stamp(2026, 3, 2), 3600, "a")
+    add(devices.b, stamp(2026, 3, 3), 1800, None)
+    converge(devices)
+    expected: List[Row] = [
+        (stamp(2026, 3, 2), 3600, "a"),
+        (stamp(2026, 3, 3), 1800, None),
+    ]
+    assert rows(devices.a) == expected
+    assert rows(devices.b) == expected
+    assert rows(devices.hub) == expected
+
+
+def test_deletes_reach_the_other_client(devices: Devices) -> None:
+    add(devices.a, stamp(2026, 3, 2), 3600, "a")
+    add(devices.a, stamp(2026, 3, 4), 600, "b")
+    converge(devices)
+    remove(devices.b, stamp(2026, 3, 2))
+    converge(devices)
+    expected: List[Row] = [(stamp(2026, 3, 4), 600, "b")]
+    assert rows(devices.a) == expected
+    assert rows(devices.b) == expected
+    assert rows(devices.hub) == expected
+
+
+def test_same_record_added_on_both_sides_is_merged(devices: Devices) -> None:
+    add(devices.a, stamp(2026, 3, 2), 3600, "same")
+    add(devices.b, stamp(2026, 3, 2), 3600, "same")
+    converge(devices)
+    expected: List[Row] = [(stamp(2026, 3, 2), 3600, "same")]
+    assert rows(devices.a) == expected
+    assert rows(devices.b) == expected
+    assert rows(devices.hub) == expected
+
+
+def test_removal_after_addition_wins(devices: Devices) -> None:
+    add(devices.a, stamp(2026, 3, 2), 3600, "x")
+    devices.sync(devices.a)
+    remove(devices.a, stamp(2026, 3, 2))
+    devices.sync(devices.a)
+    result: SyncResult = devices.sync(devices.b)
+    assert rows(devices.b) == []
+    assert rows(devices.hub) == []
+    # both changes were pulled, the insert was undone by the removal
+    assert result.pulled == 2
+
+
+def test_no_echo_on_the_next_cycle(devices: Devices) -> None:
+    add(devices.a, stamp(2026, 3, 2), 3600, "a")
+    add(devices.b, stamp(2026, 3, 3), 1800, "b")
+    converge(devices)
+    for db in (devices.a, devices.b):
+        result: SyncResult = devices.sync(db)
+        assert result.pushed == 0
+        assert result.pulled == 0
+
+
+def test_archived_year_changes_are_rejected(devices: Devices) -> None:
+    old: int = stamp(2020, 6, 1)
+    add(devices.b, old, 600, "archived")
+    assert Archive(devices.b).freeze(2020) == 1
+    add(devices.a, stamp(2020, 6, 2), 900, "late")
+    devices.sync(devices.a)
+    result: SyncResult = devices.sync(devices.b)
+    assert result.rejected == 1
+    assert rows(devices.b) == []
+
+
+def test_pruned_log_pushes_all_records(devices: Devices) -> None:
+    add(devices.a, stamp(2026, 3, 2), 3600, "first")
+    devices.sync(devices.a)
+    add(devices.a, stamp(2026, 3, 5), 1200, "lost")
+    # the change log lost track of the server
+    devices.a.writer.submit(
+        lambda session: session.execute(text("DELETE FROM change_log"))
+    ).result()
+    result: SyncResult = devices.sync(devices.a)
+    assert result.pushed == 2
+    devices.sync(devices.b)
+    assert rows(devices.b) == rows(devices.a)
+
+
+def test_decode_changes_accepts_valid_items() -> None:
+    item = [record_uid(100, 60, None), "+", 100, 60, None]
+    assert decode_changes([item]) == [("+", 100, 60, None)]
+
+
+@pytest.mark.parametrize(
+    "item",
+    [
+        # wrong UUID
+        [record_uid(100, 60, "a"), "+", 100, 60, "b"],
+        # unknown operation
+        [record_uid(100, 60, None), "*", 100, 60, None],
+        # missing field
+        [record_uid(100, 60, None), "+", 100, 60],
+        # wrong types
+        [record_uid(100, 60, None), "+", "100", 60, None],
+        [record_uid(100, 60, None), "+", 100, 60.0, None],
+        [record_uid(100, 60, None), "+", 100, 60, 7],
+        "not a list",
+    ],
+)
+def test_decode_changes_rejects_malformed_items(item) -> None:
+    with pytest.raises(ValueError):
+        decode_changes([item])
+
+
+def test_decode_changes_requires_a_list() -> None:
+    with pytest.raises(ValueError):
+        decode_changes({"changes": []})
+
+
+# #[EOF]#######################################################################
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+  test_transfer.py
+  Author : Jacek 'Szumak' Kotlarski --<szumak@virthost.pl>
+  Created: 18.10.2026, 09:52:37
+
+  Purpose: Bulk import through the staging table.
+"""
+
+from typing import Iterator
+
+import pytest
+
+from libs.archive import Archive
+from libs.database import Database
+from libs.transfer import Exporter, Importer, ImportResult
+
+from tests.conftest import add, rows, stamp
+
+
+@pytest.fixture
+def db(tmp_path) -> Iterator[Database]:
+    """Database with one record."""
+    out = Database(str(tmp_path / "data.sqlite"))
+    add(out, stamp(2026, 3, 1), 3600, "a")
+    try:
+        yield out
+    finally:
+        out.writer.close(timeout=5)
+
+
+def test_present_and_repeated_records_are_skipped(db: Database) -> None:
+    result: ImportResult = Importer(db).import_records(
+        iter(
+            [
+                (stamp(2026, 3, 1), 3600, "a"),
+                (stamp(2026, 3, 2), 1800, "b"),
+                (stamp(2026, 3, 2), 1800, "b"),
+                (stamp(2026, 3, 3), 900, None),
+                # a different note is a different record
+                (stamp(2026, 3, 1), 3600, "other"),
+                ("x", 60, None),
+                (True, 60, None),
+                (stamp(2026, 3, 4), 60),
+            ]
+        )
+    )
+    assert result == ImportResult(inserted=3, duplicates=2, rejected=3)
+    assert rows(db) == [
+        (stamp(2026, 3, 1), 3600, "a"),
+        (stamp(2026, 3, 1), 3600, "other"),
+        (stamp(2026, 3, 2), 1800, "b"),
+        (stamp(2026, 3, 3), 900, None),
+    ]
+
+
+def test_duplicates_across_batches(db: Database) -> None:
+    records = [(stamp(2026, 4, day), 600, None) for day in (1, 2, 1, 3, 2)]
+    result: ImportResult = Importer(db, batch=2).import_records(iter(records))
+    assert result == ImportResult(inserted=3, duplicates=2, rejected=0)
+    assert len(rows(db)) == 4
+
+
+def test_archived_years_are_read_only(db: Database) -> None:
+    add(db, stamp(2020, 5, 1), 600, "old")
+    Archive(db).freeze(2020)
+    result: ImportResult = Importer(db).import_records(
+        iter([(stamp(2020, 5, 1), 600, "old"), (stamp(2020, 6, 1), 600, "late")])
+    )
+    assert result == ImportResult(inserted=0, duplicates=1, rejected=1)
+
+
+def test_export_file_imports_once(db: Database, tmp_path) -> None:
+    add(db, stamp(2026, 3, 2), 1800, "b")
+    path: str = str(tmp_path / "export.ndjson.gz")
+    assert Exporter(db).export(path) == 2
+    other = Database(str(tmp_path / "other.sqlite"))
+    try:
+        assert Importer(other).import_file(path) == ImportResult(2, 0, 0)
+        assert Importer(other).import_file(path) == ImportResult(0, 2, 0)
+        assert rows(other) == rows(db)
+    finally:
+        other.writer.close(timeout=5)
+
+
+# #[EOF]#######################################################################